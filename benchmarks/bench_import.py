@@ -0,0 +1,238 @@
+"""
+@author: Zhaoqing Liu
+@email : Zhaoqing.Liu-1@student.uts.edu.au
+@date  : 19/10/26 10:00 am
+@desc  : Benchmark of the worker start-up cost, i.e. the cold import time of
+    the fuzzytrees modules and the construction time of a large forest.
+
+    Each measurement runs in a fresh interpreter, which is what a worker
+    process in a spawn-mode pool (or a freshly started serving process) pays.
+    The results can be saved as a baseline and later runs are compared with
+    it to report regressions.
+
+Usage:
+    $ python benchmarks/bench_import.py
+    $ python benchmarks/bench_import.py --save-baseline
+    $ python benchmarks/bench_import.py --repeat 10 --tolerance 0.5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "import_baseline.json")
+
+# Modules whose cold import time is measured.
+TARGET_MODULES = ["fuzzytrees.fdts", "fuzzytrees.frdf", "fuzzytrees.fgbdt"]
+
+# Number of trees of the forest whose construction time is measured.
+N_ESTIMATORS_CONSTRUCT = 1000
+
+# Code run in a fresh interpreter to time the cold import of one module.
+# NB: The result is printed without the json module, so that it does not
+# show up in the per-module report.
+_IMPORT_SNIPPET = """
+import time
+t = time.perf_counter()
+import {module}
+print('{{"seconds": %r}}' % (time.perf_counter() - t))
+"""
+
+# Code run in a fresh interpreter to time the construction of a forest. The
+# calls of os.makedirs() and os.path.exists() made during the construction
+# are counted, because every one of them is a file system round trip.
+_CONSTRUCT_SNIPPET = """
+import json, os, time
+from fuzzytrees.fdt_base import FuzzificationOptions, CRITERIA_FUNC_CLF
+from fuzzytrees.frdf import FuzzyRDFClassifier
+
+n_fs_calls = [0]
+def _counted(func):
+    def wrapper(*args, **kwargs):
+        n_fs_calls[0] += 1
+        return func(*args, **kwargs)
+    return wrapper
+os.makedirs = _counted(os.makedirs)
+os.path.exists = _counted(os.path.exists)
+
+t = time.perf_counter()
+FuzzyRDFClassifier(disable_fuzzy=False, fuzzification_options=FuzzificationOptions(),
+                   criterion_func=CRITERIA_FUNC_CLF["gini"], n_estimators={n_estimators})
+print(json.dumps({{"seconds": time.perf_counter() - t, "n_fs_calls": n_fs_calls[0]}}))
+"""
+
+
+def _run_snippet(snippet, import_time=False):
+    """
+    Run a snippet of code in a fresh interpreter and return its JSON output
+    and, if required, the per-module report of "python -X importtime".
+    """
+    cmd = [sys.executable]
+    if import_time:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", snippet]
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = PROJECT_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env, cwd=PROJECT_DIR,
+                          universal_newlines=True, check=True)
+    # The JSON result is the last line, anything printed before it is noise.
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result, proc.stderr
+
+
+def parse_import_time(report):
+    """
+    Parse the report of "python -X importtime" into a dictionary of
+    {module name: (self time in seconds, cumulative time in seconds)}.
+    """
+    costs = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        module = fields[2].strip()
+        costs[module] = (int(fields[0]) / 1e6, int(fields[1]) / 1e6)
+    return costs
+
+
+def measure_import(module, repeat):
+    """
+    Measure the cold import time of a module (the fastest of all runs, which
+    is the least disturbed by other processes), and the mean self import
+    costs of the top-level packages imported with it.
+    """
+    seconds = []
+    per_package = {}
+    for _ in range(repeat):
+        result, report = _run_snippet(_IMPORT_SNIPPET.format(module=module), import_time=True)
+        seconds.append(result["seconds"])
+        for name, (self_s, cum_s) in parse_import_time(report).items():
+            # Aggregate submodules into their top-level package, except for
+            # fuzzytrees whose modules are reported one by one.
+            key = name if name.startswith("fuzzytrees") else name.split(".")[0]
+            per_package.setdefault(key, []).append(self_s)
+
+    per_package = {name: sum(costs) / repeat for name, costs in per_package.items()}
+    top = sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:15]
+    return {"seconds": min(seconds), "top_self_seconds": dict(top)}
+
+
+def measure_construction(repeat):
+    """
+    Measure the construction time of a large fuzzy random forest classifier
+    (the fastest of all runs).
+    """
+    seconds = []
+    n_fs_calls = 0
+    for _ in range(repeat):
+        result, _ = _run_snippet(_CONSTRUCT_SNIPPET.format(n_estimators=N_ESTIMATORS_CONSTRUCT))
+        seconds.append(result["seconds"])
+        n_fs_calls = result["n_fs_calls"]
+    return {"seconds": min(seconds), "n_fs_calls": n_fs_calls}
+
+
+def run(repeat):
+    results = {"python": sys.version.split()[0], "repeat": repeat, "imports": {}, "construction": {}}
+    for module in TARGET_MODULES:
+        results["imports"][module] = measure_import(module, repeat)
+    key = "FuzzyRDFClassifier(n_estimators={})".format(N_ESTIMATORS_CONSTRUCT)
+    results["construction"][key] = measure_construction(repeat)
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """
+    Compare the results with the baseline.
+
+    A metric regresses if it is both more than (1 + tolerance) times its
+    baseline value and more than min_delta seconds slower than it.
+
+    Returns
+    -------
+    regressions: list of str
+        The descriptions of all the regressed metrics.
+    """
+    regressions = []
+    for section in ("imports", "construction"):
+        for name, metrics in results[section].items():
+            base = baseline.get(section, {}).get(name)
+            if base is None:
+                continue
+            curr_s, base_s = metrics["seconds"], base["seconds"]
+            if curr_s > base_s * (1 + tolerance) and curr_s - base_s > min_delta:
+                regressions.append("{}: {:.4f}s -> {:.4f}s ({:+.0%})".format(name, base_s, curr_s,
+                                                                          curr_s / base_s - 1))
+            if metrics.get("n_fs_calls", 0) > base.get("n_fs_calls", 0):
+                regressions.append("{}: file system calls {} -> {}".format(name, base["n_fs_calls"],
+                                                                           metrics["n_fs_calls"]))
+    return regressions
+
+
+def print_results(results, baseline):
+    print("=" * 100)
+    print("{:^100}".format("Worker Start-up Benchmark (Python {})".format(results["python"])))
+    print("=" * 100)
+    for module, metrics in results["imports"].items():
+        base = baseline.get("imports", {}).get(module) if baseline else None
+        print("import {:<40}{:>12.4f}s{}".format(
+            module, metrics["seconds"], "" if base is None else "   (baseline {:.4f}s)".format(base["seconds"])))
+        for name, self_s in metrics["top_self_seconds"].items():
+            print("    |-- {:<50}{:>12.4f}s".format(name, self_s))
+    for name, metrics in results["construction"].items():
+        base = baseline.get("construction", {}).get(name) if baseline else None
+        print("{:<47}{:>12.4f}s{}".format(
+            name, metrics["seconds"], "" if base is None else "   (baseline {:.4f}s)".format(base["seconds"])))
+        print("    |-- {:<50}{:>13}".format("os.makedirs/os.path.exists calls", metrics["n_fs_calls"]))
+    print("=" * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import and construction cost of fuzzytrees.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of fresh interpreters per measurement.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Path of the baseline JSON file.")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Relative slowdown over the baseline reported as a regression.")
+    parser.add_argument("--min-delta", type=float, default=0.01,
+                        help="Absolute slowdown (in seconds) below which no regression is reported.")
+    parser.add_argument("--output", default=None, help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print("Saved the baseline to:", args.baseline)
+        return 0
+
+    if baseline is None:
+        print("No baseline found at:", args.baseline)
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    for regression in regressions:
+        print("REGRESSION", regression)
+    if not regressions:
+        print("No regressions against the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
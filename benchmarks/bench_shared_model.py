@@ -0,0 +1,132 @@
+"""
+@author: Zhaoqing Liu
+@email : Zhaoqing.Liu-1@student.uts.edu.au
+@date  : 19/10/26 7:00 pm
+@desc  : Benchmark of the memory used by worker processes serving one model.
+
+    Fit a fuzzy random forest classifier, save it, and start N scoring worker
+    processes that each load the model and predict a batch, in three modes:
+        - "pickle": unpickle a private copy of the model (the old way).
+        - "mmap": util_model_io.load_model(mmap_mode="r"), one sub-estimator
+          object per tree on top of the shared arrays.
+        - "shared": util_model_io.load_model(mmap_mode="r", shared=True), no
+          object per tree at all.
+
+    For each mode, the load time and the private (USS) and proportional
+    (PSS) memory of each worker after predicting are reported, as measured
+    from /proc/<pid>/smaps_rollup (Linux only). With a memory-mapped model,
+    the pages of the model are shared and only counted once across workers.
+
+Usage:
+    $ python benchmarks/bench_shared_model.py --n-estimators 1000 --workers 4
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+MODES = ["pickle", "mmap", "shared"]
+
+
+def read_smaps_rollup():
+    """
+    Get the private (USS) and proportional (PSS) memory of the current
+    process in bytes.
+    """
+    uss = pss = 0
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            fields = line.split()
+            if fields[0] in ("Private_Clean:", "Private_Dirty:"):
+                uss += int(fields[1]) * 1024
+            elif fields[0] == "Pss:":
+                pss = int(fields[1]) * 1024
+    return uss, pss
+
+
+def _serve(mode, path, X, barrier, q):
+    from fuzzytrees.util_model_io import load_model
+
+    uss_before, _ = read_smaps_rollup()
+    time_start = time.perf_counter()
+    if mode == "pickle":
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+    else:
+        model = load_model(path, mmap_mode="r", shared=mode == "shared")
+    load_s = time.perf_counter() - time_start
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.predict(X)
+    # NB: Measure when all the workers have loaded the model, so that the PSS splits the shared pages among them.
+    barrier.wait()
+    uss, pss = read_smaps_rollup()
+    q.put({"load_s": load_s, "uss_bytes": uss - uss_before, "pss_bytes": pss})
+    barrier.wait()
+
+
+def run_mode(mode, path, X, n_workers):
+    ctx = multiprocessing.get_context("fork")
+    barrier = ctx.Barrier(n_workers)
+    q = ctx.Queue()
+    workers = [ctx.Process(target=_serve, args=(mode, path, X, barrier, q)) for _ in range(n_workers)]
+    for worker in workers:
+        worker.start()
+    records = [q.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory of workers serving one fuzzytrees model.")
+    parser.add_argument("--n-estimators", type=int, default=500)
+    parser.add_argument("--max-depth", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    import numpy as np
+    from sklearn.datasets import load_wine
+    from fuzzytrees.fdt_base import CRITERIA_FUNC_CLF
+    from fuzzytrees.frdf import FuzzyRDFClassifier
+    from fuzzytrees.util_model_io import save_model
+
+    np.random.seed(0)
+    X, y = load_wine(return_X_y=True)
+    model = FuzzyRDFClassifier(disable_fuzzy=True, fuzzification_options=None,
+                               criterion_func=CRITERIA_FUNC_CLF["gini"], n_estimators=args.n_estimators,
+                               max_depth=args.max_depth)
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.fit(X, y.astype(int))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {"pickle": os.path.join(tmp_dir, "model.pkl")}
+        with open(paths["pickle"], "wb") as f:
+            pickle.dump(model, f)
+        paths["mmap"] = paths["shared"] = os.path.join(tmp_dir, "model.fzt")
+        save_model(model, paths["mmap"])
+        del model
+
+        print("{} trees, {} workers; model files: pickle {:.1f} KB, fzt {:.1f} KB".format(
+            args.n_estimators, args.workers, os.path.getsize(paths["pickle"]) / 1024,
+            os.path.getsize(paths["mmap"]) / 1024))
+        print("{:<8}{:>14}{:>22}{:>22}".format("mode", "load (ms)", "USS/worker (MB)", "PSS/worker (MB)"))
+        for mode in MODES:
+            records = run_mode(mode, paths[mode], X, args.workers)
+            print("{:<8}{:>14.1f}{:>22.2f}{:>22.2f}".format(
+                mode, 1000 * np.mean([r["load_s"] for r in records]),
+                np.mean([r["uss_bytes"] for r in records]) / 2 ** 20,
+                np.mean([r["pss_bytes"] for r in records]) / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
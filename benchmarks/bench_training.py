@@ -0,0 +1,291 @@
+"""
+@author: Zhaoqing Liu
+@email : Zhaoqing.Liu-1@student.uts.edu.au
+@date  : 19/10/26 2:00 pm
+@desc  : Reproducible training and prediction benchmark suite.
+
+    Time fit(), predict() and predict_proba() of the fuzzy CART classifier,
+    the fuzzy CART regressor, the fuzzy RDF classifier and the fuzzy GBDT
+    classifier on synthetic datasets of different sizes, in crisp mode
+    (disable_fuzzy=True) and in fuzzy mode with several conv_k values.
+
+    Every case runs in its own freshly spawned process, so that its peak
+    resident set size (RSS) is not polluted by the other cases, and the
+    results are written as machine-readable JSON for tracking scaling
+    curves between releases.
+
+    NB: The largest cells of the default grid (e.g. 1M rows x 1000 features)
+    take a very long time with the current tree builder. Use --rows,
+    --features and --timeout to choose the part of the grid to run.
+
+Usage:
+    $ python benchmarks/bench_training.py --rows 1000 10000 --features 10 100
+    $ python benchmarks/bench_training.py --estimators cart_clf rdf_clf --conv-k 3 --timeout 600
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+DEFAULT_ROWS = [1000, 10000, 100000, 1000000]
+DEFAULT_FEATURES = [10, 100, 1000]
+DEFAULT_CONV_KS = [2, 3, 5]
+ESTIMATOR_NAMES = ["cart_clf", "cart_reg", "rdf_clf", "gbdt_clf"]
+
+# Number of classes of the synthetic classification datasets.
+N_CLASSES = 3
+# Number of informative features of the synthetic datasets.
+N_INFORMATIVE = 5
+
+
+# =============================================================================
+# Synthetic data generators
+# =============================================================================
+
+def make_synthetic_data(n_samples, n_features, is_regression, random_state=0):
+    """
+    Generate a reproducible synthetic dataset.
+
+    The target values depend on a linear combination of the first
+    N_INFORMATIVE features plus noise. In classification, the combination
+    is cut into N_CLASSES classes of roughly equal size.
+
+    Returns
+    -------
+    X, y: tuple of ndarray
+        X is of shape (n_samples, n_features) and y of shape (n_samples,).
+    """
+    import numpy as np
+
+    rng = np.random.RandomState(random_state)
+    X = rng.standard_normal((n_samples, n_features))
+    n_informative = min(N_INFORMATIVE, n_features)
+    coef = rng.uniform(-1, 1, n_informative)
+    z = X[:, :n_informative].dot(coef) + 0.1 * rng.standard_normal(n_samples)
+    if is_regression:
+        return X, z
+    edges = np.quantile(z, np.linspace(0, 1, N_CLASSES + 1)[1:-1])
+    return X, np.digitize(z, edges).astype(float)
+
+
+# =============================================================================
+# Benchmark cases
+# =============================================================================
+
+def _build_estimator(name, disable_fuzzy, fuzzification_options, args):
+    from fuzzytrees.fdt_base import CRITERIA_FUNC_CLF, CRITERIA_FUNC_REG
+    from fuzzytrees.fdts import FuzzyCARTClassifier, FuzzyCARTRegressor
+    from fuzzytrees.fgbdt import FuzzyGBDTClassifier
+    from fuzzytrees.frdf import FuzzyRDFClassifier
+
+    if name == "cart_clf":
+        return FuzzyCARTClassifier(disable_fuzzy=disable_fuzzy, fuzzification_options=fuzzification_options,
+                                   criterion_func=CRITERIA_FUNC_CLF["gini"], max_depth=args["max_depth"],
+                                   max_leaf_nodes=args["max_leaf_nodes"], splitter=args["splitter"])
+    if name == "cart_reg":
+        return FuzzyCARTRegressor(disable_fuzzy=disable_fuzzy, fuzzification_options=fuzzification_options,
+                                  criterion_func=CRITERIA_FUNC_REG["mse"], max_depth=args["max_depth"],
+                                  max_leaf_nodes=args["max_leaf_nodes"], splitter=args["splitter"])
+    if name == "rdf_clf":
+        return FuzzyRDFClassifier(disable_fuzzy=disable_fuzzy, fuzzification_options=fuzzification_options,
+                                  criterion_func=CRITERIA_FUNC_CLF["gini"], n_estimators=args["n_estimators"],
+                                  max_depth=args["max_depth"], max_leaf_nodes=args["max_leaf_nodes"],
+                                  splitter=args["splitter"])
+    if name == "gbdt_clf":
+        return FuzzyGBDTClassifier(disable_fuzzy=disable_fuzzy, fuzzification_options=fuzzification_options,
+                                   criterion_func=CRITERIA_FUNC_REG["mse"], n_estimators=args["n_estimators"],
+                                   max_depth=args["max_depth"], max_leaf_nodes=args["max_leaf_nodes"])
+    raise ValueError("Unknown estimator: {}".format(name))
+
+
+def _get_peak_rss_bytes():
+    """
+    Get the peak resident set size of the current process in bytes, or None
+    if it cannot be measured on the current platform.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # NB: ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(case):
+    """
+    Run one benchmark case in the current process and return its record.
+    """
+    import numpy as np
+    from fuzzytrees.fdt_base import FuzzificationOptions
+    from fuzzytrees.util_data_processing_funcs import extract_fuzzy_features
+
+    record = dict(case)
+    np.random.seed(case["random_state"])
+
+    is_regression = case["estimator"] == "cart_reg"
+    X, y = make_synthetic_data(case["n_samples"] + case["n_predict"], case["n_features"], is_regression,
+                               random_state=case["random_state"])
+
+    disable_fuzzy = case["conv_k"] is None
+    fuzzification_options = None
+    record["fuzzify_s"] = None
+    if not disable_fuzzy:
+        fuzzification_options = FuzzificationOptions(conv_k=case["conv_k"])
+        time_start = time.perf_counter()
+        # NB: The default fuzzy_reg=0.0 makes the fuzzification evaluate log(0), which is harmless.
+        with np.errstate(divide="ignore"):
+            X = np.concatenate((X, extract_fuzzy_features(X, conv_k=case["conv_k"])), axis=1)
+        record["fuzzify_s"] = time.perf_counter() - time_start
+    record["data_bytes"] = int(X.nbytes + y.nbytes)
+
+    X_train, y_train = X[:case["n_samples"]], y[:case["n_samples"]]
+    X_test = X[case["n_samples"]:]
+
+    estimator = _build_estimator(case["estimator"], disable_fuzzy, fuzzification_options, case)
+
+    # NB: Some estimators report their progress on stdout, which is not part of the results.
+    with contextlib.redirect_stdout(io.StringIO()):
+        time_start = time.perf_counter()
+        estimator.fit(X_train, y_train)
+        record["fit_s"] = time.perf_counter() - time_start
+
+        time_start = time.perf_counter()
+        estimator.predict(X_test)
+        record["predict_s"] = time.perf_counter() - time_start
+
+        record["predict_proba_s"] = None
+        if hasattr(estimator, "predict_proba"):
+            time_start = time.perf_counter()
+            estimator.predict_proba(X_test)
+            record["predict_proba_s"] = time.perf_counter() - time_start
+
+    record["peak_rss_bytes"] = _get_peak_rss_bytes()
+    record["status"] = "ok"
+    return record
+
+
+def _run_case_in_child(case, q):
+    try:
+        q.put(run_case(case))
+    except Exception as e:
+        record = dict(case)
+        record["status"] = "error: {}: {}".format(type(e).__name__, e)
+        q.put(record)
+
+
+def run_case_isolated(case, timeout):
+    """
+    Run one benchmark case in a freshly spawned process, killing it if it
+    exceeds the timeout (in seconds, None for no limit).
+    """
+    ctx = multiprocessing.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_run_case_in_child, args=(case, q))
+    p.start()
+    try:
+        record = q.get(timeout=timeout)
+    except Exception:
+        record = dict(case)
+        record["status"] = "timeout"
+    p.join(timeout=5)
+    if p.is_alive():
+        p.terminate()
+        p.join()
+    return record
+
+
+def iter_cases(args):
+    """
+    Iterate over all the benchmark cases of the grid specified by args.
+    """
+    modes = [None] + list(args.conv_k)  # None means crisp mode.
+    for n_samples, n_features, estimator, conv_k in itertools.product(args.rows, args.features, args.estimators,
+                                                                      modes):
+        yield {"estimator": estimator,
+               "mode": "crisp" if conv_k is None else "fuzzy",
+               "conv_k": conv_k,
+               "n_samples": n_samples,
+               "n_features": n_features,
+               "n_predict": n_samples if args.n_predict is None else args.n_predict,
+               "max_depth": args.max_depth,
+               "max_leaf_nodes": args.max_leaf_nodes,
+               "splitter": args.splitter,
+               "n_estimators": args.n_estimators,
+               "random_state": args.random_state}
+
+
+def get_meta(args):
+    import numpy as np
+    import fuzzytrees
+
+    return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+            "fuzzytrees": fuzzytrees.__version__,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "n_cpu": os.cpu_count(),
+            "args": vars(args)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark training and prediction of fuzzytrees estimators.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="Numbers of training samples.")
+    parser.add_argument("--features", type=int, nargs="+", default=DEFAULT_FEATURES, help="Numbers of features.")
+    parser.add_argument("--estimators", nargs="+", choices=ESTIMATOR_NAMES, default=ESTIMATOR_NAMES)
+    parser.add_argument("--conv-k", type=int, nargs="*", default=DEFAULT_CONV_KS,
+                        help="conv_k values of fuzzy mode (crisp mode is always run).")
+    parser.add_argument("--n-predict", type=int, default=None,
+                        help="Number of samples to predict (default: the number of training samples).")
+    parser.add_argument("--max-depth", type=int, default=5)
+    parser.add_argument("--max-leaf-nodes", type=int, default=None,
+                        help="Maximum number of leaves per tree (grows the trees best-first).")
+    parser.add_argument("--splitter", choices=["best", "random"], default="best",
+                        help="Split strategy of the trees (not used by gbdt_clf).")
+    parser.add_argument("--n-estimators", type=int, default=10, help="Number of trees of the ensembles.")
+    parser.add_argument("--random-state", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=None, help="Time limit of each case in seconds.")
+    parser.add_argument("--output", default=None, help="Path of the JSON results file.")
+    args = parser.parse_args()
+
+    # Make the package importable by the spawned processes when run from a checkout.
+    if PROJECT_DIR not in os.environ.get("PYTHONPATH", "").split(os.pathsep):
+        os.environ["PYTHONPATH"] = PROJECT_DIR + os.pathsep + os.environ.get("PYTHONPATH", "")
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+
+    output = args.output
+    if output is None:
+        os.makedirs(DEFAULT_OUTPUT_DIR, exist_ok=True)
+        output = os.path.join(DEFAULT_OUTPUT_DIR, "training_{}.json".format(time.strftime("%Y%m%d_%H%M%S")))
+
+    results = {"meta": get_meta(args), "results": []}
+    for case in iter_cases(args):
+        record = run_case_isolated(case, args.timeout)
+        results["results"].append(record)
+        print("{estimator:<9} {mode:<6} conv_k={conv_k!s:<5} rows={n_samples:<8} features={n_features:<5}".format(
+            **record), end=" ")
+        if record["status"] == "ok":
+            print("fit {:.4f}s  predict {:.4f}s  peak RSS {:.1f} MB".format(
+                record["fit_s"], record["predict_s"], (record["peak_rss_bytes"] or 0) / 2 ** 20))
+        else:
+            print(record["status"])
+
+        # Write the results after every case, so that a long run can be inspected or interrupted.
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    print("Saved the results to:", output)
+
+
+if __name__ == '__main__':
+    main()
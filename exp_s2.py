@@ -16,7 +16,8 @@ from sklearn.model_selection import KFold
 
 from fuzzytrees.fdt_base import FuzzificationOptions, FuzzyDecisionTreeWrapper, CRITERIA_FUNC_CLF, CRITERIA_FUNC_REG
 from fuzzytrees.fdts import FuzzyCARTClassifier
-from fuzzytrees.settings import ComparisionMode, EvaluationType, NUM_CPU_CORES_REQ, FUZZY_STRIDE, FUZZY_LIM, DirSave
+from fuzzytrees.settings import ComparisionMode, EvaluationType, NUM_CPU_CORES_REQ, FUZZY_STRIDE, FUZZY_LIM, DirSave, \
+    ensure_dir_save, print_env_config
 from fuzzytrees.fgbdt import FuzzyGBDTClassifier
 from fuzzytrees.util_data_handler import DS_LOAD_FUNC_CLF
 from fuzzytrees.util_data_processing_funcs import extract_fuzzy_features
@@ -273,6 +274,8 @@ The reason it is not recommended to put execution code in child processes is bec
 !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 """
 if __name__ == '__main__':
+    print_env_config()
+    ensure_dir_save()
     print("Main Process (%s) started." % os.getpid())
     time_start = time.time()
 
@@ -8,9 +8,11 @@ import os
 import time
 from fuzzytrees.fdt_base import FuzzyDecisionTreeWrapper, FuzzificationOptions, CRITERIA_FUNC_CLF
 from fuzzytrees.fdts import FuzzyCARTClassifier
+from fuzzytrees.settings import print_env_config
 
 
 if __name__ == '__main__':
+    print_env_config()
     print("Main Process (%s) started." % os.getpid())
     # Record the start time used to calculate the time spent running one experiment.
     time_start = time.time()
@@ -5,26 +5,30 @@
 @date: 03/12/2020 10:00 am
 @desc:
 """
+import heapq
+import itertools
 import multiprocessing
 import os
+import time
 import traceback
-import warnings
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-import joblib
 import numpy as np
-import pandas as pd
-from sklearn.metrics import accuracy_score
-from sklearn.model_selection import KFold
-from fuzzytrees.settings import DirSave, NUM_CPU_CORES_REQ, NUM_GRP_MDLS, EvaluationType
+from fuzzytrees.settings import DirSave, NUM_CPU_CORES_REQ, NUM_GRP_MDLS, EvaluationType, ensure_dir_save
+from fuzzytrees.fdt_flat import FlatTree, predict_tuples
 from fuzzytrees.util_comm import get_today_str
 from fuzzytrees.util_criterion_funcs import calculate_proba, calculate_entropy, calculate_gini, calculate_variance, \
     calculate_standard_deviation
-from fuzzytrees.util_data_handler import load_data_clf
-from fuzzytrees.util_data_processing_funcs import extract_fuzzy_features
-from fuzzytrees.util_plotter import plot_multi_lines
+from fuzzytrees.util_data_processing_funcs import DEFAULT_CHUNK_SIZE, get_fuzzy_set_table, get_soft_half_widths, \
+    iter_predict_chunks, to_row
+from fuzzytrees.util_profiler import FitStats, get_phase_timer, track_memory_usage
+from fuzzytrees.util_quantile_sketch import get_quantile_split_values
 
-warnings.filterwarnings("always")
+# NB: Modules only needed by the experiment functions of FuzzyDecisionTreeWrapper,
+# e.g. pandas, sklearn, the model format, the data loaders and the plotter (matplotlib),
+# are imported inside those functions, so that importing this module and
+# constructing estimators stay fast and free of side effects.
 
 # =============================================================================
 # Types and constants
@@ -46,6 +50,14 @@ class FuzzificationOptions:
 
     Parameters
     ----------
+    fuzzy_reg: float, default=0.0
+        The fuzzy regulation coefficient used in the fuzzification.
+
+    centroids, thetas: array-like of shape (n_features, conv_k), default=None
+        The centroids and the degree of membership thetas of the fuzzy sets
+        of all features, returned by extract_fuzzy_features() with
+        return_fuzzy_sets=True. They are saved with the model, so that new
+        samples can be fuzzified by transform_fuzzy_features().
 
     Attributes
     ----------
@@ -53,7 +65,8 @@ class FuzzificationOptions:
     """
 
     def __init__(self, r_seed=0, conv_size=1, conv_k=3, num_iter=1, feature_filter_func=None,
-                 feature_filter_func_param=None, dataset_df=None, dataset_mms_df=None, X_fuzzy_dms=None):
+                 feature_filter_func_param=None, dataset_df=None, dataset_mms_df=None, X_fuzzy_dms=None,
+                 fuzzy_reg=0.0, centroids=None, thetas=None):
         self.r_seed = r_seed
         self.conv_size = conv_size
         self.conv_k = conv_k
@@ -62,6 +75,9 @@ class FuzzificationOptions:
         self.feature_filter_func_param = feature_filter_func_param
         self.dataset_df = dataset_df
         self.dataset_mms_df = dataset_mms_df
+        self.fuzzy_reg = fuzzy_reg
+        self.centroids = centroids
+        self.thetas = thetas
 
 
 class MultiProcessOptions:
@@ -109,9 +125,10 @@ class Node:
         predicted value.
         NB: Only a leaf node has this attribute value.
 
-    leaf_proba: float, default=None
-        The predicted probability indicated at a leaf node. Only works in the
-        classification tree.
+    leaf_proba: ndarray of shape (n_labels,), default=None
+        The predicted probabilities indicated at a leaf node, i.e. the
+        proportion of each label (in ascending order) in the leaf. Only works
+        in the classification tree.
         NB: Only a leaf node has this attribute value.
 
     branch_true: Node, default=None
@@ -121,7 +138,11 @@ class Node:
     branch_false: Node, default=None
         The next node in the decision path when the feature value of a sample
         does not meet the split rule split_rule.
+
+    NB: The components of a tree use __slots__ instead of a per-instance
+    __dict__, because a forest holds a great many of them.
     """
+    __slots__ = ("split_rule", "leaf_value", "leaf_proba", "branch_true", "branch_false")
 
     def __init__(self, split_rule=None, leaf_value=None, leaf_proba=None, branch_true=None, branch_false=None):
         self.split_rule = split_rule
@@ -145,6 +166,7 @@ class SplitRule:
         The value from the feature indexed as feature_idx representing a split
         rule, on which branching decisions are made based.
     """
+    __slots__ = ("feature_idx", "split_value")
 
     def __init__(self, feature_idx=None, split_value=None):
         self.feature_idx = feature_idx
@@ -173,13 +195,22 @@ class BinarySubtrees:
     subset_false_y: array-like of shape (n_samples,) or (n_samples, n_outputs)
         The subset of target values of the samples that do not meet the
         split_rule after splitting.
+
+    subset_true_sample_weight, subset_false_sample_weight: array-like of shape (n_samples,), default=None
+        The subsets of sample weights, if the tree is fitted with sample
+        weights.
     """
+    __slots__ = ("subset_true_X", "subset_true_y", "subset_false_X", "subset_false_y", "subset_true_sample_weight",
+                 "subset_false_sample_weight")
 
-    def __init__(self, subset_true_X=None, subset_true_y=None, subset_false_X=None, subset_false_y=None):
+    def __init__(self, subset_true_X=None, subset_true_y=None, subset_false_X=None, subset_false_y=None,
+                 subset_true_sample_weight=None, subset_false_sample_weight=None):
         self.subset_true_X = subset_true_X
         self.subset_true_y = subset_true_y
         self.subset_false_X = subset_false_X
         self.subset_false_y = subset_false_y
+        self.subset_true_sample_weight = subset_true_sample_weight
+        self.subset_false_sample_weight = subset_false_sample_weight
 
 
 # =============================================================================
@@ -201,7 +232,7 @@ class DecisionTreeInterface(metaclass=ABCMeta):
     """
 
     @abstractmethod
-    def fit(self, X_train, y_train):
+    def fit(self, X_train, y_train, sample_weight=None):
         pass
 
     @abstractmethod
@@ -233,10 +264,14 @@ class BaseFuzzyDecisionTree(metaclass=ABCMeta):
     for descriptions of all parameters and attributes in this class.
     """
 
+    # Whether the leaf values are class labels, which are voted for instead of averaged in soft inference.
+    _is_classifier = False
+
     # The parameters in this constructor don't need to have default values.
     def __init__(self, disable_fuzzy, X_fuzzy_dms, fuzzification_options, criterion_func, max_depth, min_samples_split,
-                 min_impurity_split,
-                 **kwargs):
+                 min_impurity_split, max_leaf_nodes=None, growth=None, splitter="best", max_features=None,
+                 n_quantiles=None, quantile_min_samples=10000, n_threads=None, random_state=None,
+                 enable_fit_stats=False, fit_stats_callback=None, track_memory=None, **kwargs):
         self.disable_fuzzy = disable_fuzzy
         self.X_fuzzy_dms = X_fuzzy_dms
         self.fuzzification_options = fuzzification_options
@@ -244,6 +279,17 @@ class BaseFuzzyDecisionTree(metaclass=ABCMeta):
         self.max_depth = max_depth
         self.min_samples_split = min_samples_split
         self.min_impurity_split = min_impurity_split
+        self.max_leaf_nodes = max_leaf_nodes
+        self.growth = growth
+        self.splitter = splitter
+        self.max_features = max_features
+        self.n_quantiles = n_quantiles
+        self.quantile_min_samples = quantile_min_samples
+        self.n_threads = n_threads
+        self.random_state = random_state
+        self.enable_fit_stats = enable_fit_stats
+        self.fit_stats_callback = fit_stats_callback
+        self.track_memory = track_memory
 
         self.root = None
         self._split_ds_func = None
@@ -255,37 +301,305 @@ class BaseFuzzyDecisionTree(metaclass=ABCMeta):
         self._best_impurity_gain = 0  # To be deprecated in version 1.0.
         self._fuzzy_sets = None
         self.loss_func = None
-
-    def fit(self, X_train, y_train):
+        self.fit_stats_ = None
+        self.memory_stats_ = None
+        # A FlatTree that replaces root in a model loaded from a model file (see util_model_io).
+        self._flat_tree = None
+        # The thread pool used to search for the best splits during fit() if n_threads > 1, and its number of
+        # threads, resolved from n_threads.
+        self._executor = None
+        self._n_threads = 1
+        # The random generator of the random features and split values during fit(), made from random_state.
+        self._rng = None
+        # A FlatTree of root, made on demand by predict_soft() and predict_one().
+        self._flat_root = None
+        # The nodes as plain Python tuples and the fuzzy sets as plain Python numbers, used by predict_one().
+        self._node_tuples = None
+        self._fuzzy_set_table = None
+        # An optional PredictionCache in front of predict(), see set_prediction_cache().
+        self._prediction_cache = None
+
+    @track_memory_usage("fit")
+    def fit(self, X_train, y_train, sample_weight=None):
         # Store whether y is a multi-dimension set, which means being one-hot encoded.
         self._is_one_dim = len(np.shape(y_train)) == 1
 
+        if sample_weight is not None:
+            sample_weight = np.asarray(sample_weight, dtype=np.float64)
+            if sample_weight.shape != (np.shape(X_train)[0],):
+                raise ValueError("sample_weight must be of shape ({},), got {}".format(np.shape(X_train)[0],
+                                                                                      sample_weight.shape))
+            if np.any(sample_weight < 0) or not np.sum(sample_weight) > 0:
+                raise ValueError("sample_weight must be non-negative and not all zero.")
+            # Samples of zero weight do not count at all, so leave them out, e.g. the samples that are not
+            # drawn in a bootstrap subset given as counts.
+            is_weighted = sample_weight > 0
+            if not np.all(is_weighted):
+                X_train, y_train = np.asarray(X_train)[is_weighted], np.asarray(y_train)[is_weighted]
+                sample_weight = sample_weight[is_weighted]
+
+        # Collect the fit statistics only if they are required.
+        self.fit_stats_ = None
+        if self.enable_fit_stats or self.fit_stats_callback is not None:
+            self.fit_stats_ = FitStats(callback=self.fit_stats_callback)
+            time_start = time.perf_counter()
+
         # # Do feature fuzzification.
         # if not self.disable_fuzzy:
 
-        self.root = self._build_tree(X_train, y_train)
-
+        self._check_params()
+        if self.random_state is None or isinstance(self.random_state, np.random.RandomState):
+            self._rng = np.random if self.random_state is None else self.random_state
+        else:
+            self._rng = np.random.RandomState(self.random_state)
+
+        self._n_threads = os.cpu_count() if self.n_threads == -1 else (self.n_threads or 1)
+        if self._n_threads > 1:
+            with ThreadPoolExecutor(max_workers=self._n_threads) as executor:
+                self._executor = executor
+                try:
+                    self.root = self._build_tree(X_train, y_train, sample_weight=sample_weight)
+                finally:
+                    self._executor = None
+        else:
+            self.root = self._build_tree(X_train, y_train, sample_weight=sample_weight)
+        self._flat_tree = None
+        self._flat_root = None
+        self._node_tuples = None
+        self._fuzzy_set_table = None
+        if self._prediction_cache is not None:
+            self._prediction_cache.clear()
+
+        if self.fit_stats_ is not None:
+            self.fit_stats_.fit_time = time.perf_counter() - time_start
+
+    @track_memory_usage("predict")
     def predict(self, X):
+        if self._prediction_cache is not None:
+            return list(self._prediction_cache.predict(X, self._predict, apply_func=self.apply))
+        return self._predict(X)
+
+    def _predict(self, X):
         # # Do feature fuzzification.
         # if not self.disable_fuzzy:
 
+        if self.root is None and self._flat_tree is not None:
+            return list(self._flat_tree.predict(X))
+
         y_pred = []
         for x in X:
             y_pred.append(self._predict_one(x))
         return y_pred
 
+    @track_memory_usage("predict_proba")
     def predict_proba(self, X):
         # # Do feature fuzzification.
         # if not self.disable_fuzzy:
 
+        if self.root is None and self._flat_tree is not None:
+            return self._flat_tree.predict_proba(X)
+
         y_pred_prob = []
         for x in X:
             y_pred_prob.append(self._predict_proba_one(x))
         return y_pred_prob
 
+    def set_prediction_cache(self, prediction_cache):
+        """
+        Put a cache in front of predict(), or remove it (None).
+
+        Parameters
+        ----------
+        prediction_cache: PredictionCache or None
+            The cache of the predictions of the rows, which is cleared when
+            the model is fitted again. See util_prediction_cache.
+        """
+        self._prediction_cache = prediction_cache
+
+    def predict_one(self, x, fuzzify=False):
+        """
+        Predict the target value of one sample, as fast as possible, e.g. to
+        answer a single request.
+
+        NB: The tree is walked on its nodes as plain Python tuples (see
+        FlatTree.to_tuples()), which are made on the first call, so that no
+        NumPy operation is done per node. For many samples, predict() is
+        faster.
+
+        Parameters
+        ----------
+        x: array-like of shape (n_features,)
+            The input sample.
+
+        fuzzify: bool, default=False
+            Set whether x holds the raw features, which are fuzzified with
+            the fuzzy sets saved in the fuzzification options (see
+            fuzzify_row()).
+
+        Returns
+        -------
+        y_pred: Python number or list
+            The leaf value of the sample.
+        """
+        return predict_tuples(self._get_node_tuples(), self._to_row(x, fuzzify))[1]
+
+    def _get_flat_tree(self):
+        """
+        Get the tree as a FlatTree, i.e. the loaded one, or one made of root.
+        """
+        if self.root is None:
+            if self._flat_tree is None:
+                raise ValueError("The model is not fitted yet.")
+            return self._flat_tree
+        if self._flat_root is None:
+            self._flat_root = FlatTree.from_node(self.root)
+        return self._flat_root
+
+    def _get_node_tuples(self):
+        if self._node_tuples is None:
+            self._node_tuples = self._get_flat_tree().to_tuples()
+        return self._node_tuples
+
+    def apply(self, X):
+        """
+        Get the id of the leaf that each input sample ends up in, e.g. to
+        use the leaves as features or as cache keys.
+
+        NB: The node ids are those of FlatTree.from_node(), i.e. the nodes
+        numbered in depth-first order from the root (node 0), which are the
+        same for the fitted tree and the tree loaded from a model file.
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+            The input samples.
+
+        Returns
+        -------
+        leaf_ids: ndarray of shape (n_samples,)
+            The leaf id of each sample.
+        """
+        return self._get_flat_tree().apply(X)
+
+    def decision_path(self, X):
+        """
+        Get the nodes that each input sample goes through. See apply().
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+            The input samples.
+
+        Returns
+        -------
+        indicator: scipy.sparse.csr_matrix of shape (n_samples, n_nodes)
+            indicator[i, j] is 1 if sample i goes through node j.
+        """
+        return self._get_flat_tree().decision_path(X)
+
+    def predict_soft(self, X, softness=0.5, half_widths=None, min_weight=1e-3):
+        """
+        Predict the target values of the input samples X by soft (fuzzy)
+        inference, i.e. the weight of each sample flows into both branches
+        of the splits near which it lies, by its membership of each branch,
+        and the outputs of the leaves it reaches are blended by their
+        weights (see FlatTree.soft_apply()). In classification, the leaves
+        vote for their classes by their weights.
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+            The input samples.
+
+        softness: float, default=0.5
+            The width of the soft regions below the split values relative
+            to the fuzzy sets of the features, see get_soft_half_widths().
+            0 makes the inference crisp, i.e. the same as predict().
+
+        half_widths: float or array-like of shape (n_features,), default=None
+            The half widths of the soft regions of the columns of X, which
+            are used instead of the ones derived from the fuzzy sets (e.g.
+            for a model without fuzzy sets).
+
+        min_weight: float, default=1e-3
+            The minimum weight of a branch to be followed. A larger value
+            prunes more branches, which makes the inference faster and
+            closer to the crisp one.
+
+        Returns
+        -------
+        y_pred: ndarray of shape (n_samples,) or (n_samples, n_outputs)
+            The predicted values.
+        """
+        flat_tree = self._get_flat_tree()
+        if half_widths is None:
+            half_widths = get_soft_half_widths(np.shape(X)[1], self.fuzzification_options, softness=softness)
+        if self._is_classifier:
+            votes = flat_tree.predict_soft_votes(X, half_widths, flat_tree.get_n_classes(), min_weight=min_weight)
+            return np.argmax(votes, axis=1)
+        return flat_tree.predict_soft(X, half_widths, min_weight=min_weight)
+
+    def predict_proba_soft(self, X, softness=0.5, half_widths=None, min_weight=1e-3):
+        """
+        Predict the probabilities of the classes of the input samples X by
+        soft (fuzzy) inference, i.e. the weights of the leaves each sample
+        reaches for their classes. See predict_soft().
+
+        Returns
+        -------
+        proba: ndarray of shape (n_samples, n_classes)
+            The probability of each class label 0, 1, ..., n_classes - 1.
+        """
+        if not self._is_classifier:
+            raise ValueError("{} is not a classifier.".format(type(self).__name__))
+        flat_tree = self._get_flat_tree()
+        if half_widths is None:
+            half_widths = get_soft_half_widths(np.shape(X)[1], self.fuzzification_options, softness=softness)
+        return flat_tree.predict_soft_votes(X, half_widths, flat_tree.get_n_classes(), min_weight=min_weight)
+
+    def _to_row(self, x, fuzzify=False):
+        if fuzzify and self._fuzzy_set_table is None:
+            self._fuzzy_set_table = get_fuzzy_set_table(self.fuzzification_options)
+        return to_row(x, self._fuzzy_set_table if fuzzify else None)
+
+    def predict_chunks(self, X, chunk_size=DEFAULT_CHUNK_SIZE, fuzzify=False):
+        """
+        Predict the target values of the input samples X block by block,
+        e.g. to score a file that does not fit in memory.
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features), or iterable of such arrays
+            The input samples, e.g. a memory-mapped array or a generator of
+            blocks of rows, see iter_row_chunks().
+
+        chunk_size: int, default=DEFAULT_CHUNK_SIZE
+            The maximum number of samples predicted at once.
+
+        fuzzify: bool, default=False
+            Set whether X holds the raw features, which are fuzzified block
+            by block with the fuzzy sets (centroids and thetas) saved in the
+            fuzzification options, see fuzzify_features().
+
+        Yields
+        ------
+        y_pred_chunk: ndarray
+            The predicted values of each block, in the order of the samples.
+        """
+        return iter_predict_chunks(self.predict, X, chunk_size=chunk_size,
+                                   fuzzification_options=self.fuzzification_options if fuzzify else None)
+
+    def predict_proba_chunks(self, X, chunk_size=DEFAULT_CHUNK_SIZE, fuzzify=False):
+        """
+        Predict the probabilities of the target values of the input samples
+        X block by block. See predict_chunks().
+        """
+        return iter_predict_chunks(self.predict_proba, X, chunk_size=chunk_size,
+                                   fuzzification_options=self.fuzzification_options if fuzzify else None)
+
     def print_tree(self, tree=None, indent="  ", delimiter="=>"):
         if tree is None:
-            tree = self.root
+            tree = self.root if self.root is not None or self._flat_tree is None else self._flat_tree.to_node()
 
         if tree.leaf_value is not None:
             print(tree.leaf_value)
@@ -302,54 +616,160 @@ class BaseFuzzyDecisionTree(metaclass=ABCMeta):
             print("%sFalse%s" % (indent, delimiter), end="")
             self.print_tree(tree.branch_false, indent + indent)
 
-    def _build_tree(self, X, y, current_depth=0):
+    def _build_tree(self, X, y, current_depth=0, sample_weight=None):
+        """
+        Build a decision tree from a work queue of nodes to be generated,
+        instead of recursively.
+
+        Every node is evaluated (i.e. its best split is searched for) when it
+        is put into the queue, and generated as a node with two child nodes
+        to be evaluated, or as a leaf node, when it is taken out of it. The
+        queue is:
+        - a stack in depth-first growth, which generates the nodes in the
+          same order and the same tree as a recursive builder.
+        - a priority queue in best-first growth, which always expands the
+          node with the highest impurity gain next, until the tree has
+          max_leaf_nodes leaves.
+
+        NB: The depth of a tree is not limited by the recursion limit. The
+        evaluations of the nodes in the queue are independent of each
+        other, which makes _evaluate_node() the place to hook node-level
+        parallelism.
+        """
+        best_first = self._get_growth() == "best_first"
+        stats = self.fit_stats_
+        # The root is generated as the branch_true of a placeholder node.
+        root_parent = Node()
+        # Each task is (node_eval, parent, branch), where node_eval is returned by _evaluate_node().
+        queue = []
+        tie_breaker = itertools.count()  # Expand nodes of equal impurity gains in the order of evaluation.
+        n_leaves = 1
+
+        def push(node_eval, parent, branch):
+            if best_first:
+                heapq.heappush(queue, (-node_eval[3], next(tie_breaker), (node_eval, parent, branch)))
+            else:
+                queue.append((node_eval, parent, branch))
+
+        def generate_leaf(node_eval, parent, branch):
+            y, depth, _, best_impurity_gain, _, n_candidates, sample_weight = node_eval
+            if stats is not None:
+                stats.add_node(depth=depth, n_samples=np.shape(y)[0], n_candidates=n_candidates,
+                               impurity_gain=best_impurity_gain, is_leaf=True)
+            with get_phase_timer(stats, "leaf"):
+                if sample_weight is None:
+                    leaf_value = self._leaf_value_calc_func(y)
+                else:
+                    leaf_value = self._leaf_value_calc_func(y, sample_weight=sample_weight)
+                leaf_proba = calculate_proba(y, sample_weight=sample_weight)
+            setattr(parent, branch, Node(leaf_value=leaf_value, leaf_proba=leaf_proba))
+
+        push(self._evaluate_node(X, y, current_depth, sample_weight=sample_weight), root_parent, "branch_true")
+        while queue:
+            node_eval, parent, branch = heapq.heappop(queue)[-1] if best_first else queue.pop()
+            y, depth, best_split_rule, best_impurity_gain, best_binary_subtrees, n_candidates, sample_weight = node_eval
+
+            # If the best subtrees split meet the split criterion min_impurity_split and the budget of
+            # leaves allows it, continue growing subtrees and generate a node. Otherwise, generate a leaf node.
+            if not best_impurity_gain > self.min_impurity_split or \
+                    (self.max_leaf_nodes is not None and n_leaves >= self.max_leaf_nodes):
+                generate_leaf(node_eval, parent, branch)
+                continue
+
+            if stats is not None:
+                stats.add_node(depth=depth, n_samples=np.shape(y)[0], n_candidates=n_candidates,
+                               impurity_gain=best_impurity_gain, is_leaf=False)
+            n_leaves += 1
+            node = Node(split_rule=best_split_rule)
+            setattr(parent, branch, node)
+            if self.max_leaf_nodes is not None and n_leaves >= self.max_leaf_nodes:
+                # The budget of leaves is used up, so the children and all the nodes left in the queue are
+                # generated as leaf nodes, without searching for the best splits of the children.
+                tasks = [task[-1] for task in queue]
+                tasks.append(((best_binary_subtrees.subset_true_y, depth + 1, None, 0, None, 0,
+                               best_binary_subtrees.subset_true_sample_weight), node, "branch_true"))
+                tasks.append(((best_binary_subtrees.subset_false_y, depth + 1, None, 0, None, 0,
+                               best_binary_subtrees.subset_false_sample_weight), node, "branch_false"))
+                for node_eval, parent, branch in tasks:
+                    generate_leaf(node_eval, parent, branch)
+                break
+
+            eval_true = self._evaluate_node(best_binary_subtrees.subset_true_X, best_binary_subtrees.subset_true_y,
+                                            depth + 1, sample_weight=best_binary_subtrees.subset_true_sample_weight)
+            eval_false = self._evaluate_node(best_binary_subtrees.subset_false_X,
+                                             best_binary_subtrees.subset_false_y, depth + 1,
+                                             sample_weight=best_binary_subtrees.subset_false_sample_weight)
+            # NB: In depth-first growth, the branch_true subtree is popped and generated first.
+            push(eval_false, node, "branch_false")
+            push(eval_true, node, "branch_true")
+
+        return root_parent.branch_true
+
+    def _evaluate_node(self, X, y, depth, sample_weight=None):
         """
-        Recursively builds a decision tree.
+        Search for the best split of a node if the node meets the split
+        criteria min_samples_split and max_depth.
 
-        NB: Only decision tree components are generated, either
-            nodes (including root nodes) or leaf nodes.
+        Returns
+        -------
+        node_eval: tuple
+            (y, depth, best_split_rule, best_impurity_gain, best_binary_subtrees,
+            n_candidates, sample_weight), where n_candidates is the number of
+            candidate splits evaluated (only counted when collecting the fit
+            statistics).
         """
         best_split_rule = None
         best_binary_subtrees = None
         best_impurity_gain = 0
-        n_samples, _ = np.shape(X)
+        stats = self.fit_stats_
+        n_candidates_before = 0 if stats is None else stats.n_candidates
 
-        # If the current data set meets the split criteria min_samples_split and max_depth,
-        # split the data set to prepare all information for a best node.
-        if n_samples >= self.min_samples_split and current_depth <= self.max_depth:
+        n_samples, _ = np.shape(X)
+        if n_samples >= self.min_samples_split and depth <= self.max_depth:
             # Get the best feature and the best split value based on it
-            best_split_rule, best_binary_subtrees, best_impurity_gain = self._get_best_split(X, y)
+            best_split_rule, best_binary_subtrees, best_impurity_gain = self._get_best_split(
+                X, y, sample_weight=sample_weight)
 
-        # If the best subtrees split above meet the split criterion min_impurity_split,
-        # continue growing subtrees and then generate a node.
-        if best_impurity_gain > self.min_impurity_split:
-            subset_true_X = best_binary_subtrees.subset_true_X
-            subset_true_y = best_binary_subtrees.subset_true_y
-            branch_true = self._build_tree(subset_true_X, subset_true_y, current_depth + 1)
+        n_candidates = 0 if stats is None else stats.n_candidates - n_candidates_before
+        return y, depth, best_split_rule, best_impurity_gain, best_binary_subtrees, n_candidates, sample_weight
 
-            subset_false_X = best_binary_subtrees.subset_false_X
-            subset_false_y = best_binary_subtrees.subset_false_y
-            branch_false = self._build_tree(subset_false_X, subset_false_y, current_depth + 1)
-
-            best_node = Node(split_rule=best_split_rule, branch_true=branch_true, branch_false=branch_false)
-            return best_node
-
-        # If none of the above criteria is met, then the current data set can only be a leaf node.
-        # Then generate a leaf node.
-        leaf_value = self._leaf_value_calc_func(y)
-        leaf_proba = calculate_proba(y)
-        leaf_node = Node(leaf_value=leaf_value, leaf_proba=leaf_proba)
-        return leaf_node
+    def _check_params(self):
+        """
+        Check the parameters of the tree that are only used in fit(), e.g.
+        before an ensemble fits any of its trees.
+        """
+        if self.splitter not in ("best", "random"):
+            raise ValueError("splitter must be 'best' or 'random', got {!r}".format(self.splitter))
+        if self.max_features is not None and self.max_features < 1:
+            raise ValueError("max_features must be at least 1, got {}".format(self.max_features))
+        self._get_growth()
 
-    def _get_best_split(self, X, y):
+    def _get_growth(self):
+        """
+        Get the validated growth strategy of the tree.
+        """
+        growth = self.growth
+        if growth is None:
+            growth = "depth_first" if self.max_leaf_nodes is None else "best_first"
+        if growth not in ("depth_first", "best_first"):
+            raise ValueError("growth must be 'depth_first', 'best_first' or None, got {!r}".format(growth))
+        if growth == "depth_first" and self.max_leaf_nodes is not None:
+            raise ValueError("max_leaf_nodes requires best-first growth (growth='best_first' or None).")
+        if self.max_leaf_nodes is not None and self.max_leaf_nodes < 1:
+            raise ValueError("max_leaf_nodes must be at least 1, got {}".format(self.max_leaf_nodes))
+        return growth
+
+    def _get_best_split(self, X, y, sample_weight=None):
         """
         Iterate over all feature and calculate the impurity_gain based on its unique
         values. Finally, choose the feature that gives y the maximum gain at
         impurity_gain as the best split.
+
+        NB: If sample_weight is given, it is carried as the last column of the
+        data set to be split, so that the split functions split it together
+        with the samples.
         """
-        best_split_rule = None
-        best_binary_subtrees = None
-        best_impurity_gain = 0
+        stats = self.fit_stats_
 
         # Join the elements in the X and Y by index.
         # Note that both X and y must have same number of dimensions.
@@ -357,7 +777,11 @@ class BaseFuzzyDecisionTree(metaclass=ABCMeta):
             # Do ascending dimension on y, and keep the column arrangement.
             y = np.expand_dims(y, axis=1)
         # Concatenate X and y as last column of X
-        ds_train = np.concatenate((X, y), axis=1)
+        with get_phase_timer(stats, "concatenation"):
+            if sample_weight is None:
+                ds_train = np.concatenate((X, y), axis=1)
+            else:
+                ds_train = np.concatenate((X, y, np.expand_dims(sample_weight, axis=1)), axis=1)
 
         # Start iterating over all features to get the best split.
         n_samples, n_features = np.shape(X)
@@ -368,7 +792,68 @@ class BaseFuzzyDecisionTree(metaclass=ABCMeta):
             n_loop = int(n_features / (
                     self.fuzzification_options.conv_k + 1))  # denominator=conv_k + 1. If the FCM algorithm selects n optimal fuzzy sets, the calculation here will be deprecated.
 
-        for feature_idx in range(n_loop):
+        # NB: The random features and split values are drawn here, before searching the features in any
+        # threads, so that a fixed seed gives the same tree.
+        # Only search max_features features drawn without replacement at each node, if required.
+        feature_idxs = np.arange(n_loop)
+        if self.max_features is not None and self.max_features < n_loop:
+            feature_idxs = np.sort(self._rng.choice(n_loop, self.max_features, replace=False))
+        # In the random splitter, only one random split value is tried per feature.
+        random_split_values = None
+        if self.splitter == "random":
+            random_split_values = self._draw_random_split_values(X, feature_idxs, n_loop)
+
+        if self._executor is None or len(feature_idxs) < 2:
+            return self._search_features(ds_train, X, y, feature_idxs, n_loop, random_split_values, sample_weight)
+
+        # Search for the best split in blocks of contiguous features concurrently, and then reduce
+        # the best splits of the blocks in the order of the features, which gives the same split as
+        # a serial search (the first feature and value with the highest impurity gain).
+        n_blocks = min(len(feature_idxs), self._n_threads)
+        feature_blocks = np.array_split(feature_idxs, n_blocks)
+        best_split_rule = None
+        best_binary_subtrees = None
+        best_impurity_gain = 0
+        for split_rule, binary_subtrees, impurity_gain in self._executor.map(
+                lambda feature_idxs: self._search_features(ds_train, X, y, feature_idxs, n_loop, random_split_values,
+                                                           sample_weight),
+                feature_blocks):
+            if impurity_gain > best_impurity_gain:
+                best_split_rule, best_binary_subtrees, best_impurity_gain = split_rule, binary_subtrees, impurity_gain
+
+        return best_split_rule, best_binary_subtrees, best_impurity_gain
+
+    def _draw_random_split_values(self, X, feature_idxs, n_loop):
+        """
+        Draw one split value per feature in feature_idxs uniformly between the
+        minimum and the maximum of the feature values. The split values are
+        indexed by feature, and are NaN for the other features and for
+        features of one value only.
+        """
+        feature_values = X[:, feature_idxs]
+        min_values = np.min(feature_values, axis=0).astype(np.float64)
+        max_values = np.max(feature_values, axis=0).astype(np.float64)
+        drawn_values = self._rng.uniform(min_values, max_values)
+        # NB: A draw equal to the minimum would leave the false subset empty.
+        drawn_values[drawn_values <= min_values] = np.nan
+        split_values = np.full(n_loop, np.nan)
+        split_values[feature_idxs] = drawn_values
+        return split_values
+
+    def _search_features(self, ds_train, X, y, feature_idxs, n_loop, random_split_values=None, sample_weight=None):
+        """
+        Search for the best split on the specified features, either among all
+        the candidate split values of each feature or, if random_split_values
+        is given, only at random_split_values[feature_idx].
+        """
+        best_split_rule = None
+        best_binary_subtrees = None
+        best_impurity_gain = 0
+        stats = self.fit_stats_
+        n_samples, n_features = np.shape(X)
+
+        for feature_idx in feature_idxs:
+            feature_idx = int(feature_idx)
             # Calculate the sum of all the membership degrees of the current feature values.
             total_dm = None
             start = None
@@ -379,100 +864,132 @@ class BaseFuzzyDecisionTree(metaclass=ABCMeta):
                 # "n_loop + (feature_idx + 1) * self.fuzzification_options.conv_k".
                 start = n_loop + feature_idx * self.fuzzification_options.conv_k
                 stop = n_loop + (feature_idx + 1) * self.fuzzification_options.conv_k
-                total_dm = np.sum(X[:, start:stop])
+                if sample_weight is None:
+                    total_dm = np.sum(X[:, start:stop])
+                else:
+                    # NB: The membership degrees of each sample are multiplied by its weight.
+                    total_dm = np.sum(X[:, start:stop] * np.expand_dims(sample_weight, axis=1))
                 # print(feature_idx, "-th feature: total degree of membership:", total_dm)
 
             # Get all unique values of the feature with feature_idx group by value classes.
             feature_values = np.expand_dims(X[:, feature_idx], axis=1)
 
             # Calculate impurity_gain in each iteration over all unique feature values.
-            unique_values = np.unique(feature_values)
+            with get_phase_timer(stats, "unique_values"):
+                if random_split_values is not None:
+                    # NB: A split value of type np.float64 is split on with ">=", whatever the dtype of the feature.
+                    split_value = random_split_values[feature_idx]
+                    unique_values = [] if np.isnan(split_value) else [split_value]
+                elif self.n_quantiles is not None and n_samples >= self.quantile_min_samples:
+                    # At a large node, only try the approximate quantiles of the feature values.
+                    unique_values = get_quantile_split_values(feature_values, self.n_quantiles)
+                else:
+                    unique_values = np.unique(feature_values)
             count = 0
             for unique_value in unique_values:
                 count += 1
-                subset_true, subset_false = self._split_ds_func(ds_train, feature_idx, unique_value)
+                with get_phase_timer(stats, "splitting"):
+                    subset_true, subset_false = self._split_ds_func(ds_train, feature_idx, unique_value)
 
                 if len(subset_true) > 0 and len(subset_false) > 0:
-                    # Calculate the membership probability of each subset according to the fuzzy splitting criterion.
-                    p_subset_true_dm = None
-                    p_subset_false_dm = None
-                    if not self.disable_fuzzy and total_dm is not None and total_dm > 0.0:
-                        subset_true_dm = np.sum(subset_true[:, start:stop])
-                        p_subset_true_dm = subset_true_dm / total_dm
-                        # print("    ", count, "-th split: subset_true's degree of membership:", subset_true_dm)
-                        subset_false_dm = np.sum(subset_false[:, start:stop])
-                        p_subset_false_dm = subset_false_dm / total_dm
-                        # print("    ", count, "-th split: subset_false's degree of membership:", subset_false_dm)
-
-                    y_subset_true = subset_true[:,
-                                    n_loop:]  # For non-fuzzy trees, n_loop is exactly the number of features
-                    y_subset_false = subset_false[:,
-                                     n_loop:]  # For non-fuzzy trees, n_loop is exactly the number of features
-
-                    impurity_gain = self._impurity_gain_calc_func(y, y_subset_true, y_subset_false, self.criterion_func,
-                                                                  p_subset_true_dm=p_subset_true_dm,
-                                                                  p_subset_false_dm=p_subset_false_dm)
+                    with get_phase_timer(stats, "criterion"):
+                        # Calculate the membership probability of each subset according to the fuzzy splitting criterion.
+                        p_subset_true_dm = None
+                        p_subset_false_dm = None
+                        if not self.disable_fuzzy and total_dm is not None and total_dm > 0.0:
+                            if sample_weight is None:
+                                subset_true_dm = np.sum(subset_true[:, start:stop])
+                                subset_false_dm = np.sum(subset_false[:, start:stop])
+                            else:
+                                subset_true_dm = np.sum(subset_true[:, start:stop] * subset_true[:, -1:])
+                                subset_false_dm = np.sum(subset_false[:, start:stop] * subset_false[:, -1:])
+                            p_subset_true_dm = subset_true_dm / total_dm
+                            # print("    ", count, "-th split: subset_true's degree of membership:", subset_true_dm)
+                            p_subset_false_dm = subset_false_dm / total_dm
+                            # print("    ", count, "-th split: subset_false's degree of membership:", subset_false_dm)
+
+                        if sample_weight is None:
+                            y_subset_true = subset_true[:,
+                                            n_loop:]  # For non-fuzzy trees, n_loop is exactly the number of features
+                            y_subset_false = subset_false[:,
+                                             n_loop:]  # For non-fuzzy trees, n_loop is exactly the number of features
+
+                            impurity_gain = self._impurity_gain_calc_func(y, y_subset_true, y_subset_false,
+                                                                          self.criterion_func,
+                                                                          p_subset_true_dm=p_subset_true_dm,
+                                                                          p_subset_false_dm=p_subset_false_dm)
+                        else:
+                            # NB: The last column is the sample weights.
+                            y_subset_true = subset_true[:, n_loop:-1]
+                            y_subset_false = subset_false[:, n_loop:-1]
+
+                            impurity_gain = self._impurity_gain_calc_func(y, y_subset_true, y_subset_false,
+                                                                          self.criterion_func,
+                                                                          p_subset_true_dm=p_subset_true_dm,
+                                                                          p_subset_false_dm=p_subset_false_dm,
+                                                                          sample_weight=sample_weight,
+                                                                          sub_sample_weight_1=subset_true[:, -1],
+                                                                          sub_sample_weight_2=subset_false[:, -1])
                     if impurity_gain > best_impurity_gain:
                         best_impurity_gain = impurity_gain
 
                         best_split_rule = SplitRule(feature_idx=feature_idx, split_value=unique_value)
 
                         subset_true_X = subset_true[:, :n_features]
-                        subset_true_y = subset_true[:, n_features:]
                         subset_false_X = subset_false[:, :n_features]
-                        subset_false_y = subset_false[:, n_features:]
-                        best_binary_subtrees = BinarySubtrees(subset_true_X=subset_true_X,
-                                                              subset_true_y=subset_true_y,
-                                                              subset_false_X=subset_false_X,
-                                                              subset_false_y=subset_false_y)
+                        if sample_weight is None:
+                            best_binary_subtrees = BinarySubtrees(subset_true_X=subset_true_X,
+                                                                  subset_true_y=subset_true[:, n_features:],
+                                                                  subset_false_X=subset_false_X,
+                                                                  subset_false_y=subset_false[:, n_features:])
+                        else:
+                            best_binary_subtrees = BinarySubtrees(subset_true_X=subset_true_X,
+                                                                  subset_true_y=subset_true[:, n_features:-1],
+                                                                  subset_false_X=subset_false_X,
+                                                                  subset_false_y=subset_false[:, n_features:-1],
+                                                                  subset_true_sample_weight=subset_true[:, -1],
+                                                                  subset_false_sample_weight=subset_false[:, -1])
 
         return best_split_rule, best_binary_subtrees, best_impurity_gain
 
     def _predict_one(self, x, tree=None):
         """
-        Recursively (in a top-to-bottom approach) search the built
-        decision tree and find the leaf that match the sample to be
-        predicted, then use the leaf value as the predicted value
-        for the sample.
+        Search (in a top-to-bottom approach) the built decision tree and
+        find the leaf that match the sample to be predicted, then use the
+        leaf value as the predicted value for the sample.
         """
-        if tree is None:
-            tree = self.root
-
-        if tree.leaf_value is not None:
-            return tree.leaf_value
-
-        feature_value = x[tree.split_rule.feature_idx]
-        branch = tree.branch_false
-        if isinstance(feature_value, int) or isinstance(feature_value, float):
-            if feature_value >= tree.split_rule.split_value:
-                branch = tree.branch_true
-        elif feature_value == tree.split_rule.split_value:
-            branch = tree.branch_true
-
-        return self._predict_one(x, branch)
+        return self._find_leaf(x, tree).leaf_value
 
     def _predict_proba_one(self, x, tree=None):
         """
-        Recursively (in a top-to-bottom approach) search the built
-        decision tree and find the leaf that match the sample to be
-        predicted, then use the leaf probability as the predicted
-        probability for the sample.
+        Search (in a top-to-bottom approach) the built decision tree and
+        find the leaf that match the sample to be predicted, then use the
+        leaf probability as the predicted probability for the sample.
+        """
+        return self._find_leaf(x, tree).leaf_proba
+
+    def _find_leaf(self, x, tree=None):
+        """
+        Find the leaf that match the sample x in a loop, so that the depth
+        of the tree is not limited by the recursion limit.
         """
         if tree is None:
             tree = self.root
 
-        if tree.leaf_value is not None:
-            return tree.leaf_proba
-
-        feature_value = x[tree.split_rule.feature_idx]
-        branch = tree.branch_false
-        if isinstance(feature_value, int) or isinstance(feature_value, float):
-            if feature_value >= tree.split_rule.split_value:
+        while tree.leaf_value is None:
+            feature_value = x[tree.split_rule.feature_idx]
+            split_value = tree.split_rule.split_value
+            branch = tree.branch_false
+            # NB: The comparison follows the type of the split value, as in split_ds_2_bin() during fit(), e.g. a
+            # random split value (np.float64) of an integer feature splits on ">=".
+            if isinstance(split_value, int) or isinstance(split_value, float):
+                if feature_value >= split_value:
+                    branch = tree.branch_true
+            elif feature_value == split_value:
                 branch = tree.branch_true
-        elif feature_value == tree.split_rule.split_value:
-            branch = tree.branch_true
+            tree = branch
 
-        return self._predict_proba_one(x, branch)
+        return tree
 
 
 # =============================================================================
@@ -528,11 +1045,112 @@ class FuzzyDecisionTreeWrapper(DecisionTreeInterface):
         The minimum impurity required to split a node. If a node's impurity is
         above this threshold, it will be split, otherwise it becomes a leaf node.
 
+    max_leaf_nodes: int, default=None
+        The maximum number of leaf nodes of the tree to be trained. If set,
+        the tree is grown best-first, i.e. the node with the highest impurity
+        gain is always split next, until the tree has max_leaf_nodes leaves.
+        If None, the number of leaf nodes is unlimited.
+        NB: Pass it as a keyword argument, like enable_fit_stats.
+
+    growth: {"depth_first", "best_first"}, default=None
+        The order in which the nodes of the tree are split. Both grow the
+        same tree unless max_leaf_nodes is set, which requires "best_first".
+        If None, "best_first" is used when max_leaf_nodes is set, otherwise
+        "depth_first".
+        NB: Pass it as a keyword argument, like enable_fit_stats.
+
+    splitter: {"best", "random"}, default="best"
+        The strategy used to choose the split of each node.
+        - "best": try all the candidate split values of each feature.
+        - "random": try only one split value per feature, drawn uniformly
+          between the minimum and the maximum of the feature values at the
+          node, and choose the best of these splits (as in extremely
+          randomised trees). The search at a node costs O(n_samples) per
+          feature, which makes large ensembles fast to fit. The random
+          values are drawn from random_state.
+        NB: Pass it as a keyword argument, like enable_fit_stats.
+
+    max_features: int, default=None
+        The number of features drawn at random (without replacement) at each
+        node, among which the best split of the node is searched. If None,
+        all the features are searched.
+        NB: Pass it as a keyword argument, like enable_fit_stats. For fuzzy
+        trees, it is the number of original features, whose columns of
+        degrees of membership go with them.
+
+    n_quantiles: int, default=None
+        The number of candidate split values tried per feature at large
+        nodes. If set, the candidate split values of a feature at a node
+        with at least quantile_min_samples samples are its approximate
+        quantiles, computed with a streaming quantile sketch (see
+        util_quantile_sketch), instead of all its unique values. If None,
+        all the unique values are always tried.
+        NB: Pass it as a keyword argument, like enable_fit_stats.
+
+    quantile_min_samples: int, default=10000
+        The minimum number of samples at a node to search its split among
+        n_quantiles quantiles. Smaller nodes, which are most of the nodes of
+        a tree, are always searched exactly.
+
+    n_threads: int, default=None
+        The number of threads used to search for the best split of each node,
+        each thread searching a block of the features. The splits are found
+        by NumPy operations that release the GIL, so a single tree can use
+        several cores, e.g. on wide data. The trees are the same as with a
+        serial search. If None or 1, the search is serial, and if -1, all the
+        CPU cores are used.
+        NB: Pass it as a keyword argument, like enable_fit_stats. With
+        several threads, the phase times in fit_stats_ add up the time of
+        all the threads.
+
+    random_state: int, RandomState instance or None, default=None
+        The random generator of the features drawn at each node
+        (max_features) and of the random split values (splitter="random").
+        If an int, a new RandomState seeded with it is made in every fit(),
+        so the tree is reproducible. If a RandomState, fit() goes on drawing
+        from it. If None, the global NumPy random generator is used, so that
+        np.random.seed() makes the trees reproducible.
+        NB: Pass it as a keyword argument, like enable_fit_stats. A random
+        decision forest gives each of its trees a RandomState of its own.
+
+    enable_fit_stats: bool, default=False
+        Set whether to collect the time spent and the number of calls in each
+        phase of building the tree, the number of nodes per depth and the
+        number of candidate splits evaluated per node into fit_stats_.
+        NB: Pass it as a keyword argument, like the other keyword arguments
+        forwarded to the specified fuzzy decision tree.
+
+    fit_stats_callback: callable, default=None
+        A function called as fit_stats_callback(node_record) every time a
+        node is generated during fit(). See FitStats in util_profiler for the
+        content of node_record. Setting it also enables the fit statistics.
+
+    track_memory: {"tracemalloc", "rss"}, default=None
+        Set whether to track the peak memory allocated in fit(), predict()
+        and predict_proba() into memory_stats_, using tracemalloc (precise
+        but slower) or by sampling the resident set size of the process
+        (cheap but coarse). See MemoryTracker in util_profiler.
+        NB: Pass it as a keyword argument, like enable_fit_stats.
+
     Attributes
     ----------
     root: Node
         The root node of a decision tree.
 
+    fit_stats_: FitStats
+        The statistics collected during the last fit() of the estimator if
+        enable_fit_stats=True or fit_stats_callback is set, otherwise None.
+        Access it via the estimator, e.g. wrapper.estimator.fit_stats_.
+
+    memory_stats_: dict
+        The memory statistics of the estimator if track_memory is set,
+        otherwise None. The keys are "mode", "fit_peak_bytes",
+        "predict_peak_bytes" and "predict_proba_peak_bytes" (the peak bytes
+        allocated in the last call of each function) and "model_bytes" (the
+        footprint of the fitted estimator itself, see get_model_size in
+        util_profiler). Access it via the estimator, e.g.
+        wrapper.estimator.memory_stats_.
+
     _impurity_gain_calculation_func: function
         The function to calculate the impurity gain of the target values.
 
@@ -603,12 +1221,7 @@ class FuzzyDecisionTreeWrapper(DecisionTreeInterface):
         self.filename_ds_pretrain = None  # A name of the file used to save data generated by pretraining.
         self.enable_pkl_mdl = False  # Set whether enable pickling fitted models.
 
-        # Ensure the directories for saving files is existing.
-        for item in DirSave:
-            if not os.path.exists(item.value):
-                os.makedirs(item.value)
-
-    def fit(self, X_train, y_train):
+    def fit(self, X_train, y_train, sample_weight=None):
         """
         Train a decision tree estimator from the training set (X_train, y_train).
 
@@ -619,13 +1232,26 @@ class FuzzyDecisionTreeWrapper(DecisionTreeInterface):
 
         y_train: array-like of shape (n_samples,) or (n_samples, n_outputs)
             The target values (class labels) as integers or strings.
+
+        sample_weight: array-like of shape (n_samples,), default=None
+            The non-negative weights of the samples. If None, the samples are
+            equally weighted. In the splitting criteria, each sample counts
+            as much as its weight, and in fuzzy trees, its degrees of
+            membership are multiplied by its weight. Samples of zero weight
+            are left out.
         """
         # Start training to get a fitted estimator.
         try:
-            self.estimator.fit(X_train, y_train)
+            self.estimator.fit(X_train, y_train, sample_weight=sample_weight)
         except Exception as e:
             print(traceback.format_exc())
 
+    def is_fitted(self):
+        """
+        Get whether the estimator is fitted, or loaded from a model file.
+        """
+        return self.estimator.root is not None or self.estimator._flat_tree is not None
+
     def predict(self, X):
         """
         Predict the target values of the input samples X.
@@ -670,6 +1296,84 @@ class FuzzyDecisionTreeWrapper(DecisionTreeInterface):
         except Exception as e:
             print(traceback.format_exc())
 
+    def predict_one(self, x, fuzzify=False):
+        """
+        Predict the target value of one sample, as fast as possible. See
+        BaseFuzzyDecisionTree.predict_one().
+        """
+        return self.estimator.predict_one(x, fuzzify=fuzzify)
+
+    def set_prediction_cache(self, prediction_cache):
+        """
+        Put a cache in front of predict(), or remove it (None). See
+        BaseFuzzyDecisionTree.set_prediction_cache().
+        """
+        self.estimator.set_prediction_cache(prediction_cache)
+
+    def apply(self, X):
+        """
+        Get the id of the leaf that each input sample ends up in. See
+        BaseFuzzyDecisionTree.apply().
+        """
+        return self.estimator.apply(X)
+
+    def decision_path(self, X):
+        """
+        Get the nodes that each input sample goes through. See
+        BaseFuzzyDecisionTree.decision_path().
+        """
+        return self.estimator.decision_path(X)
+
+    def predict_soft(self, X, softness=0.5, half_widths=None, min_weight=1e-3):
+        """
+        Predict the target values of the input samples X by soft (fuzzy)
+        inference. See BaseFuzzyDecisionTree.predict_soft().
+        """
+        return self.estimator.predict_soft(X, softness=softness, half_widths=half_widths, min_weight=min_weight)
+
+    def predict_proba_soft(self, X, softness=0.5, half_widths=None, min_weight=1e-3):
+        """
+        Predict the probabilities of the classes of the input samples X by
+        soft (fuzzy) inference. See BaseFuzzyDecisionTree.predict_proba_soft().
+        """
+        return self.estimator.predict_proba_soft(X, softness=softness, half_widths=half_widths,
+                                                 min_weight=min_weight)
+
+    def predict_chunks(self, X, chunk_size=DEFAULT_CHUNK_SIZE, fuzzify=False):
+        """
+        Predict the target values of the input samples X block by block,
+        e.g. to score a file that does not fit in memory.
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features), or iterable of such arrays
+            The input samples, e.g. a memory-mapped array or a generator of
+            blocks of rows, see iter_row_chunks().
+
+        chunk_size: int, default=DEFAULT_CHUNK_SIZE
+            The maximum number of samples predicted at once.
+
+        fuzzify: bool, default=False
+            Set whether X holds the raw features, which are fuzzified block
+            by block with the fuzzy sets (centroids and thetas) saved in the
+            fuzzification options, see fuzzify_features().
+
+        Yields
+        ------
+        y_pred_chunk: ndarray
+            The predicted values of each block, in the order of the samples.
+        """
+        return iter_predict_chunks(self.predict, X, chunk_size=chunk_size,
+                                   fuzzification_options=self.fuzzification_options if fuzzify else None)
+
+    def predict_proba_chunks(self, X, chunk_size=DEFAULT_CHUNK_SIZE, fuzzify=False):
+        """
+        Predict the probabilities of the target values of the input samples
+        X block by block. See predict_chunks().
+        """
+        return iter_predict_chunks(self.predict_proba, X, chunk_size=chunk_size,
+                                   fuzzification_options=self.fuzzification_options if fuzzify else None)
+
     def print_tree(self, tree=None, indent="  ", delimiter="-->"):
         """
         Recursively (in a top-to-bottom approach) print the built decision tree.
@@ -717,6 +1421,9 @@ class FuzzyDecisionTreeWrapper(DecisionTreeInterface):
         -------
 
         """
+        # Ensure the directories for saving files is existing.
+        ensure_dir_save()
+
         # Create a connection used to communicate between master process and its sub-processes.
         q = multiprocessing.Manager().Queue()
 
@@ -759,6 +1466,10 @@ class FuzzyDecisionTreeWrapper(DecisionTreeInterface):
         -------
 
         """
+        from sklearn.model_selection import KFold
+        from fuzzytrees.util_data_handler import load_data_clf
+        from fuzzytrees.util_data_processing_funcs import extract_fuzzy_features
+
         curr_pid = os.getpid()
         print("    |-- ({} Child-process) Pretrain a group of classifiers on: {}.".format(curr_pid, ds_name))
         print("    |-- ({} Child-process) Preprocess fuzzy feature extraction based on parameters: {}, {}.".format(
@@ -781,7 +1492,13 @@ class FuzzyDecisionTreeWrapper(DecisionTreeInterface):
             # X_fuzzy_pre[:, :] -= X_fuzzy_pre[:, :].min()
             # X_fuzzy_pre[:, :] /= X_fuzzy_pre[:, :].max()
             # - Step 2: Extract fuzzy features.
-            X_dms = extract_fuzzy_features(X=X_fuzzy_pre, conv_k=conv_k, fuzzy_reg=fuzzy_reg)
+            X_dms, centroids, thetas = extract_fuzzy_features(X=X_fuzzy_pre, conv_k=conv_k, fuzzy_reg=fuzzy_reg,
+                                                              return_fuzzy_sets=True)
+            # Keep the fuzzy sets, so that they are saved with the fitted models.
+            if self.estimator.fuzzification_options is not None:
+                self.estimator.fuzzification_options.fuzzy_reg = fuzzy_reg
+                self.estimator.fuzzification_options.centroids = centroids
+                self.estimator.fuzzification_options.thetas = thetas
             X_plus_dms = np.concatenate((X, X_dms), axis=1)
             # print("************* Shape before fuzzification:", np.shape(X))
             # print("************* Shape after fuzzification:", np.shape(X_plus_dms))
@@ -843,6 +1560,8 @@ class FuzzyDecisionTreeWrapper(DecisionTreeInterface):
         -------
 
         """
+        from sklearn.metrics import accuracy_score
+
         # # Record the start time used to calculate the time spent fitting one model.
         # time_start = time.time()
 
@@ -862,12 +1581,15 @@ class FuzzyDecisionTreeWrapper(DecisionTreeInterface):
         # print("    Fuzzy accuracy train:", accuracy_train)
         # print("    Fuzzy accuracy test:", accuracy_test)
 
-        # Pickle the fitted model.
+        # Save the fitted model (see util_model_io for the model format).
         if self.enable_pkl_mdl:
+            from fuzzytrees.util_model_io import save_model
+
+            ensure_dir_save()
             filename = DirSave.MODELS.value + get_today_str() + "_" + "clf_" + str(conv_k) + "_" + str(
                 fuzzy_reg) + "_" + ds_name + "_" + str(sn) + ".mdl"
-            joblib.dump(value=self.estimator, filename=filename)
-            # trained_clf = joblib.load(filename=filename)
+            save_model(self.estimator, filename)
+            # trained_clf = load_model(filename)
 
         # # Display the elapsed time.
         # print("        |-- ({} Child-process) Time elapsed fitting one model:", time.time() - time_start, "s")
@@ -890,6 +1612,8 @@ class FuzzyDecisionTreeWrapper(DecisionTreeInterface):
         -------
 
         """
+        import pandas as pd
+
         # Get data via connection between master process and its sub-processes.
         while not q.empty():
             # q.put([[ds_name, conv_k, fuzzy_reg, err_train_mean, std_train, err_test_mean, std_test]])
@@ -930,6 +1654,11 @@ class FuzzyDecisionTreeWrapper(DecisionTreeInterface):
         -------
 
         """
+        import pandas as pd
+        from fuzzytrees.util_plotter import plot_multi_lines
+
+        ensure_dir_save()
+
         # Fetch data for plotting from the specified file if filename is not None.
         if filename is not None:
             self.df_pretrain = pd.read_csv(filename)
@@ -0,0 +1,539 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 19/10/2026 5:00 pm
+@desc: Flat (array-based) representation of fitted fuzzy decision trees.
+
+    A fitted tree is a recursive graph of Node objects, which is convenient
+    for building the tree but expensive to store and to traverse. A FlatTree
+    holds the same tree as a handful of contiguous NumPy arrays indexed by
+    node id (the root is node 0), so that it can be saved as raw buffers,
+    memory-mapped back without any parsing, and traversed with vectorised
+    operations.
+"""
+import numpy as np
+
+# NB: Node and SplitRule are imported from fdt_base inside the functions that use them, so that fdt_base can
+# import this module.
+
+# =============================================================================
+# Types and constants
+# =============================================================================
+
+# The comparison operators of split rules.
+# NB: They follow split_ds_2_bin(): a split value of type int or float (e.g.
+# np.float64) splits on "feature value >= split value", and a split value of
+# any other type (e.g. np.int64) on "feature value == split value".
+OP_GE = 0
+OP_EQ = 1
+
+# The feature index of leaf nodes.
+LEAF = -1
+
+
+# =============================================================================
+# Flat tree
+# =============================================================================
+
+class FlatTree:
+    """
+    A fitted decision tree stored as arrays indexed by node id.
+
+    Parameters
+    ----------
+    feature: array-like of shape (n_nodes,) of int32
+        The feature index of each split node, or LEAF for leaf nodes.
+
+    threshold: array-like of shape (n_nodes,) of float64
+        The split value of each split node (0 for leaf nodes).
+
+    op: array-like of shape (n_nodes,) of uint8
+        The comparison operator (OP_GE or OP_EQ) of each split node.
+
+    children_true, children_false: array-like of shape (n_nodes,) of int32
+        The node ids of the branches taken when a sample does and does not
+        meet the split rule, or LEAF for leaf nodes.
+
+    value: array-like of shape (n_nodes,) or (n_nodes, n_outputs)
+        The leaf value of each leaf node (0 for split nodes).
+
+    proba_offsets: array-like of shape (n_nodes + 1,) of int64
+        The leaf probabilities of node i are
+        proba_values[proba_offsets[i]:proba_offsets[i + 1]].
+
+    proba_values: array-like of float64
+        The leaf probabilities of all the nodes, concatenated.
+
+    NB: The arrays are used as they are, without being copied, so they can
+    be read-only views of a memory-mapped model file.
+    """
+
+    def __init__(self, feature, threshold, op, children_true, children_false, value, proba_offsets, proba_values):
+        self.feature = feature
+        self.threshold = threshold
+        self.op = op
+        self.children_true = children_true
+        self.children_false = children_false
+        self.value = value
+        self.proba_offsets = proba_offsets
+        self.proba_values = proba_values
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_node(cls, root):
+        """
+        Flatten a tree of Node objects, numbering the nodes in depth-first
+        order (the branch_true subtree first).
+
+        NB: The tree is walked iteratively, so that deep trees do not hit
+        the recursion limit.
+        """
+        nodes = []
+        children = []
+        stack = [(root, -1, False)]
+        while stack:
+            node, parent, is_false_branch = stack.pop()
+            node_id = len(nodes)
+            nodes.append(node)
+            children.append([LEAF, LEAF])
+            if parent >= 0:
+                children[parent][1 if is_false_branch else 0] = node_id
+            if node.leaf_value is None:
+                stack.append((node.branch_false, node_id, True))
+                stack.append((node.branch_true, node_id, False))
+
+        n_nodes = len(nodes)
+        feature = np.full(n_nodes, LEAF, dtype=np.int32)
+        threshold = np.zeros(n_nodes, dtype=np.float64)
+        op = np.zeros(n_nodes, dtype=np.uint8)
+        children = np.array(children, dtype=np.int32).reshape(n_nodes, 2)
+
+        leaf_values = {}
+        proba_offsets = np.zeros(n_nodes + 1, dtype=np.int64)
+        proba_values = []
+        for node_id, node in enumerate(nodes):
+            if node.leaf_value is None:
+                split_value = node.split_rule.split_value
+                try:
+                    threshold[node_id] = split_value
+                except (TypeError, ValueError):
+                    raise ValueError("Only numerical split values can be flattened, got {!r}".format(split_value))
+                feature[node_id] = node.split_rule.feature_idx
+                op[node_id] = OP_GE if isinstance(split_value, (int, float)) else OP_EQ
+            else:
+                leaf_values[node_id] = np.asarray(node.leaf_value)
+                if node.leaf_proba is not None:
+                    proba_values.extend(np.ravel(node.leaf_proba))
+            proba_offsets[node_id + 1] = len(proba_values)
+
+        value = cls._stack_leaf_values(leaf_values, n_nodes)
+
+        return cls(feature=feature, threshold=threshold, op=op,
+                   children_true=np.ascontiguousarray(children[:, 0]),
+                   children_false=np.ascontiguousarray(children[:, 1]), value=value,
+                   proba_offsets=proba_offsets, proba_values=np.array(proba_values, dtype=np.float64))
+
+    @staticmethod
+    def _stack_leaf_values(leaf_values, n_nodes):
+        shapes = {v.shape for v in leaf_values.values()}
+        if len(shapes) != 1:
+            raise ValueError("All the leaf values of a tree must have the same shape, got {}".format(shapes))
+        dtype = np.result_type(*leaf_values.values())
+        if dtype.kind not in "biuf":
+            raise ValueError("Only numerical leaf values can be flattened, got dtype {}".format(dtype))
+        value = np.zeros((n_nodes,) + shapes.pop(), dtype=dtype)
+        for node_id, leaf_value in leaf_values.items():
+            value[node_id] = leaf_value
+        return value
+
+    def to_node(self):
+        """
+        Rebuild the tree of Node objects, e.g. for printing it.
+        """
+        from fuzzytrees.fdt_base import Node, SplitRule
+
+        nodes = [None] * self.n_nodes
+        # NB: Children always have larger node ids than their parents.
+        for node_id in range(self.n_nodes - 1, -1, -1):
+            if self.feature[node_id] == LEAF:
+                nodes[node_id] = Node(leaf_value=self.value[node_id], leaf_proba=self.get_leaf_proba(node_id))
+            else:
+                split_value = self.threshold[node_id]
+                if self.op[node_id] == OP_EQ:
+                    # NB: Restore a split value type that split_ds_2_bin() compares with "==".
+                    split_value = np.int64(split_value)
+                split_rule = SplitRule(feature_idx=int(self.feature[node_id]), split_value=split_value)
+                nodes[node_id] = Node(split_rule=split_rule, branch_true=nodes[self.children_true[node_id]],
+                                      branch_false=nodes[self.children_false[node_id]])
+        return nodes[0]
+
+    def to_tuples(self):
+        """
+        Get the nodes as plain Python tuples indexed by node id, for
+        predicting one sample at a time by predict_tuples() without the
+        overhead of NumPy operations on tiny arrays.
+
+        Returns
+        -------
+        nodes: list of tuples
+            (feature, threshold, is_eq, child_true, child_false) for split
+            nodes, and (LEAF, leaf_value, leaf_proba) for leaf nodes, where
+            leaf_value and leaf_proba are Python numbers or lists.
+        """
+        features = self.feature.tolist()
+        thresholds = self.threshold.tolist()
+        is_eqs = (np.asarray(self.op) == OP_EQ).tolist()
+        children_true = self.children_true.tolist()
+        children_false = self.children_false.tolist()
+        nodes = []
+        for node_id, feature in enumerate(features):
+            if feature == LEAF:
+                nodes.append((LEAF, self.value[node_id].tolist(), self.get_leaf_proba(node_id).tolist()))
+            else:
+                nodes.append((feature, thresholds[node_id], is_eqs[node_id], children_true[node_id],
+                              children_false[node_id]))
+        return nodes
+
+    def get_leaf_proba(self, node_id):
+        return self.proba_values[self.proba_offsets[node_id]:self.proba_offsets[node_id + 1]]
+
+    def apply(self, X):
+        """
+        Get the id of the leaf that each sample ends up in.
+
+        NB: All the samples descend the tree together, one level per
+        iteration, so the number of Python-level iterations is the depth of
+        the tree instead of the number of samples.
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+
+        Returns
+        -------
+        leaf_ids: ndarray of shape (n_samples,)
+        """
+        return self._descend(X)[0]
+
+    def decision_path(self, X):
+        """
+        Get the nodes that each sample goes through, from the root to its
+        leaf, in the same traversal as apply().
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+
+        Returns
+        -------
+        indicator: scipy.sparse.csr_matrix of shape (n_samples, n_nodes)
+            indicator[i, j] is 1 if sample i goes through node j. The
+            nodes of each row are in the order they are gone through.
+        """
+        # NB: scipy is imported here, the only place it is used, so that importing fuzzytrees does not load it.
+        from scipy import sparse
+
+        leaf_ids, path_samples, path_nodes = self._descend(X, return_path=True)
+        n_samples = len(leaf_ids)
+        # NB: The nodes are numbered in depth-first order, so a child's id is always larger than its parent's, and
+        # sorting the nodes of each row by id keeps the order they are gone through.
+        order = np.lexsort((path_nodes, path_samples))
+        indptr = np.zeros(n_samples + 1, dtype=np.intp)
+        indptr[1:] = np.cumsum(np.bincount(path_samples, minlength=n_samples))
+        return sparse.csr_matrix((np.ones(len(order), dtype=np.int8), path_nodes[order], indptr),
+                                 shape=(n_samples, self.n_nodes))
+
+    def _descend(self, X, return_path=False):
+        """
+        Descend the tree with all the samples X together, level by level.
+
+        Returns
+        -------
+        leaf_ids: ndarray of shape (n_samples,)
+
+        path_samples, path_nodes: ndarray of shape (n_path_nodes,)
+            Only if return_path is True, the (sample, node) pairs of the
+            nodes the samples go through.
+        """
+        X = np.asarray(X)
+        node_ids = np.zeros(X.shape[0], dtype=np.intp)
+        active = np.arange(X.shape[0])
+        path_samples, path_nodes = [], []
+        while active.size > 0:
+            nodes = node_ids[active]
+            if return_path:
+                path_samples.append(active)
+                path_nodes.append(nodes)
+            features = self.feature[nodes]
+            is_split = features != LEAF
+            active, nodes, features = active[is_split], nodes[is_split], features[is_split]
+            if active.size == 0:
+                break
+
+            feature_values = X[active, features]
+            thresholds = self.threshold[nodes]
+            meets_rule = np.where(self.op[nodes] == OP_EQ, feature_values == thresholds,
+                                  feature_values >= thresholds)
+            node_ids[active] = np.where(meets_rule, self.children_true[nodes], self.children_false[nodes])
+        if not return_path:
+            return node_ids, None, None
+        if not path_samples:
+            return node_ids, np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        return node_ids, np.concatenate(path_samples), np.concatenate(path_nodes)
+
+    def predict(self, X):
+        """
+        Get the leaf value of each sample, as an array of shape (n_samples,)
+        or (n_samples, n_outputs).
+        """
+        return self.value[self.apply(X)]
+
+    def soft_apply(self, X, half_widths, min_weight=1e-3):
+        """
+        Get the leaves that each sample reaches in soft (fuzzy) inference,
+        with the weight of each one.
+
+        Instead of being routed down one branch, a sample is split between
+        both branches of a split rule "feature value >= split value" by its
+        membership of the true branch, which rises linearly from 0 at
+        "split value - 2 * half width" to 1 at the split value of the
+        feature. The weights of the samples are propagated down the tree
+        level by level for all the samples together, as in apply().
+
+        NB: The soft region lies below the split value, so that a sample on
+        the split value (e.g. a training sample, as the split values are
+        values of the training samples) goes down the true branch, as in
+        apply(), however small the half width, instead of being split in
+        half.
+
+        NB: The propagation is sparse. The lighter branch of a split is
+        dropped if its weight falls below min_weight, so a sample only
+        reaches the leaves near its path, and it always keeps at least one
+        leaf. The weights of each sample's leaves are normalised to sum to
+        1. Split rules "feature value == split value", and features of zero
+        half width, are crisp, so with all half widths 0, each sample
+        reaches only the leaf returned by apply().
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+
+        half_widths: float or array-like of shape (n_features,)
+            The half width of the soft region below the split values of
+            each feature.
+
+        min_weight: float, default=1e-3
+            The minimum weight of a branch to be followed.
+
+        Returns
+        -------
+        sample_idxs, leaf_ids, weights: ndarray of shape (n_pairs,)
+            Sample sample_idxs[i] reaches leaf leaf_ids[i] with weight
+            weights[i].
+        """
+        X = np.asarray(X)
+        n_samples = X.shape[0]
+        half_widths = np.broadcast_to(np.asarray(half_widths, dtype=np.float64), (X.shape[1],))
+        sample_idxs = np.arange(n_samples)
+        node_ids = np.zeros(n_samples, dtype=np.intp)
+        weights = np.ones(n_samples)
+        leaves = []
+        while sample_idxs.size > 0:
+            features = self.feature[node_ids]
+            is_leaf = features == LEAF
+            leaves.append((sample_idxs[is_leaf], node_ids[is_leaf], weights[is_leaf]))
+            is_split = ~is_leaf
+            sample_idxs, node_ids, weights = sample_idxs[is_split], node_ids[is_split], weights[is_split]
+            features = features[is_split]
+            if sample_idxs.size == 0:
+                break
+
+            feature_values = X[sample_idxs, features]
+            thresholds = self.threshold[node_ids]
+            is_eq = self.op[node_ids] == OP_EQ
+            memberships = np.where(is_eq, feature_values == thresholds, feature_values >= thresholds).astype(float)
+            sample_half_widths = half_widths[features]
+            is_soft = ~is_eq & (sample_half_widths > 0)
+            with np.errstate(invalid="ignore"):
+                soft_memberships = np.clip(1. + (feature_values[is_soft] - thresholds[is_soft])
+                                           / (2 * sample_half_widths[is_soft]), 0., 1.)
+            # NB: A missing (nan) feature value goes down the false branch, as in apply().
+            memberships[is_soft] = np.where(np.isnan(soft_memberships), memberships[is_soft], soft_memberships)
+
+            weights_true = weights * memberships
+            weights_false = weights - weights_true
+            keep_true = (weights_true >= min_weight) | (memberships >= 0.5)
+            keep_false = (weights_false >= min_weight) | (memberships < 0.5)
+            sample_idxs = np.concatenate((sample_idxs[keep_true], sample_idxs[keep_false]))
+            node_ids = np.concatenate((self.children_true[node_ids[keep_true]],
+                                       self.children_false[node_ids[keep_false]]))
+            weights = np.concatenate((weights_true[keep_true], weights_false[keep_false]))
+
+        sample_idxs, leaf_ids, weights = (np.concatenate(arrays) for arrays in zip(*leaves))
+        weights = weights / np.bincount(sample_idxs, weights=weights, minlength=n_samples)[sample_idxs]
+        return sample_idxs, leaf_ids, weights
+
+    def predict_soft(self, X, half_widths, min_weight=1e-3):
+        """
+        Get the leaf values of the leaves each sample reaches in soft
+        inference (see soft_apply()), blended by their weights, as an array
+        of shape (n_samples,) or (n_samples, n_outputs).
+        """
+        n_samples = np.shape(X)[0]
+        sample_idxs, leaf_ids, weights = self.soft_apply(X, half_widths, min_weight=min_weight)
+        values = self.value[leaf_ids].astype(float)
+        if values.ndim == 1:
+            return np.bincount(sample_idxs, weights=weights * values, minlength=n_samples)
+        y_pred = np.zeros((n_samples,) + values.shape[1:])
+        np.add.at(y_pred, sample_idxs, weights.reshape((-1,) + (1,) * (values.ndim - 1)) * values)
+        return y_pred
+
+    def predict_soft_votes(self, X, half_widths, n_classes, min_weight=1e-3):
+        """
+        Get the votes of the leaves each sample reaches in soft inference
+        (see soft_apply()) for the class labels (non-negative integers) of
+        the leaves, as an array of shape (n_samples, n_classes) whose rows
+        sum to 1.
+        """
+        n_samples = np.shape(X)[0]
+        sample_idxs, leaf_ids, weights = self.soft_apply(X, half_widths, min_weight=min_weight)
+        votes = np.zeros((n_samples, n_classes))
+        np.add.at(votes, (sample_idxs, self.value[leaf_ids].astype(np.intp)), weights)
+        return votes
+
+    def get_n_classes(self):
+        """
+        Get the number of classes of a classification tree, i.e. the largest
+        class label (a non-negative integer) of its leaves plus 1.
+        """
+        return int(np.max(self.value[self.feature == LEAF])) + 1
+
+    def predict_proba(self, X):
+        """
+        Get the leaf probabilities of each sample, as a list of arrays.
+        """
+        return [self.get_leaf_proba(leaf_id) for leaf_id in self.apply(X)]
+
+
+def predict_tuples(nodes, x):
+    """
+    Find the leaf that the sample x ends up in, in the nodes returned by
+    FlatTree.to_tuples().
+
+    Parameters
+    ----------
+    nodes: list of tuples
+        The nodes of a tree, see FlatTree.to_tuples().
+
+    x: list of float
+        The feature values of the sample as Python numbers, e.g. x.tolist().
+
+    Returns
+    -------
+    leaf: tuple
+        The leaf node (LEAF, leaf_value, leaf_proba).
+    """
+    node = nodes[0]
+    while node[0] != LEAF:
+        feature_value = x[node[0]]
+        if node[2]:
+            node = nodes[node[3] if feature_value == node[1] else node[4]]
+        else:
+            node = nodes[node[3] if feature_value >= node[1] else node[4]]
+    return node
+
+
+# =============================================================================
+# Flat forest
+# =============================================================================
+
+class FlatForest:
+    """
+    All the trees of an ensemble stored one after another in one set of
+    arrays, i.e. the arrays of a FlatTree concatenated over the trees.
+
+    Parameters
+    ----------
+    node_offsets: array-like of shape (n_trees + 1,) of int64
+        The nodes of tree i are the nodes node_offsets[i] to
+        node_offsets[i + 1] - 1. The node ids (i.e. the children) of each
+        tree are local to the tree.
+
+    feature, threshold, op, children_true, children_false, value: array-like
+        The arrays of all the trees, see FlatTree.
+
+    proba_offsets: array-like of shape (n_nodes + 1,) of int64
+        The offsets of the leaf probabilities of all the nodes in
+        proba_values.
+
+    proba_values: array-like of float64
+        The leaf probabilities of all the trees, concatenated.
+
+    feature_idxs: array-like of shape (n_trees, n_selected_features), default=None
+        The columns of the input samples each tree is fitted on, if the trees
+        are fitted on selected features (e.g. in a random forest).
+
+    NB: The trees are only views of the arrays and are created on demand by
+    get_tree(), so a forest costs a fixed number of Python objects however
+    many trees it has. This is what allows processes that memory-map the
+    same model file to share (nearly) all of a model's memory.
+    """
+
+    def __init__(self, node_offsets, feature, threshold, op, children_true, children_false, value, proba_offsets,
+                 proba_values, feature_idxs=None):
+        self.node_offsets = node_offsets
+        self.feature = feature
+        self.threshold = threshold
+        self.op = op
+        self.children_true = children_true
+        self.children_false = children_false
+        self.value = value
+        self.proba_offsets = proba_offsets
+        self.proba_values = proba_values
+        self.feature_idxs = feature_idxs
+
+    @property
+    def n_trees(self):
+        return len(self.node_offsets) - 1
+
+    @classmethod
+    def from_trees(cls, flat_trees, feature_idxs=None):
+        """
+        Concatenate the arrays of flat trees into a flat forest.
+        """
+        node_offsets = np.zeros(len(flat_trees) + 1, dtype=np.int64)
+        node_offsets[1:] = np.cumsum([flat_tree.n_nodes for flat_tree in flat_trees])
+
+        # NB: The offsets of the leaf probabilities are made absolute in the concatenated proba_values.
+        n_proba = np.cumsum([0] + [len(flat_tree.proba_values) for flat_tree in flat_trees])
+        proba_offsets = [np.zeros(1, dtype=np.int64)]
+        proba_offsets += [flat_tree.proba_offsets[1:] + n_proba[i] for i, flat_tree in enumerate(flat_trees)]
+
+        arrays = {name: np.concatenate([getattr(flat_tree, name) for flat_tree in flat_trees], axis=0)
+                  for name in ("feature", "threshold", "op", "children_true", "children_false", "value",
+                               "proba_values")}
+        return cls(node_offsets=node_offsets, proba_offsets=np.concatenate(proba_offsets),
+                   feature_idxs=feature_idxs, **arrays)
+
+    def get_tree(self, i):
+        """
+        Get the i-th tree as a FlatTree of views of the forest's arrays.
+        """
+        start, stop = self.node_offsets[i], self.node_offsets[i + 1]
+        return FlatTree(feature=self.feature[start:stop], threshold=self.threshold[start:stop],
+                        op=self.op[start:stop], children_true=self.children_true[start:stop],
+                        children_false=self.children_false[start:stop], value=self.value[start:stop],
+                        proba_offsets=self.proba_offsets[start:stop + 1], proba_values=self.proba_values)
+
+    def predict_tree(self, i, X):
+        """
+        Predict the leaf values of the samples X by the i-th tree, selecting
+        its columns of X first if the trees are fitted on selected features.
+        """
+        if self.feature_idxs is not None:
+            X = np.asarray(X)[:, self.feature_idxs[i]]
+        return self.get_tree(i).predict(X)
@@ -25,6 +25,8 @@ class FuzzyCARTClassifier(BaseFuzzyDecisionTree, DecisionTreeInterface):
     and attributes in this class.
     """
 
+    _is_classifier = True
+
     # All parameters in this constructor should have default values.
     def __init__(self, disable_fuzzy=False, X_fuzzy_dms=None, fuzzification_options=None,
                  criterion_func=CRITERIA_FUNC_CLF["gini"], max_depth=float("inf"), min_samples_split=2,
@@ -81,6 +83,8 @@ class FuzzyID3Classifier(BaseFuzzyDecisionTree, DecisionTreeInterface):
     and attributes in this class.
     """
 
+    _is_classifier = True
+
     # All parameters in this constructor should have default values.
     def __init__(self, disable_fuzzy=False, X_fuzzy_dms=None, fuzzification_options=None,
                  criterion_func=CRITERIA_FUNC_CLF["entropy"], max_depth=float("inf"), min_samples_split=2,
@@ -108,6 +112,8 @@ class FuzzyC45Classifier(BaseFuzzyDecisionTree, DecisionTreeInterface):
     and attributes in this class.
     """
 
+    _is_classifier = True
+
     # All parameters in this constructor should have default values.
     def __init__(self, disable_fuzzy=False, X_fuzzy_dms=None, fuzzification_options=None,
                  criterion_func=CRITERIA_FUNC_CLF["entropy"], max_depth=float("inf"), min_samples_split=2,
@@ -5,14 +5,30 @@
 @date: 02/02/2021 3:30 pm
 @desc: 
 """
+import hashlib
 from abc import ABCMeta
 import numpy as np
-from sklearn.preprocessing import OneHotEncoder
 
 from fuzzytrees.fdt_base import FuzzyDecisionTreeWrapper, CRITERIA_FUNC_REG
 from fuzzytrees.fdts import FuzzyCARTRegressor
 from fuzzytrees.util_criterion_funcs import LeastSquaresFunction, SoftLeastSquaresFunction
-from fuzzytrees.util_data_processing_funcs import one_hot_encode
+from fuzzytrees.fdt_flat import predict_tuples
+from fuzzytrees.util_data_processing_funcs import DEFAULT_CHUNK_SIZE, get_fuzzy_set_table, get_soft_half_widths, iter_predict_chunks, \
+    one_hot_encode, to_row
+from fuzzytrees.util_profiler import track_memory_usage
+
+
+def _get_data_key(X, y):
+    """
+    Get a digest of the training data, which tells whether the raw scores
+    cached in warm start are the scores of the same samples.
+    """
+    digest = hashlib.sha1()
+    for data in (X, y):
+        data = np.ascontiguousarray(data)
+        digest.update("{}{}".format(data.shape, data.dtype.str).encode("utf-8"))
+        digest.update(data)
+    return digest.hexdigest()
 
 
 class FuzzyGBDT(metaclass=ABCMeta):
@@ -34,7 +50,7 @@ class FuzzyGBDT(metaclass=ABCMeta):
 
     def __init__(self, disable_fuzzy, X_fuzzy_dms, fuzzification_options, criterion_func, learning_rate, n_estimators,
                  validation_fraction, n_iter_no_change, max_depth, min_samples_split, min_impurity_split,
-                 is_regression):
+                 is_regression, max_leaf_nodes=None, warm_start=False, track_memory=None):
         self.disable_fuzzy = disable_fuzzy
         self.X_fuzzy_dms = X_fuzzy_dms
         self.fuzzification_options = fuzzification_options
@@ -47,6 +63,24 @@ class FuzzyGBDT(metaclass=ABCMeta):
         self.min_samples_split = min_samples_split
         self.min_impurity_split = min_impurity_split
         self.is_regression = is_regression
+        self.max_leaf_nodes = max_leaf_nodes
+        self.warm_start = warm_start
+        self.track_memory = track_memory
+        self.memory_stats_ = None
+        # In warm start, the raw scores F(x) of the training samples predicted by the fitted trees, the number of
+        # these trees and the digest of the training data, so that the trees added later continue from them
+        # without predicting again.
+        self._train_raw_scores = None
+        self._n_raw_score_estimators = 0
+        self._train_data_key = None
+        # A FlatForest that replaces the sub-estimators in a model loaded with
+        # util_model_io.load_model(shared=True).
+        self._flat_forest = None
+        # The trees and the fuzzy sets as plain Python objects, used by predict_one().
+        self._tree_tuples = None
+        self._fuzzy_set_table = None
+        # An optional PredictionCache in front of predict(), see set_prediction_cache().
+        self._prediction_cache = None
 
         self._loss_func = LeastSquaresFunction() if self.is_regression else SoftLeastSquaresFunction()  # (Friedman et al., 1998; Friedman 2001)
 
@@ -61,15 +95,31 @@ class FuzzyGBDT(metaclass=ABCMeta):
             #                                criterion_func=self.criterion_func, max_depth=self.max_depth,
             #                                min_samples_split=self.min_samples_split,
             #                                min_impurity_split=self.min_impurity_split))
-            estimator = FuzzyDecisionTreeWrapper(fdt_class=FuzzyCARTRegressor,
-                                                 disable_fuzzy=disable_fuzzy,
-                                                 fuzzification_options=fuzzification_options,
-                                                 criterion_func=criterion_func, max_depth=max_depth,
-                                                 min_samples_split=min_samples_split,
-                                                 min_impurity_split=min_impurity_split)
-            self._estimators.append(estimator)
-
-    def fit(self, X_train, y_train):
+            self._estimators.append(self._make_estimator())
+
+    def _make_estimator(self):
+        """
+        Make a new (unfitted) sub-estimator.
+        """
+        return FuzzyDecisionTreeWrapper(fdt_class=FuzzyCARTRegressor,
+                                        disable_fuzzy=self.disable_fuzzy,
+                                        fuzzification_options=self.fuzzification_options,
+                                        criterion_func=self.criterion_func, max_depth=self.max_depth,
+                                        min_samples_split=self.min_samples_split,
+                                        min_impurity_split=self.min_impurity_split,
+                                        max_leaf_nodes=self.max_leaf_nodes)
+
+    def _get_n_fitted_estimators(self):
+        """
+        Get the number of the leading sub-estimators that are fitted.
+        """
+        for i, estimator in enumerate(self._estimators):
+            if not estimator.is_fitted():
+                return i
+        return len(self._estimators)
+
+    @track_memory_usage("fit")
+    def fit(self, X_train, y_train, sample_weight=None):
         """
         Fit the fuzzy gradient boosting model.
 
@@ -81,22 +131,69 @@ class FuzzyGBDT(metaclass=ABCMeta):
         y_train: array-like of shape (n_samples,)
             Target values (strings or integers in classification, real numbers
             in regression)
+
+        sample_weight: array-like of shape (n_samples,), default=None
+            The non-negative weights of the samples, with which every tree is
+            fitted. If None, the samples are equally weighted.
         """
-        # Use the first tree to fit the first estimator, and then use it
-        # to predict values F_0(x).
-        self._estimators[0].fit(X_train, y_train)
-        y_pred = self._estimators[0].predict(X_train)
-        # print("0-th estimator produces an initialised constant: {}".format(y_pred))
+        if self._flat_forest is not None:
+            raise ValueError("A model loaded with shared=True cannot be fitted again.")
+        self._tree_tuples = None
+        self._fuzzy_set_table = None
+        if self._prediction_cache is not None:
+            self._prediction_cache.clear()
+
+        # In warm start, keep the fitted trees and only fit the trees added since.
+        n_fitted = self._get_n_fitted_estimators() if self.warm_start else 0
+        data_key = _get_data_key(X_train, y_train) if self.warm_start else None
+        if n_fitted > self.n_estimators:
+            raise ValueError("n_estimators ({}) must not be less than the number of fitted trees ({}) when "
+                             "warm_start=True.".format(self.n_estimators, n_fitted))
+        del self._estimators[self.n_estimators:]
+        while len(self._estimators) < self.n_estimators:
+            self._estimators.append(self._make_estimator())
+        if n_fitted < self.n_estimators:
+            # NB: FuzzyDecisionTreeWrapper.fit() only prints the errors raised in fitting a tree, e.g. an invalid
+            # max_leaf_nodes, so the parameters of the trees are checked before fitting any tree.
+            self._estimators[n_fitted].estimator._check_params()
+
+        if n_fitted == 0:
+            # Use the first tree to fit the first estimator, and then use it
+            # to predict values F_0(x).
+            self._estimators[0].fit(X_train, y_train, sample_weight=sample_weight)
+            y_pred = self._estimators[0].predict(X_train)
+            # print("0-th estimator produces an initialised constant: {}".format(y_pred))
+            n_fitted = 1
+        elif self._train_raw_scores is not None and self._n_raw_score_estimators == n_fitted and \
+                self._train_data_key == data_key:
+            # Continue from the cached raw scores of the fitted trees.
+            y_pred = np.copy(self._train_raw_scores)
+        else:
+            # E.g. a model loaded from a model file, or other training data: predict the raw scores of the fitted
+            # trees once.
+            y_pred = np.array(self._estimators[0].predict(X_train), dtype=float)
+            for i in range(1, n_fitted):
+                y_pred -= np.multiply(self.learning_rate, self._estimators[i].predict(X_train))
 
         # Then use the other tree iteratively to fit the other estimators by the
         # residuals of the last predictions. The first set of residuals is the
         # true values minus the values F_0(x).
-        for i in range(1, self.n_estimators):
+        for i in range(n_fitted, self.n_estimators):
             gradient = self._loss_func.gradient(y_train, y_pred)
-            self._estimators[i].fit(X_train, gradient)
+            self._estimators[i].fit(X_train, gradient, sample_weight=sample_weight)
             y_pred -= np.multiply(self.learning_rate, self._estimators[i].predict(X_train))
             # print("{sn}-th estimator produces a residual: {residual}".format(sn=i, residual=y_pred))
 
+        if self.warm_start:
+            self._train_raw_scores = np.array(y_pred, dtype=float)
+            self._n_raw_score_estimators = self.n_estimators
+            self._train_data_key = data_key
+        else:
+            self._train_raw_scores = None
+            self._n_raw_score_estimators = 0
+            self._train_data_key = None
+
+    @track_memory_usage("predict")
     def predict(self, X):
         """
         Predict class for X.
@@ -111,14 +208,29 @@ class FuzzyGBDT(metaclass=ABCMeta):
         y_pred: ndarray of shape (n_samples,)
             The predicted values.
         """
+        if self._prediction_cache is not None:
+            return self._prediction_cache.predict(X, self._predict, apply_func=self.apply)
+        return self._predict(X)
+
+    def _predict(self, X):
+        # NB: The trees of a shared model are views of the shared arrays, which are created on demand.
+        predict_tree = self._flat_forest.predict_tree if self._flat_forest is not None \
+            else lambda i, X: self._estimators[i].predict(X)
+
         # Use the first fitted estimator to predict values F_0(x).
-        y_pred = self._estimators[0].predict(X)
+        y_pred = np.array(predict_tree(0, X), dtype=float)
 
         # Then use the other fitting estimators to iteratively predict
         # the residuals and add them up to the values F_0(x).
         for i in range(1, self.n_estimators):
-            y_pred -= np.multiply(self.learning_rate, self._estimators[i].predict(X))
+            y_pred -= np.multiply(self.learning_rate, predict_tree(i, X))
 
+        return self._get_pred(y_pred)
+
+    def _get_pred(self, y_pred):
+        """
+        Get the predictions from the raw scores F(x) of the samples.
+        """
         if not self.is_regression:
             # Use each probability distribution instead.
             sums = np.expand_dims(np.sum(np.exp(y_pred), axis=1), axis=1)
@@ -132,6 +244,213 @@ class FuzzyGBDT(metaclass=ABCMeta):
 
         return y_pred
 
+    def set_prediction_cache(self, prediction_cache):
+        """
+        Put a cache in front of predict(), or remove it (None).
+
+        Parameters
+        ----------
+        prediction_cache: PredictionCache or None
+            The cache of the predictions of the rows, which is cleared when
+            the model is fitted again. See util_prediction_cache.
+        """
+        self._prediction_cache = prediction_cache
+
+    def predict_one(self, x, fuzzify=False):
+        """
+        Predict one sample, as fast as possible, e.g. to answer a single
+        request.
+
+        NB: The trees are walked on their nodes as plain Python tuples (see
+        FlatTree.to_tuples()), which are made on the first call, so that no
+        NumPy operation is done per node. For many samples, predict() is
+        faster.
+
+        Parameters
+        ----------
+        x: array-like of shape (n_features,)
+            The input sample.
+
+        fuzzify: bool, default=False
+            Set whether x holds the raw features, which are fuzzified with
+            the fuzzy sets saved in the fuzzification options (see
+            fuzzify_row()).
+
+        Returns
+        -------
+        y_pred: scalar
+            The predicted value, the same as predict() returns for x.
+        """
+        x = self._to_row(x, fuzzify)
+        tree_tuples = self._get_tree_tuples()
+        # NB: The raw score is added up in the same order as in predict(), so the result is the same.
+        y_pred = predict_tuples(tree_tuples[0][0], x)[1]
+        is_scalar = not isinstance(y_pred, list)
+        y_pred = float(y_pred) if is_scalar else [float(v) for v in y_pred]
+        for nodes, _ in tree_tuples[1:]:
+            value = predict_tuples(nodes, x)[1]
+            if is_scalar:
+                y_pred -= self.learning_rate * value
+            else:
+                y_pred = [v - self.learning_rate * w for v, w in zip(y_pred, value)]
+
+        if self.is_regression and is_scalar:
+            return y_pred
+        return self._get_pred(np.array([y_pred]))[0]
+
+    def apply(self, X):
+        """
+        Get the id of the leaf that each input sample ends up in, in each
+        tree, e.g. to use the leaves as features (a tree embedding) or as
+        cache keys. See BaseFuzzyDecisionTree.apply().
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+            The input samples.
+
+        Returns
+        -------
+        leaf_ids: ndarray of shape (n_samples, n_estimators)
+            The leaf id of each sample in each tree, where the first tree is the
+            initial tree of the model.
+        """
+        X = np.asarray(X)
+        return np.column_stack([flat_tree.apply(X if idxs is None else X[:, idxs])
+                                for flat_tree, idxs in self._get_flat_trees()])
+
+    def decision_path(self, X):
+        """
+        Get the nodes that each input sample goes through, in each tree.
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+            The input samples.
+
+        Returns
+        -------
+        indicator: scipy.sparse.csr_matrix of shape (n_samples, n_nodes)
+            indicator[i, j] is 1 if sample i goes through node j, where the
+            nodes of all the trees are numbered one tree after another.
+
+        n_nodes_ptr: ndarray of shape (n_trees + 1,)
+            The nodes of tree i are the columns
+            n_nodes_ptr[i]:n_nodes_ptr[i + 1] of indicator.
+        """
+        from scipy import sparse
+
+        X = np.asarray(X)
+        flat_trees = self._get_flat_trees()
+        indicators = [flat_tree.decision_path(X if idxs is None else X[:, idxs]) for flat_tree, idxs in flat_trees]
+        n_nodes_ptr = np.cumsum([0] + [flat_tree.n_nodes for flat_tree, _ in flat_trees])
+        return sparse.hstack(indicators, format="csr"), n_nodes_ptr
+
+    def predict_soft(self, X, softness=0.5, half_widths=None, min_weight=1e-3):
+        """
+        Predict results for X by soft (fuzzy) inference, i.e. the weight of
+        each sample flows into both branches of the splits near which it
+        lies, by its membership of each branch, and the outputs of the
+        leaves it reaches are blended by their weights (see
+        FlatTree.soft_apply()).
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+            The input samples.
+
+        softness: float, default=0.5
+            The width of the soft regions below the split values relative
+            to the fuzzy sets of the features, see get_soft_half_widths().
+            0 makes the inference crisp, i.e. the same as predict().
+
+        half_widths: float or array-like of shape (n_features,), default=None
+            The half widths of the soft regions of the columns of X, which
+            are used instead of the ones derived from the fuzzy sets (e.g.
+            for a model without fuzzy sets).
+
+        min_weight: float, default=1e-3
+            The minimum weight of a branch to be followed. A larger value
+            prunes more branches, which makes the inference faster and
+            closer to the crisp one.
+
+        Returns
+        -------
+        y_pred: ndarray of shape (n_samples,)
+            The predicted values.
+        """
+        X = np.asarray(X)
+        if half_widths is None:
+            half_widths = get_soft_half_widths(X.shape[1], self.fuzzification_options, softness=softness)
+        half_widths = np.broadcast_to(np.asarray(half_widths, dtype=np.float64), (X.shape[1],))
+        # The raw scores F(x) are added up as in predict(), with the blended outputs of the trees.
+        flat_trees = self._get_flat_trees()
+        y_pred = None
+        for flat_tree, idxs in flat_trees:
+            tree_pred = flat_tree.predict_soft(X if idxs is None else X[:, idxs],
+                                               half_widths if idxs is None else half_widths[idxs],
+                                               min_weight=min_weight)
+            if y_pred is None:
+                y_pred = tree_pred
+            else:
+                y_pred -= np.multiply(self.learning_rate, tree_pred)
+        return self._get_pred(y_pred)
+
+    def _get_flat_trees(self):
+        """
+        Get every tree as a FlatTree, and the columns the tree is fitted on
+        (or None).
+        """
+        if self._flat_forest is not None:
+            feature_idxs = self._flat_forest.feature_idxs
+            return [(self._flat_forest.get_tree(i), None if feature_idxs is None else feature_idxs[i])
+                    for i in range(self.n_estimators)]
+        return [(wrapper.estimator._get_flat_tree(), getattr(wrapper, "feature_idxs", None))
+                for wrapper in self._estimators[:self.n_estimators]]
+
+    def _get_tree_tuples(self):
+        """
+        Get the nodes of every tree as plain Python tuples, and the columns
+        the tree is fitted on (or None), see predict_one().
+        """
+        if self._tree_tuples is None:
+            self._tree_tuples = [(flat_tree.to_tuples(), None if idxs is None else np.asarray(idxs).tolist())
+                                 for flat_tree, idxs in self._get_flat_trees()]
+        return self._tree_tuples
+
+    def _to_row(self, x, fuzzify=False):
+        if fuzzify and self._fuzzy_set_table is None:
+            self._fuzzy_set_table = get_fuzzy_set_table(self.fuzzification_options)
+        return to_row(x, self._fuzzy_set_table if fuzzify else None)
+
+    def predict_chunks(self, X, chunk_size=DEFAULT_CHUNK_SIZE, fuzzify=False):
+        """
+        Predict results for X block by block, so that the memory used depends
+        on chunk_size instead of the number of samples, e.g. to score a file
+        that does not fit in memory.
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features), or iterable of such arrays
+            The input samples, e.g. a memory-mapped array or a generator of
+            blocks of rows, see iter_row_chunks().
+
+        chunk_size: int, default=DEFAULT_CHUNK_SIZE
+            The maximum number of samples predicted at once.
+
+        fuzzify: bool, default=False
+            Set whether X holds the raw features, which are fuzzified block
+            by block with the fuzzy sets (centroids and thetas) saved in the
+            fuzzification options, see fuzzify_features().
+
+        Yields
+        ------
+        y_pred_chunk: ndarray of shape (n_samples_chunk,)
+            The predicted values of each block, in the order of the samples.
+        """
+        return iter_predict_chunks(self.predict, X, chunk_size=chunk_size,
+                                   fuzzification_options=self.fuzzification_options if fuzzify else None)
+
 
 class FuzzyGBDTClassifier(FuzzyGBDT):
     """
@@ -191,8 +510,34 @@ class FuzzyGBDTClassifier(FuzzyGBDT):
     is_regression: bool, default=True
         True or false depending on if we're doing regression or classification.
 
+    max_leaf_nodes: int, default=None
+        The maximum number of leaf nodes of each tree. If set, the trees are
+        grown best-first, i.e. the node with the highest impurity gain is
+        always split next, which makes small and strong base learners of
+        bounded size. If None, the number of leaf nodes is unlimited.
+
+    warm_start: bool, default=False
+        Whether to keep the trees fitted by the last call of fit() and only
+        fit the trees added since, i.e. call fit() again after increasing
+        n_estimators to continue boosting from the fitted trees. The raw
+        scores of the training samples are cached between the calls, so the
+        fitted trees are not used to predict again.
+        NB: The cached raw scores are only used if the same training data is
+        passed again. Otherwise, the fitted trees predict the raw scores of
+        the new training data first.
+
+    track_memory: {"tracemalloc", "rss"}, default=None
+        Set whether to track the peak memory allocated in fit() and predict()
+        into memory_stats_. See MemoryTracker in util_profiler.
+
     Attributes
     ----------
+    memory_stats_: dict
+        The memory statistics of the model if track_memory is set, otherwise
+        None. The keys are "mode", "fit_peak_bytes" and "predict_peak_bytes"
+        (the peak bytes allocated in the last call of each function) and
+        "model_bytes" (the footprint of the fitted model itself).
+
     _loss_func: LossFunction
         The concrete object of the class LossFunction's derived classes.
 
@@ -202,21 +547,25 @@ class FuzzyGBDTClassifier(FuzzyGBDT):
 
     def __init__(self, disable_fuzzy=False, X_fuzzy_dms=None, fuzzification_options=None,
                  criterion_func=CRITERIA_FUNC_REG["mse"], learning_rate=0.1, n_estimators=100, validation_fraction=0.1,
-                 n_iter_no_change=None, max_depth=3, min_samples_split=2, min_impurity_split=1e-7):
+                 n_iter_no_change=None, max_depth=3, min_samples_split=2, min_impurity_split=1e-7,
+                 max_leaf_nodes=None, warm_start=False, track_memory=None):
         super().__init__(disable_fuzzy=disable_fuzzy, X_fuzzy_dms=X_fuzzy_dms,
                          fuzzification_options=fuzzification_options, criterion_func=criterion_func,
                          learning_rate=learning_rate, n_estimators=n_estimators,
                          validation_fraction=validation_fraction, n_iter_no_change=n_iter_no_change,
                          max_depth=max_depth, min_samples_split=min_samples_split,
-                         min_impurity_split=min_impurity_split, is_regression=False)
+                         min_impurity_split=min_impurity_split, is_regression=False,
+                         max_leaf_nodes=max_leaf_nodes, warm_start=warm_start, track_memory=track_memory)
+
+    def fit(self, X_train, y_train, sample_weight=None):
+        from sklearn.preprocessing import OneHotEncoder
 
-    def fit(self, X_train, y_train):
         if len(np.shape(y_train)) == 1:
             y_train = np.expand_dims(y_train, axis=1)
         transformer = OneHotEncoder(handle_unknown='ignore')
         y_train = transformer.fit_transform(y_train).toarray()
 
-        super().fit(X_train=X_train, y_train=y_train)
+        super().fit(X_train=X_train, y_train=y_train, sample_weight=sample_weight)
 
 
 class FuzzyGBDTRegressor(FuzzyGBDT):
@@ -277,8 +626,34 @@ class FuzzyGBDTRegressor(FuzzyGBDT):
     is_regression: bool, default=True
         True or false depending on if we're doing regression or classification.
 
+    max_leaf_nodes: int, default=None
+        The maximum number of leaf nodes of each tree. If set, the trees are
+        grown best-first, i.e. the node with the highest impurity gain is
+        always split next, which makes small and strong base learners of
+        bounded size. If None, the number of leaf nodes is unlimited.
+
+    warm_start: bool, default=False
+        Whether to keep the trees fitted by the last call of fit() and only
+        fit the trees added since, i.e. call fit() again after increasing
+        n_estimators to continue boosting from the fitted trees. The raw
+        scores of the training samples are cached between the calls, so the
+        fitted trees are not used to predict again.
+        NB: The cached raw scores are only used if the same training data is
+        passed again. Otherwise, the fitted trees predict the raw scores of
+        the new training data first.
+
+    track_memory: {"tracemalloc", "rss"}, default=None
+        Set whether to track the peak memory allocated in fit() and predict()
+        into memory_stats_. See MemoryTracker in util_profiler.
+
     Attributes
     ----------
+    memory_stats_: dict
+        The memory statistics of the model if track_memory is set, otherwise
+        None. The keys are "mode", "fit_peak_bytes" and "predict_peak_bytes"
+        (the peak bytes allocated in the last call of each function) and
+        "model_bytes" (the footprint of the fitted model itself).
+
     _loss_func: LossFunction
         The concrete object of the class LossFunction's derived classes.
 
@@ -288,10 +663,12 @@ class FuzzyGBDTRegressor(FuzzyGBDT):
 
     def __init__(self, disable_fuzzy=False, X_fuzzy_dms=None, fuzzification_options=None,
                  criterion_func=CRITERIA_FUNC_REG["mse"], learning_rate=0.1, n_estimators=100, validation_fraction=0.1,
-                 n_iter_no_change=None, max_depth=3, min_samples_split=2, min_impurity_split=1e-7):
+                 n_iter_no_change=None, max_depth=3, min_samples_split=2, min_impurity_split=1e-7,
+                 max_leaf_nodes=None, warm_start=False, track_memory=None):
         super().__init__(disable_fuzzy=disable_fuzzy, X_fuzzy_dms=X_fuzzy_dms,
                          fuzzification_options=fuzzification_options, criterion_func=criterion_func,
                          learning_rate=learning_rate, n_estimators=n_estimators,
                          validation_fraction=validation_fraction, n_iter_no_change=n_iter_no_change,
                          max_depth=max_depth, min_samples_split=min_samples_split,
-                         min_impurity_split=min_impurity_split, is_regression=True)
+                         min_impurity_split=min_impurity_split, is_regression=True,
+                         max_leaf_nodes=max_leaf_nodes, warm_start=warm_start, track_memory=track_memory)
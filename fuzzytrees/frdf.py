@@ -6,13 +6,17 @@
 """
 import ctypes
 import multiprocessing
-from abc import ABCMeta
+import warnings
+from abc import ABCMeta, abstractmethod
 import numpy as np
 
 from fuzzytrees.fdt_base import FuzzyDecisionTreeWrapper
 from fuzzytrees.fdts import FuzzyCARTClassifier, FuzzyCARTRegressor
 from fuzzytrees.util_criterion_funcs import majority_vote, mean_value
-from fuzzytrees.util_data_processing_funcs import resample_bootstrap
+from fuzzytrees.fdt_flat import predict_tuples
+from fuzzytrees.util_data_processing_funcs import DEFAULT_CHUNK_SIZE, draw_bootstrap_seeds, get_bootstrap_indices, \
+    get_fuzzy_set_table, get_soft_half_widths, iter_predict_chunks, to_row
+from fuzzytrees.util_profiler import track_memory_usage
 
 
 class FuzzyRDF(metaclass=ABCMeta):
@@ -81,7 +85,9 @@ class FuzzyRDF(metaclass=ABCMeta):
     """
 
     def __init__(self, disable_fuzzy, fuzzification_options, criterion_func, n_estimators,
-                 max_depth, min_samples_split, min_impurity_split, max_features, multi_process_options):
+                 max_depth, min_samples_split, min_impurity_split, max_features, multi_process_options,
+                 max_leaf_nodes=None, splitter="best", oob_score=False, warm_start=False, is_regression=False,
+                 track_memory=None):
         self.disable_fuzzy = disable_fuzzy
         self.fuzzification_options = fuzzification_options
         self.criterion_func = criterion_func
@@ -91,15 +97,40 @@ class FuzzyRDF(metaclass=ABCMeta):
         self.min_impurity_split = min_impurity_split
         self.max_features = max_features
         self.multi_process_options = multi_process_options
+        self.max_leaf_nodes = max_leaf_nodes
+        self.splitter = splitter
+        self.oob_score = oob_score
+        self.warm_start = warm_start
+        self.is_regression = is_regression
+        self.track_memory = track_memory
 
         self._estimators = []  # Forest initialised in derived classes.
+        # The seeds of the bootstrap subsets of the trees, see util_data_processing_funcs.get_bootstrap_indices().
+        self._bootstrap_seeds = None
         self._res_func = None
+        self.memory_stats_ = None
+        # The out-of-bag estimates, if oob_score=True.
+        self.oob_score_ = None
+        self.oob_prediction_ = None
+        # The sums (regression) or votes (classification) of the out-of-bag predictions, accumulated as the trees
+        # are fitted, and the number of out-of-bag predictions of each sample.
+        self._oob_sums = None
+        self._oob_counts = None
+        # A FlatForest that replaces the sub-estimators in a model loaded with
+        # util_model_io.load_model(shared=True).
+        self._flat_forest = None
+        # The trees and the fuzzy sets as plain Python objects, used by predict_one().
+        self._tree_tuples = None
+        self._fuzzy_set_table = None
+        # An optional PredictionCache in front of predict(), see set_prediction_cache().
+        self._prediction_cache = None
 
         self._n_processes = None
         if self.multi_process_options is not None:
             self._n_processes = multiprocessing.cpu_count() if self.multi_process_options.n_cpu_cores_req is None else self.multi_process_options.n_cpu_cores_req
 
-    def fit(self, X_train, y_train):
+    @track_memory_usage("fit")
+    def fit(self, X_train, y_train, sample_weight=None):
         """
         Fit the fuzzy random decision forest model (in multi-process mode).
 
@@ -113,9 +144,58 @@ class FuzzyRDF(metaclass=ABCMeta):
             real numbers in regression)
             NB: The input array needs to be of integer dtype, otherwise a
             TypeError is raised.
+
+        sample_weight: array-like of shape (n_samples,), default=None
+            The non-negative weights of the samples. If None, the samples are
+            equally weighted.
+
+        NB: Each tree is fitted on all the samples, weighted by the number of
+        times each sample is drawn into the tree's bootstrap subset (times
+        its sample weight), instead of on a copy of the subset with
+        duplicated rows.
         """
-        # Randomly select n_estimators training subsets through bootstrapping sampling.
-        X_train_subsets, y_train_subsets = resample_bootstrap(X_train, y_train, n_subsets=self.n_estimators)
+        if self._flat_forest is not None:
+            raise ValueError("A model loaded with shared=True cannot be fitted again.")
+        self._tree_tuples = None
+        self._fuzzy_set_table = None
+        if self._prediction_cache is not None:
+            self._prediction_cache.clear()
+
+        # In warm start, keep the fitted trees and only fit the trees added since.
+        n_fitted = self._get_n_fitted_estimators() if self.warm_start else 0
+        if n_fitted > self.n_estimators:
+            raise ValueError("n_estimators ({}) must not be less than the number of fitted trees ({}) when "
+                             "warm_start=True.".format(self.n_estimators, n_fitted))
+        if n_fitted > 0 and self.oob_score and self._bootstrap_seeds is None:
+            raise ValueError("The out-of-bag estimates cannot be continued because the bootstrap seeds of the "
+                             "fitted trees are unknown.")
+        if n_fitted > 0 and self.oob_score and self._oob_counts is not None and \
+                len(self._oob_counts) != np.shape(X_train)[0]:
+            raise ValueError("The out-of-bag estimates cannot be continued on {} samples because the fitted trees "
+                             "were fitted on {} samples. Pass the same training data to every call when "
+                             "warm_start=True.".format(np.shape(X_train)[0], len(self._oob_counts)))
+        del self._estimators[self.n_estimators:]
+        while len(self._estimators) < self.n_estimators:
+            self._estimators.append(self._make_estimator())
+        if n_fitted < self.n_estimators:
+            # NB: FuzzyDecisionTreeWrapper.fit() only prints the errors raised in fitting a tree, so the parameters
+            # of the trees are checked before fitting any tree.
+            self._estimators[n_fitted].estimator._check_params()
+
+        # Draw one seed per tree, from which the tree's bootstrap subset is drawn just before fitting it.
+        # NB: The subsets are never all materialised at the same time.
+        new_seeds = draw_bootstrap_seeds(self.n_estimators - n_fitted)
+        if n_fitted == 0:
+            self._bootstrap_seeds = new_seeds
+        else:
+            old_seeds = np.full(n_fitted, -1, dtype=np.int64) if self._bootstrap_seeds is None \
+                else self._bootstrap_seeds[:n_fitted]
+            self._bootstrap_seeds = np.concatenate((old_seeds, new_seeds))
+
+        if self.oob_score and (n_fitted == 0 or self._oob_counts is None):
+            self._init_oob(X_train, y_train)
+            for i in range(n_fitted):
+                self._update_oob(X_train, i)
 
         # Get the number of the data features.
         n_features = X_train.shape[1]
@@ -125,9 +205,12 @@ class FuzzyRDF(metaclass=ABCMeta):
 
         if self.max_features is None:
             self.max_features = int(np.sqrt(n_features))
+        elif self.max_features < 1:
+            # NB: Like the other parameters of the trees, it is checked before fitting any tree.
+            raise ValueError("max_features must be at least 1, got {}".format(self.max_features))
 
         # Train each tree in the forest.
-        # NB: Iterate the n_estimators training subsets generated above, training a tree in each iteration.
+        # NB: Iterate the bootstrap seeds of the trees to be fitted, training a tree in each iteration.
         if self.multi_process_options:  # When self.multi_process_options is not None
             # In multi-process mode.
             with multiprocessing.Manager() as mg:
@@ -135,51 +218,138 @@ class FuzzyRDF(metaclass=ABCMeta):
                 q = multiprocessing.Manager().Queue()
                 # Create a pool for main process to manage its child processes in parallel.
                 pool = multiprocessing.Pool(processes=self._n_processes)
-                for i in range(self.n_estimators):
-                    pool.apply_async(self._fit_one, args=(X_train_subsets[i], y_train_subsets[i], n_features, i, q,))
+                results = []
+                for i in range(n_fitted, self.n_estimators):
+                    results.append(pool.apply_async(self._fit_one, args=(X_train, y_train, sample_weight,
+                                                                         self._bootstrap_seeds[i], i, q,)))
                 pool.close()
                 pool.join()
+                # NB: Re-raise the errors of the sub-processes (e.g. a model that cannot be pickled to send to
+                # them), which would otherwise leave the trees unfitted without a word.
+                for result in results:
+                    result.get()
 
                 # Replace all the estimators in the forest with the ones returned by the sub-processes.
-                idx = 0
+                # NB: The estimators are returned in the order they finish, together with their indexes.
                 while not q.empty():
-                    estimator = q.get()
+                    idx, estimator = q.get()
                     self._estimators[idx] = estimator
                     print("Replaced the {}-th estimators in the forest.".format(idx))
-                    idx += 1
+                    if self.oob_score:
+                        self._update_oob(X_train, idx)
         else:
             # In single-process mode.
-            for i in range(self.n_estimators):
-                self._fit_one(X_train_subsets[i], y_train_subsets[i], n_features, i)
-
-    def _fit_one(self, X_train_subset, y_train_subset, n_features, i, q=None):
-        # Randomly select features.
-        idxs = np.random.choice(n_features, self.max_features, replace=True)
-        if not self.disable_fuzzy:
-            # Select the columns of fuzzy degrees of membership at the same time.
-            idxs_cp = np.copy(idxs)
-            for idx in idxs_cp:
-                # Columns of the idx-th feature's degrees of membership start from
-                # "n_original_features + feature_idx * self.fuzzification_options.conv_k + 1", and end with
-                # "n_original_features + (feature_idx + 1) * self.fuzzification_options.conv_k + 1".
-                start = n_features + idx * self.fuzzification_options.conv_k
-                stop = n_features + (idx + 1) * self.fuzzification_options.conv_k
-                idxs_dm = np.arange(start=start, stop=stop, step=1, dtype=int)
-                idxs = np.concatenate((idxs, idxs_dm), axis=0)
-        X_train_subset = X_train_subset[:, idxs]
-
-        # Fit an estimator and record the indexes of fitted features to prepare for predictions.
-        self._estimators[i].fit(X_train_subset, y_train_subset)
-        self._estimators[i].feature_idxs = idxs
+            for i in range(n_fitted, self.n_estimators):
+                self._fit_one(X_train, y_train, sample_weight, self._bootstrap_seeds[i], i)
+                if self.oob_score:
+                    self._update_oob(X_train, i)
+
+        if self.oob_score:
+            self._set_oob_score(y_train)
+
+    def _fit_one(self, X_train, y_train, sample_weight, seed, i, q=None):
+        # Draw the bootstrap subset of the tree from its seed, as the number of times each sample is drawn.
+        # NB: The tree goes on drawing its random split values from the same generator, so that each tree is
+        # reproducible from its seed alone, in whichever process it is fitted.
+        n_samples = X_train.shape[0]
+        rng = np.random.RandomState(seed)
+        tree_sample_weight = np.bincount(get_bootstrap_indices(n_samples, rng), minlength=n_samples)
+        if sample_weight is not None:
+            tree_sample_weight = tree_sample_weight * np.asarray(sample_weight, dtype=np.float64)
+
+        # Fit an estimator that randomly selects max_features features at each node.
+        # NB: The estimator is fitted on all the columns, so no columns are copied and feature_idxs is None.
+        self._estimators[i].estimator.max_features = self.max_features
+        self._estimators[i].estimator.random_state = rng
+        self._estimators[i].fit(X_train, y_train, sample_weight=tree_sample_weight)
+        self._estimators[i].feature_idxs = None
 
         # In multi-process mode, the trained estimator needs to be passed back to the master process because
         # the sub-process cannot update the global variables in the master process.
         if self.multi_process_options:
             if not q.full():
-                q.put(self._estimators[i])
+                q.put((i, self._estimators[i]))
 
         print("{}-th tree fitting is complete.".format(i))
 
+    @abstractmethod
+    def _make_estimator(self):
+        """
+        Make a new (unfitted) sub-estimator of the forest.
+        """
+        pass
+
+    def _get_n_fitted_estimators(self):
+        """
+        Get the number of the leading sub-estimators that are fitted.
+        """
+        for i, estimator in enumerate(self._estimators):
+            if not estimator.is_fitted():
+                return i
+        return len(self._estimators)
+
+    def _init_oob(self, X_train, y_train):
+        n_samples = X_train.shape[0]
+        if self.is_regression:
+            self._oob_sums = np.zeros(np.shape(y_train), dtype=np.float64)
+        else:
+            # NB: The classes are non-negative integers, as in majority_vote().
+            self._oob_sums = np.zeros((n_samples, int(np.max(y_train)) + 1), dtype=np.float64)
+        self._oob_counts = np.zeros(n_samples, dtype=np.int64)
+
+    def _update_oob(self, X_train, i):
+        """
+        Add the predictions of the i-th tree for the samples that are not in
+        its bootstrap subset to the out-of-bag estimates.
+
+        NB: The bootstrap subset is drawn again from the tree's seed, so no
+        in-bag mask is stored per tree.
+        """
+        n_samples = X_train.shape[0]
+        is_oob = np.bincount(get_bootstrap_indices(n_samples, self._bootstrap_seeds[i]), minlength=n_samples) == 0
+        if not np.any(is_oob):
+            return
+        oob_idxs = np.flatnonzero(is_oob)
+        X_oob = X_train[oob_idxs]
+        idxs = self._estimators[i].feature_idxs
+        y_pred = np.asarray(self._estimators[i].predict(X_oob if idxs is None else X_oob[:, idxs]))
+        if self.is_regression:
+            self._oob_sums[oob_idxs] += np.reshape(y_pred, np.shape(self._oob_sums[oob_idxs]))
+        else:
+            np.add.at(self._oob_sums, (oob_idxs, y_pred.astype(int)), 1)
+        self._oob_counts[oob_idxs] += 1
+
+    def _set_oob_score(self, y_train):
+        """
+        Set oob_prediction_ and oob_score_ from the accumulated out-of-bag
+        predictions.
+        """
+        y_train = np.asarray(y_train)
+        has_oob = self._oob_counts > 0
+        if self.is_regression:
+            self.oob_prediction_ = np.full(np.shape(self._oob_sums), np.nan)
+            self.oob_prediction_[has_oob] = (self._oob_sums[has_oob].T / self._oob_counts[has_oob]).T
+        else:
+            self.oob_prediction_ = np.full(len(self._oob_counts), -1, dtype=np.int64)
+            self.oob_prediction_[has_oob] = np.argmax(self._oob_sums[has_oob], axis=1)
+
+        if not np.all(has_oob):
+            warnings.warn("{} samples were in the bootstrap subsets of all the trees, so their out-of-bag "
+                          "estimates are missing. Fit more trees to get a reliable oob_score_."
+                          .format(np.sum(~has_oob)))
+        if not np.any(has_oob):
+            self.oob_score_ = np.nan
+        elif self.is_regression:
+            y_true, y_pred = y_train[has_oob], self.oob_prediction_[has_oob]
+            self.oob_score_ = 1 - np.sum((y_true - y_pred) ** 2) / np.sum((y_true - np.mean(y_true, axis=0)) ** 2)
+        else:
+            self.oob_score_ = np.mean(self.oob_prediction_[has_oob] == y_train[has_oob])
+        if not self.warm_start:
+            # NB: In warm start, the accumulated predictions are kept, so that the trees added later add to them.
+            self._oob_sums = None
+            self._oob_counts = None
+
+    @track_memory_usage("predict")
     def predict(self, X):
         """
         Predict results for X.
@@ -233,17 +403,227 @@ class FuzzyRDF(metaclass=ABCMeta):
         y_pred: ndarray of shape (n_samples,)
             The predicted values.
         """
+        if self._prediction_cache is not None:
+            return self._prediction_cache.predict(X, self._predict, apply_func=self.apply)
+        return self._predict(X)
+
+    def _predict(self, X):
         y_preds = []
 
         for i in range(self.n_estimators):
+            if self._flat_forest is not None:
+                # NB: The tree is a view of the shared arrays, which is created on demand.
+                y_preds.append(self._flat_forest.predict_tree(i, X))
+                continue
+            # NB: Models saved by older versions are fitted on the selected columns of feature_idxs.
             idxs = self._estimators[i].feature_idxs
-            X_subset = X[:, idxs]
+            X_subset = X if idxs is None else X[:, idxs]
             y_pred = self._estimators[i].predict(X_subset)
             y_preds.append(y_pred)
         y_preds = np.array(y_preds).T
 
         return self._res_func(y_preds)
 
+    def set_prediction_cache(self, prediction_cache):
+        """
+        Put a cache in front of predict(), or remove it (None).
+
+        Parameters
+        ----------
+        prediction_cache: PredictionCache or None
+            The cache of the predictions of the rows, which is cleared when
+            the model is fitted again. See util_prediction_cache.
+        """
+        self._prediction_cache = prediction_cache
+
+    def predict_one(self, x, fuzzify=False):
+        """
+        Predict one sample, as fast as possible, e.g. to answer a single
+        request.
+
+        NB: The trees are walked on their nodes as plain Python tuples (see
+        FlatTree.to_tuples()), which are made on the first call, so that no
+        NumPy operation is done per node. For many samples, predict() is
+        faster.
+
+        Parameters
+        ----------
+        x: array-like of shape (n_features,)
+            The input sample.
+
+        fuzzify: bool, default=False
+            Set whether x holds the raw features, which are fuzzified with
+            the fuzzy sets saved in the fuzzification options (see
+            fuzzify_row()).
+
+        Returns
+        -------
+        y_pred: scalar
+            The predicted value, the same as predict() returns for x.
+        """
+        x = self._to_row(x, fuzzify)
+        y_preds = [predict_tuples(nodes, x if idxs is None else [x[j] for j in idxs])[1]
+                   for nodes, idxs in self._get_tree_tuples()]
+        return self._res_func(np.array([y_preds]))[0]
+
+    def apply(self, X):
+        """
+        Get the id of the leaf that each input sample ends up in, in each
+        tree, e.g. to use the leaves as features (a tree embedding) or as
+        cache keys. See BaseFuzzyDecisionTree.apply().
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+            The input samples.
+
+        Returns
+        -------
+        leaf_ids: ndarray of shape (n_samples, n_estimators)
+            The leaf id of each sample in each tree.
+        """
+        X = np.asarray(X)
+        return np.column_stack([flat_tree.apply(X if idxs is None else X[:, idxs])
+                                for flat_tree, idxs in self._get_flat_trees()])
+
+    def decision_path(self, X):
+        """
+        Get the nodes that each input sample goes through, in each tree.
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+            The input samples.
+
+        Returns
+        -------
+        indicator: scipy.sparse.csr_matrix of shape (n_samples, n_nodes)
+            indicator[i, j] is 1 if sample i goes through node j, where the
+            nodes of all the trees are numbered one tree after another.
+
+        n_nodes_ptr: ndarray of shape (n_trees + 1,)
+            The nodes of tree i are the columns
+            n_nodes_ptr[i]:n_nodes_ptr[i + 1] of indicator.
+        """
+        from scipy import sparse
+
+        X = np.asarray(X)
+        flat_trees = self._get_flat_trees()
+        indicators = [flat_tree.decision_path(X if idxs is None else X[:, idxs]) for flat_tree, idxs in flat_trees]
+        n_nodes_ptr = np.cumsum([0] + [flat_tree.n_nodes for flat_tree, _ in flat_trees])
+        return sparse.hstack(indicators, format="csr"), n_nodes_ptr
+
+    def predict_soft(self, X, softness=0.5, half_widths=None, min_weight=1e-3):
+        """
+        Predict results for X by soft (fuzzy) inference, i.e. the weight of
+        each sample flows into both branches of the splits near which it
+        lies, by its membership of each branch, and the outputs of the
+        leaves it reaches are blended by their weights (see
+        FlatTree.soft_apply()).
+
+        In classification, every tree votes for the classes by the
+        weights of the leaves each sample reaches.
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+            The input samples.
+
+        softness: float, default=0.5
+            The width of the soft regions below the split values relative
+            to the fuzzy sets of the features, see get_soft_half_widths().
+            0 makes the inference crisp, i.e. the same as predict().
+
+        half_widths: float or array-like of shape (n_features,), default=None
+            The half widths of the soft regions of the columns of X, which
+            are used instead of the ones derived from the fuzzy sets (e.g.
+            for a model without fuzzy sets).
+
+        min_weight: float, default=1e-3
+            The minimum weight of a branch to be followed. A larger value
+            prunes more branches, which makes the inference faster and
+            closer to the crisp one.
+
+        Returns
+        -------
+        y_pred: ndarray of shape (n_samples,)
+            The predicted values.
+        """
+        X = np.asarray(X)
+        if half_widths is None:
+            half_widths = get_soft_half_widths(X.shape[1], self.fuzzification_options, softness=softness)
+        half_widths = np.broadcast_to(np.asarray(half_widths, dtype=np.float64), (X.shape[1],))
+        flat_trees = self._get_flat_trees()
+        if self.is_regression:
+            y_preds = [flat_tree.predict_soft(X if idxs is None else X[:, idxs],
+                                              half_widths if idxs is None else half_widths[idxs], min_weight=min_weight)
+                       for flat_tree, idxs in flat_trees]
+            return np.mean(y_preds, axis=0)
+
+        # The soft majority vote: every tree votes for the classes by the weights of the leaves each sample reaches.
+        n_classes = max(flat_tree.get_n_classes() for flat_tree, _ in flat_trees)
+        votes = np.zeros((X.shape[0], n_classes))
+        for flat_tree, idxs in flat_trees:
+            votes += flat_tree.predict_soft_votes(X if idxs is None else X[:, idxs],
+                                                  half_widths if idxs is None else half_widths[idxs], n_classes,
+                                                  min_weight=min_weight)
+        return np.argmax(votes, axis=1)
+
+    def _get_flat_trees(self):
+        """
+        Get every tree as a FlatTree, and the columns the tree is fitted on
+        (or None).
+        """
+        if self._flat_forest is not None:
+            feature_idxs = self._flat_forest.feature_idxs
+            return [(self._flat_forest.get_tree(i), None if feature_idxs is None else feature_idxs[i])
+                    for i in range(self.n_estimators)]
+        return [(wrapper.estimator._get_flat_tree(), getattr(wrapper, "feature_idxs", None))
+                for wrapper in self._estimators[:self.n_estimators]]
+
+    def _get_tree_tuples(self):
+        """
+        Get the nodes of every tree as plain Python tuples, and the columns
+        the tree is fitted on (or None), see predict_one().
+        """
+        if self._tree_tuples is None:
+            self._tree_tuples = [(flat_tree.to_tuples(), None if idxs is None else np.asarray(idxs).tolist())
+                                 for flat_tree, idxs in self._get_flat_trees()]
+        return self._tree_tuples
+
+    def _to_row(self, x, fuzzify=False):
+        if fuzzify and self._fuzzy_set_table is None:
+            self._fuzzy_set_table = get_fuzzy_set_table(self.fuzzification_options)
+        return to_row(x, self._fuzzy_set_table if fuzzify else None)
+
+    def predict_chunks(self, X, chunk_size=DEFAULT_CHUNK_SIZE, fuzzify=False):
+        """
+        Predict results for X block by block, so that the memory used depends
+        on chunk_size instead of the number of samples, e.g. to score a file
+        that does not fit in memory.
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features), or iterable of such arrays
+            The input samples, e.g. a memory-mapped array or a generator of
+            blocks of rows, see iter_row_chunks().
+
+        chunk_size: int, default=DEFAULT_CHUNK_SIZE
+            The maximum number of samples predicted at once.
+
+        fuzzify: bool, default=False
+            Set whether X holds the raw features, which are fuzzified block
+            by block with the fuzzy sets (centroids and thetas) saved in the
+            fuzzification options, see fuzzify_features().
+
+        Yields
+        ------
+        y_pred_chunk: ndarray of shape (n_samples_chunk,)
+            The predicted values of each block, in the order of the samples.
+        """
+        return iter_predict_chunks(self.predict, X, chunk_size=chunk_size,
+                                   fuzzification_options=self.fuzzification_options if fuzzify else None)
+
 
 class FuzzyRDFClassifier(FuzzyRDF):
     """
@@ -284,15 +664,67 @@ class FuzzyRDFClassifier(FuzzyRDF):
         above this threshold, it will be split, otherwise it becomes a leaf node.
 
     max_features: int, default=None
-        The maximum threshold value of the qualified feature number in the
-        training dataset when training each fuzzy decision tree.
+        The number of features drawn at random (without replacement) at each
+        node of each tree, among which the best split of the node is
+        searched. If None, int(sqrt(n_features)) is used.
+        NB: Every tree is fitted on all the columns of its bootstrap sample,
+        so no columns are copied per tree.
 
     multi_process_options: MultiProcessOptions, default=None
         Protocol message class that encapsulates all the options of the
         multi-process settings.
 
+    max_leaf_nodes: int, default=None
+        The maximum number of leaf nodes of each tree. If set, the trees are
+        grown best-first, i.e. the node with the highest impurity gain is
+        always split next, which bounds the size and the prediction latency
+        of the forest. If None, the number of leaf nodes is unlimited.
+
+    splitter: {"best", "random"}, default="best"
+        The strategy used to choose the split of each node of each tree. If
+        "random", each tree only tries one random split value per feature,
+        drawn between the minimum and the maximum of the feature values at
+        the node, which makes an extremely randomised fuzzy forest. It is
+        much faster to fit, so that large forests (e.g. 10,000 trees) are
+        practical, and the randomness of the splits reduces the variance of
+        the forest.
+
+    oob_score: bool, default=False
+        Set whether to estimate the generalisation score of the forest on
+        the out-of-bag samples of each tree (the training samples that are
+        not drawn into its bootstrap subset) while fitting, so that no
+        separate validation pass is needed.
+
+    warm_start: bool, default=False
+        If True, fit() keeps the trees fitted by the previous call and only
+        fits the trees added by increasing n_estimators, e.g. to tune the
+        size of the forest at the cost of the marginal trees only.
+        Otherwise, all the trees are fitted from scratch.
+        NB: The same training data must be passed to every call.
+
+    track_memory: {"tracemalloc", "rss"}, default=None
+        Set whether to track the peak memory allocated in fit() and predict()
+        into memory_stats_. See MemoryTracker in util_profiler.
+        NB: In multi-process mode, only the memory of the main process is
+        tracked.
+
     Attributes
     ----------
+    oob_score_: float
+        The accuracy of the out-of-bag predictions of the training
+        samples. Only set if oob_score=True.
+
+    oob_prediction_: ndarray of shape (n_samples,)
+        The out-of-bag prediction of each training sample, i.e. the majority
+        class of the trees whose bootstrap subsets do not include it, or -1
+        if all the trees include it. Only set if oob_score=True.
+
+    memory_stats_: dict
+        The memory statistics of the forest if track_memory is set, otherwise
+        None. The keys are "mode", "fit_peak_bytes" and "predict_peak_bytes"
+        (the peak bytes allocated in the last call of each function) and
+        "model_bytes" (the footprint of the fitted forest itself).
+
     _estimators: ndarray of FuzzyDecisionTreeClassification
         The collection of sub-estimators as base learners.
 
@@ -304,7 +736,8 @@ class FuzzyRDFClassifier(FuzzyRDF):
 
     def __init__(self, disable_fuzzy, fuzzification_options, criterion_func, n_estimators=100,
                  max_depth=3, min_samples_split=2, min_impurity_split=1e-7, max_features=None,
-                 multi_process_options=None):
+                 multi_process_options=None, max_leaf_nodes=None, splitter="best", oob_score=False,
+                 warm_start=False, track_memory=None):
         super().__init__(disable_fuzzy=disable_fuzzy,
                          fuzzification_options=fuzzification_options,
                          criterion_func=criterion_func,
@@ -313,26 +746,37 @@ class FuzzyRDFClassifier(FuzzyRDF):
                          min_samples_split=min_samples_split,
                          min_impurity_split=min_impurity_split,
                          max_features=max_features,
-                         multi_process_options=multi_process_options)
+                         multi_process_options=multi_process_options,
+                         max_leaf_nodes=max_leaf_nodes,
+                         splitter=splitter,
+                         oob_score=oob_score,
+                         warm_start=warm_start,
+                         is_regression=False,
+                         track_memory=track_memory)
 
         # Initialise the forest.
         for _ in range(self.n_estimators):
-            estimator = FuzzyDecisionTreeWrapper(fdt_class=FuzzyCARTClassifier,
-                                                 disable_fuzzy=disable_fuzzy,
-                                                 fuzzification_options=fuzzification_options,
-                                                 criterion_func=criterion_func,
-                                                 max_depth=max_depth,
-                                                 min_samples_split=min_samples_split,
-                                                 min_impurity_split=min_impurity_split)
-            self._estimators.append(estimator)
+            self._estimators.append(self._make_estimator())
 
         # Specify to get the final classification result by majority voting method.
         self._res_func = majority_vote
 
-    def fit(self, X_train, y_train):
+    def _make_estimator(self):
+        return FuzzyDecisionTreeWrapper(fdt_class=FuzzyCARTClassifier,
+                                        disable_fuzzy=self.disable_fuzzy,
+                                        fuzzification_options=self.fuzzification_options,
+                                        criterion_func=self.criterion_func,
+                                        max_depth=self.max_depth,
+                                        min_samples_split=self.min_samples_split,
+                                        min_impurity_split=self.min_impurity_split,
+                                        max_leaf_nodes=self.max_leaf_nodes,
+                                        splitter=self.splitter,
+                                        max_features=self.max_features)
+
+    def fit(self, X_train, y_train, sample_weight=None):
         # Do some custom things.
 
-        super().fit(X_train=X_train, y_train=y_train)
+        super().fit(X_train=X_train, y_train=y_train, sample_weight=sample_weight)
 
 
 class FuzzyRDFRegressor(FuzzyRDF):
@@ -374,15 +818,67 @@ class FuzzyRDFRegressor(FuzzyRDF):
         above this threshold, it will be split, otherwise it becomes a leaf node.
 
     max_features: int, default=None
-        The maximum threshold value of the qualified feature number in the
-        training dataset when training each fuzzy decision tree.
+        The number of features drawn at random (without replacement) at each
+        node of each tree, among which the best split of the node is
+        searched. If None, int(sqrt(n_features)) is used.
+        NB: Every tree is fitted on all the columns of its bootstrap sample,
+        so no columns are copied per tree.
 
     multi_process_options: MultiProcessOptions, default=None
         Protocol message class that encapsulates all the options of the
         multi-process settings.
 
+    max_leaf_nodes: int, default=None
+        The maximum number of leaf nodes of each tree. If set, the trees are
+        grown best-first, i.e. the node with the highest impurity gain is
+        always split next, which bounds the size and the prediction latency
+        of the forest. If None, the number of leaf nodes is unlimited.
+
+    splitter: {"best", "random"}, default="best"
+        The strategy used to choose the split of each node of each tree. If
+        "random", each tree only tries one random split value per feature,
+        drawn between the minimum and the maximum of the feature values at
+        the node, which makes an extremely randomised fuzzy forest. It is
+        much faster to fit, so that large forests (e.g. 10,000 trees) are
+        practical, and the randomness of the splits reduces the variance of
+        the forest.
+
+    oob_score: bool, default=False
+        Set whether to estimate the generalisation score of the forest on
+        the out-of-bag samples of each tree (the training samples that are
+        not drawn into its bootstrap subset) while fitting, so that no
+        separate validation pass is needed.
+
+    warm_start: bool, default=False
+        If True, fit() keeps the trees fitted by the previous call and only
+        fits the trees added by increasing n_estimators, e.g. to tune the
+        size of the forest at the cost of the marginal trees only.
+        Otherwise, all the trees are fitted from scratch.
+        NB: The same training data must be passed to every call.
+
+    track_memory: {"tracemalloc", "rss"}, default=None
+        Set whether to track the peak memory allocated in fit() and predict()
+        into memory_stats_. See MemoryTracker in util_profiler.
+        NB: In multi-process mode, only the memory of the main process is
+        tracked.
+
     Attributes
     ----------
+    oob_score_: float
+        The coefficient of determination (R^2) of the out-of-bag predictions
+        of the training samples. Only set if oob_score=True.
+
+    oob_prediction_: ndarray of shape (n_samples,) or (n_samples, n_outputs)
+        The out-of-bag prediction of each training sample, i.e. the mean
+        prediction of the trees whose bootstrap subsets do not include it, or
+        NaN if all the trees include it. Only set if oob_score=True.
+
+    memory_stats_: dict
+        The memory statistics of the forest if track_memory is set, otherwise
+        None. The keys are "mode", "fit_peak_bytes" and "predict_peak_bytes"
+        (the peak bytes allocated in the last call of each function) and
+        "model_bytes" (the footprint of the fitted forest itself).
+
     _estimators: ndarray of FuzzyDecisionTreeRegressor
         The collection of sub-estimators as base learners.
 
@@ -394,7 +890,8 @@ class FuzzyRDFRegressor(FuzzyRDF):
 
     def __init__(self, disable_fuzzy, fuzzification_options, criterion_func, n_estimators=100,
                  max_depth=3, min_samples_split=2, min_impurity_split=1e-7, max_features=None,
-                 multi_process_options=None):
+                 multi_process_options=None, max_leaf_nodes=None, splitter="best", oob_score=False,
+                 warm_start=False, track_memory=None):
         super().__init__(disable_fuzzy=disable_fuzzy,
                          fuzzification_options=fuzzification_options,
                          criterion_func=criterion_func,
@@ -403,23 +900,34 @@ class FuzzyRDFRegressor(FuzzyRDF):
                          min_samples_split=min_samples_split,
                          min_impurity_split=min_impurity_split,
                          max_features=max_features,
-                         multi_process_options=multi_process_options)
+                         multi_process_options=multi_process_options,
+                         max_leaf_nodes=max_leaf_nodes,
+                         splitter=splitter,
+                         oob_score=oob_score,
+                         warm_start=warm_start,
+                         is_regression=True,
+                         track_memory=track_memory)
 
         # Initialise forest.
         for _ in range(self.n_estimators):
-            estimator = FuzzyDecisionTreeWrapper(fdt_class=FuzzyCARTRegressor,
-                                                 disable_fuzzy=disable_fuzzy,
-                                                 fuzzification_options=fuzzification_options,
-                                                 criterion_func=criterion_func,
-                                                 max_depth=max_depth,
-                                                 min_samples_split=min_samples_split,
-                                                 min_impurity_split=min_impurity_split)
-            self._estimators.append(estimator)
+            self._estimators.append(self._make_estimator())
 
         # Specify to get the final regression result by averaging method.
         self._res_func = mean_value
 
-    def fit(self, X_train, y_train):
+    def _make_estimator(self):
+        return FuzzyDecisionTreeWrapper(fdt_class=FuzzyCARTRegressor,
+                                        disable_fuzzy=self.disable_fuzzy,
+                                        fuzzification_options=self.fuzzification_options,
+                                        criterion_func=self.criterion_func,
+                                        max_depth=self.max_depth,
+                                        min_samples_split=self.min_samples_split,
+                                        min_impurity_split=self.min_impurity_split,
+                                        max_leaf_nodes=self.max_leaf_nodes,
+                                        splitter=self.splitter,
+                                        max_features=self.max_features)
+
+    def fit(self, X_train, y_train, sample_weight=None):
         # Do some custom things.
 
-        super().fit(X_train=X_train, y_train=y_train)
+        super().fit(X_train=X_train, y_train=y_train, sample_weight=sample_weight)
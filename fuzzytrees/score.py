@@ -0,0 +1,361 @@
+"""
+@author: Zhaoqing Liu
+@email : Zhaoqing.Liu-1@student.uts.edu.au
+@date  : 19/10/26 10:00 pm
+@desc  : Batch scoring of large files with a saved fuzzy model.
+
+    Load a model saved by util_model_io.save_model(), stream an input file
+    through it in chunks of rows, and append the predictions of each chunk
+    to an output file as soon as they are ready, so that the memory used
+    depends on the chunk size instead of the size of the file.
+
+    Input files: CSV (.csv), Parquet (.parquet, needs pyarrow) or a NumPy
+    array (.npy, memory-mapped). Output files: CSV or Parquet.
+
+    If the model is a fuzzy model saved with the fuzzy sets of its
+    features (the centroids and the thetas in its fuzzification options),
+    the input holds the raw features and each chunk is fuzzified with
+    those fuzzy sets before it is predicted. Use --no-fuzzify if the input
+    already holds the degree of membership columns.
+
+    The chunks can be predicted by a pool of worker processes (each one
+    memory-maps the same model file, so the trees are shared) or threads,
+    while the main process reads the next chunks and writes the results in
+    the order of the input rows.
+
+Usage:
+    $ python -m fuzzytrees.score model.fzt input.csv output.csv --chunk-size 100000 --workers 4
+    $ python -m fuzzytrees.score model.fzt input.parquet output.parquet --id-column id --proba
+"""
+import argparse
+import collections
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from fuzzytrees.fdt_flat import LEAF
+from fuzzytrees.util_data_processing_funcs import DEFAULT_CHUNK_SIZE, fuzzify_features, iter_row_chunks
+from fuzzytrees.util_model_io import load_model
+
+INPUT_FORMATS = ["csv", "parquet", "npy"]
+OUTPUT_FORMATS = ["csv", "parquet"]
+BACKENDS = ["process", "thread"]
+
+# The model (and its scoring options) used by the current process, see _init_worker().
+_scorer = None
+
+
+# =============================================================================
+# Scoring
+# =============================================================================
+
+class ChunkScorer:
+    """
+    Predict chunks of rows with a loaded model.
+
+    Parameters
+    ----------
+    model_path: str
+        The path of the model file, which is memory-mapped read-only.
+
+    proba: bool, default=False
+        Set whether to predict the probabilities of the target values
+        instead of the target values. Only for single trees.
+
+    fuzzify: bool, default=None
+        Set whether to fuzzify each chunk with the fuzzy sets saved with the
+        model. If None, the chunks are fuzzified if the model is a fuzzy
+        model saved with its fuzzy sets.
+    """
+
+    def __init__(self, model_path, proba=False, fuzzify=None):
+        # NB: Ensembles are loaded as one shared flat forest, so that workers share the pages of the trees.
+        self.model = load_model(model_path, mmap_mode="r", shared=True)
+        if proba and not hasattr(self.model, "predict_proba"):
+            raise ValueError("{} cannot predict probabilities.".format(type(self.model).__name__))
+        self.proba = proba
+
+        fuzzification_options = getattr(self.model, "fuzzification_options", None)
+        has_fuzzy_sets = fuzzification_options is not None and fuzzification_options.centroids is not None
+        if fuzzify is None:
+            fuzzify = has_fuzzy_sets and not self.model.disable_fuzzy
+        elif fuzzify and not has_fuzzy_sets:
+            raise ValueError("The model is saved without the fuzzy sets of its features, so the input cannot be "
+                             "fuzzified. Fuzzify the input beforehand and use --no-fuzzify.")
+        self.fuzzification_options = fuzzification_options if fuzzify else None
+
+        # The number of columns of the rows, if it is known from the fuzzy sets, and the least number of columns
+        # the trees split on otherwise.
+        self.n_features = None
+        if fuzzify:
+            self.n_features = np.shape(fuzzification_options.centroids)[0]
+        elif has_fuzzy_sets and not self.model.disable_fuzzy:
+            # NB: The rows hold the raw features followed by their degree of membership columns.
+            self.n_features = np.shape(fuzzification_options.centroids)[0] + np.size(fuzzification_options.centroids)
+        self.min_n_features = _get_min_n_features(self.model)
+
+    def check_n_features(self, n_features):
+        """
+        Check that rows of n_features columns can be predicted by the model,
+        raising a ValueError otherwise.
+        """
+        if self.n_features is not None and n_features != self.n_features:
+            raise ValueError("The rows have {} features, but the model expects {}.".format(n_features,
+                                                                                         self.n_features))
+        if n_features < self.min_n_features:
+            raise ValueError("The rows have {} features, but the model expects at least {}.".format(
+                n_features, self.min_n_features))
+
+    def score(self, X_chunk):
+        """
+        Predict a chunk of rows, as an array of shape (n_rows,) or
+        (n_rows, n_outputs).
+        """
+        self.check_n_features(np.shape(X_chunk)[1])
+        if self.fuzzification_options is not None:
+            X_chunk = fuzzify_features(X_chunk, self.fuzzification_options)
+        y_pred = self.model.predict_proba(X_chunk) if self.proba else self.model.predict(X_chunk)
+        return np.asarray(y_pred)
+
+
+def _get_min_n_features(model):
+    """
+    Get the least number of columns of the rows a model can predict, i.e.
+    1 + the largest column index its trees split on.
+    """
+    if hasattr(model, "_get_flat_trees"):
+        flat_trees = model._get_flat_trees()
+    else:
+        flat_trees = [(getattr(model, "estimator", model)._get_flat_tree(), None)]
+
+    min_n_features = 0
+    for flat_tree, idxs in flat_trees:
+        # NB: The trees fitted on selected features split on the columns of idxs.
+        columns = flat_tree.feature[flat_tree.feature != LEAF] if idxs is None else np.asarray(idxs)
+        if len(columns) > 0:
+            min_n_features = max(min_n_features, int(np.max(columns)) + 1)
+    return min_n_features
+
+
+def _init_worker(model_path, proba, fuzzify):
+    global _scorer
+    _scorer = ChunkScorer(model_path, proba=proba, fuzzify=fuzzify)
+
+
+def _score_chunk(X_chunk):
+    return _scorer.score(X_chunk)
+
+
+# =============================================================================
+# Readers and writers
+# =============================================================================
+
+def _get_format(path, formats):
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension not in formats:
+        raise ValueError("Cannot tell the format of {} from its extension, use one of {}.".format(path, formats))
+    return extension
+
+
+def iter_input_chunks(path, chunk_size, columns=None, id_column=None, input_format=None):
+    """
+    Read an input file in chunks of rows.
+
+    Yields
+    ------
+    (X_chunk, ids): ndarray of shape (n_rows, n_features), ndarray of shape (n_rows,) or None
+        The feature values of the rows, and the values of the id column of
+        the rows if id_column is set.
+    """
+    input_format = input_format or _get_format(path, INPUT_FORMATS)
+    if input_format == "npy":
+        if columns is not None or id_column is not None:
+            raise ValueError("Columns can only be selected by name in CSV and Parquet files.")
+        # NB: Only the pages of the current chunk are read into memory.
+        for X_chunk in iter_row_chunks(np.load(path, mmap_mode="r"), chunk_size=chunk_size):
+            yield np.asarray(X_chunk, dtype=float), None
+        return
+
+    if input_format == "csv":
+        import pandas as pd
+
+        # NB: The values are parsed exactly, so that values at a split value are not shifted to the other side.
+        dfs = pd.read_csv(path, chunksize=chunk_size, float_precision="round_trip")
+    else:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet files requires pyarrow, e.g. pip install pyarrow.")
+
+        dfs = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size))
+
+    for df in dfs:
+        ids = df[id_column].to_numpy() if id_column is not None else None
+        if columns is not None:
+            df = df[columns]
+        elif id_column is not None:
+            df = df.drop(columns=[id_column])
+        yield df.to_numpy(dtype=float), ids
+
+
+class OutputWriter:
+    """
+    Append the predictions of the chunks to a CSV or Parquet file.
+    """
+
+    def __init__(self, path, output_format=None, id_column=None, prefix="prediction"):
+        self.path = path
+        self.output_format = output_format or _get_format(path, OUTPUT_FORMATS)
+        self.id_column = id_column
+        self.prefix = prefix
+        self._parquet_writer = None
+        self._has_header = False
+
+    def write(self, y_pred, ids=None):
+        import pandas as pd
+
+        if y_pred.ndim == 1:
+            df = pd.DataFrame({self.prefix: y_pred})
+        else:
+            df = pd.DataFrame(y_pred.reshape(len(y_pred), -1))
+            df.columns = ["{}_{}".format(self.prefix, i) for i in range(df.shape[1])]
+        if ids is not None:
+            df.insert(0, self.id_column, ids)
+
+        if self.output_format == "csv":
+            df.to_csv(self.path, mode="a" if self._has_header else "w", header=not self._has_header, index=False)
+            self._has_header = True
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        self._parquet_writer.write_table(table)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+
+# =============================================================================
+# Command line
+# =============================================================================
+
+def score_file(model_path, input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, n_workers=1, backend="process",
+               proba=False, fuzzify=None, columns=None, id_column=None, log_every=10, log_file=sys.stderr):
+    """
+    Score an input file with a saved model, writing the predictions to an
+    output file in the order of the input rows.
+
+    NB: At most 2 * n_workers chunks are read ahead of the chunk being
+    written, which bounds the memory used.
+
+    Returns
+    -------
+    n_rows: int
+        The number of rows scored.
+    """
+    if backend not in BACKENDS:
+        raise ValueError("backend must be one of {}, got {!r}".format(BACKENDS, backend))
+
+    # Fail early on a bad model or options, before starting any worker.
+    global _scorer
+    _scorer = ChunkScorer(model_path, proba=proba, fuzzify=fuzzify)
+    writer = OutputWriter(output_path, id_column=id_column, prefix="proba" if proba else "prediction")
+
+    if n_workers <= 1:
+        executor = None
+    elif backend == "thread":
+        executor = ThreadPoolExecutor(max_workers=n_workers)
+    else:
+        executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                       initargs=(model_path, proba, fuzzify))
+
+    pending = collections.deque()
+    n_rows = 0
+    n_chunks = 0
+    time_start = time.perf_counter()
+
+    def write(y_pred, ids):
+        nonlocal n_rows, n_chunks
+        writer.write(y_pred, ids)
+        n_rows += len(y_pred)
+        n_chunks += 1
+        if log_every and n_chunks % log_every == 0:
+            elapsed = time.perf_counter() - time_start
+            print("{} rows scored in {:.1f}s ({:.0f} rows/s)".format(n_rows, elapsed, n_rows / elapsed),
+                  file=log_file)
+
+    try:
+        chunks = iter_input_chunks(input_path, chunk_size, columns=columns, id_column=id_column)
+        if executor is None:
+            for X_chunk, ids in chunks:
+                write(_scorer.score(X_chunk), ids)
+        else:
+            for X_chunk, ids in chunks:
+                pending.append((executor.submit(_score_chunk, X_chunk), ids))
+                if len(pending) >= 2 * n_workers:
+                    future, ids = pending.popleft()
+                    write(future.result(), ids)
+            while pending:
+                future, ids = pending.popleft()
+                write(future.result(), ids)
+    finally:
+        writer.close()
+        if executor is not None:
+            for future, _ in pending:
+                future.cancel()
+            executor.shutdown()
+
+    elapsed = time.perf_counter() - time_start
+    print("Done: {} rows in {} chunks scored in {:.2f}s ({:.0f} rows/s)".format(
+        n_rows, n_chunks, elapsed, n_rows / elapsed if elapsed > 0 else float("inf")), file=log_file)
+    return n_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m fuzzytrees.score",
+                                     description="Stream an input file through a saved fuzzytrees model.")
+    parser.add_argument("model", help="the model file saved by fuzzytrees.util_model_io.save_model()")
+    parser.add_argument("input", help="the input file ({})".format(", ".join(INPUT_FORMATS)))
+    parser.add_argument("output", help="the output file ({})".format(", ".join(OUTPUT_FORMATS)))
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="the number of rows predicted at once (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="the number of workers predicting chunks in parallel (default: %(default)s)")
+    parser.add_argument("--backend", choices=BACKENDS, default="process",
+                        help="the kind of the workers (default: %(default)s)")
+    parser.add_argument("--proba", action="store_true",
+                        help="predict the probabilities of the target values (single trees only)")
+    parser.add_argument("--columns", help="the comma-separated names of the feature columns, in the order the "
+                                          "model is fitted on (default: all the columns but the id column)")
+    parser.add_argument("--id-column", help="a column copied from the input rows to the output rows")
+    fuzzify = parser.add_mutually_exclusive_group()
+    fuzzify.add_argument("--fuzzify", dest="fuzzify", action="store_true", default=None,
+                         help="fuzzify the input with the fuzzy sets saved with the model (default: if the model "
+                              "is a fuzzy model saved with its fuzzy sets)")
+    fuzzify.add_argument("--no-fuzzify", dest="fuzzify", action="store_false",
+                         help="use the input as it is, e.g. if it already holds the degree of membership columns")
+    parser.add_argument("--log-every", type=int, default=10,
+                        help="report the throughput every this many chunks, 0 to only report at the end "
+                             "(default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        score_file(args.model, args.input, args.output, chunk_size=args.chunk_size, n_workers=args.workers,
+                   backend=args.backend, proba=args.proba, fuzzify=args.fuzzify,
+                   columns=args.columns.split(",") if args.columns else None, id_column=args.id_column,
+                   log_every=args.log_every)
+    except (ValueError, ImportError) as e:
+        parser.exit(2, "{}: error: {}\n".format(parser.prog, e))
+
+
+if __name__ == '__main__':
+    main()
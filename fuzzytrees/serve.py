@@ -0,0 +1,405 @@
+"""
+@author: Zhaoqing Liu
+@email : Zhaoqing.Liu-1@student.uts.edu.au
+@date  : 19/10/26 11:00 pm
+@desc  : Local HTTP inference server with micro-batching.
+
+    Load a model saved by util_model_io.save_model() once and serve it over
+    HTTP with asyncio (standard library only). Concurrent requests are not
+    predicted one by one: their rows are queued and coalesced into
+    micro-batches of at most --max-batch-size rows, waiting at most
+    --max-wait-ms for a batch to fill. Each batch is predicted by the
+    vectorised predict() of the model in a thread pool, off the event loop,
+    so that the server keeps accepting requests while it predicts.
+
+    Endpoints:
+        - POST /predict: {"instances": [[...], ...]} (or one row as
+          {"instance": [...]}) -> {"predictions": [...]}. The rows hold the
+          raw features, fuzzified with the fuzzy sets saved with the model
+          (see score.ChunkScorer).
+        - GET /metrics: the latency histograms of the requests and of the
+          batch predictions, the histogram of the batch sizes, and the
+          statistics of the prediction cache (with --cache-size).
+        - GET /health: {"status": "ok"}.
+
+Usage:
+    $ python -m fuzzytrees.serve model.fzt --port 8080 --max-batch-size 256 --max-wait-ms 2
+    $ curl -d '{"instances": [[0.1, 0.2, 0.3]]}' http://127.0.0.1:8080/predict
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+
+from fuzzytrees.score import ChunkScorer
+from fuzzytrees.util_prediction_cache import PredictionCache
+
+# The upper bounds (in seconds) of the buckets of the latency histograms, from 0.1 ms to 10 s.
+LATENCY_BUCKETS = [1e-4 * 10 ** (i / 4) for i in range(21)]
+# The upper bounds of the buckets of the batch size histogram.
+BATCH_SIZE_BUCKETS = [2 ** i for i in range(13)]
+
+# The maximum size of a request body.
+MAX_BODY_BYTES = 64 * 2 ** 20
+
+
+# =============================================================================
+# Metrics
+# =============================================================================
+
+class Histogram:
+    """
+    A histogram of observed values with fixed bucket bounds, as in
+    Prometheus, from which approximate percentiles can be read.
+
+    Parameters
+    ----------
+    bounds: list of float
+        The ascending upper bounds of the buckets. Values above the last
+        bound are counted in an overflow bucket.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.
+        self.max = 0.
+
+    def observe(self, value):
+        self.counts[int(np.searchsorted(self.bounds, value, side="left"))] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def get_percentile(self, q):
+        """
+        Get the upper bound of the bucket the q-th percentile (q in [0, 100])
+        falls in, i.e. an upper estimate of it, capped at the maximum.
+        """
+        if self.count == 0:
+            return None
+        rank = q / 100. * self.count
+        cum_count = 0
+        for i, count in enumerate(self.counts):
+            cum_count += count
+            if cum_count >= rank and count > 0:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {"count": self.count,
+                "mean": self.sum / self.count if self.count else None,
+                "max": self.max,
+                "p50": self.get_percentile(50),
+                "p90": self.get_percentile(90),
+                "p99": self.get_percentile(99),
+                "buckets": [{"le": bound, "count": count} for bound, count in zip(self.bounds, self.counts)]
+                + [{"le": "inf", "count": self.counts[-1]}]}
+
+
+# =============================================================================
+# Micro-batching
+# =============================================================================
+
+class MicroBatcher:
+    """
+    Coalesce the rows predicted concurrently into micro-batches.
+
+    Parameters
+    ----------
+    scorer: ChunkScorer
+        The loaded model, whose score() predicts a batch of rows.
+
+    max_batch_size: int, default=256
+        The maximum number of rows of a batch.
+
+    max_wait_ms: float, default=2.0
+        The maximum time a batch waits for more rows after its first row
+        is queued, i.e. the latency added to a request when the server is
+        not busy.
+
+    n_threads: int, default=1
+        The number of threads predicting batches. The batches wait for a
+        free thread, so more rows are coalesced when the server is busy.
+    """
+
+    def __init__(self, scorer, max_batch_size=256, max_wait_ms=2.0, n_threads=1):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1, got {}".format(max_batch_size))
+        self.scorer = scorer
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.
+        self.n_threads = n_threads
+        self.batch_size_hist = Histogram(BATCH_SIZE_BUCKETS)
+        self.batch_latency_hist = Histogram(LATENCY_BUCKETS)
+        self._queue = None
+        self._executor = None
+        self._slots = None
+        self._task = None
+        self._batch_tasks = set()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.n_threads)
+        self._slots = asyncio.Semaphore(self.n_threads)
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown()
+
+    async def predict(self, X):
+        """
+        Predict some rows, together with the rows of other requests.
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        for x in X:
+            future = loop.create_future()
+            self._queue.put_nowait((x, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # NB: Wait for a free thread first, so that the rows queued in the meantime join the next batch.
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # NB: The tasks are referenced until they are done, so that they are not garbage collected.
+            task = asyncio.ensure_future(self._predict_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _predict_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        time_start = time.perf_counter()
+        try:
+            # NB: Rows of different lengths (i.e. bad requests) are predicted apart, so they only fail themselves.
+            groups = {}
+            for x, future in batch:
+                groups.setdefault(len(x), []).append((x, future))
+            for group in groups.values():
+                try:
+                    y_pred = await loop.run_in_executor(self._executor, self.scorer.score,
+                                                        np.array([x for x, _ in group], dtype=float))
+                except Exception as e:
+                    for _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, future), y in zip(group, y_pred):
+                    if not future.done():
+                        future.set_result(y.tolist())
+        finally:
+            self._slots.release()
+        self.batch_size_hist.observe(len(batch))
+        self.batch_latency_hist.observe(time.perf_counter() - time_start)
+
+
+# =============================================================================
+# HTTP server
+# =============================================================================
+
+class InferenceServer:
+    """
+    A minimal HTTP/1.1 server (with keep-alive) in front of a MicroBatcher.
+
+    Parameters
+    ----------
+    batcher: MicroBatcher
+        The micro-batcher of the loaded model.
+
+    host, port: str, int
+        The address to listen on.
+
+    prediction_cache: PredictionCache, default=None
+        The cache in front of the predict() of the model, if any, whose
+        statistics are reported in the metrics.
+    """
+
+    def __init__(self, batcher, host="127.0.0.1", port=8080, prediction_cache=None):
+        self.batcher = batcher
+        self.host = host
+        self.port = port
+        self.prediction_cache = prediction_cache
+        self.request_latency_hist = Histogram(LATENCY_BUCKETS)
+        self.n_errors = 0
+        self._server = None
+
+    async def start(self):
+        await self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # NB: With port=0, the port is chosen by the OS.
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self):
+        await self.start()
+        print("Serving {} on http://{}:{}".format(type(self.batcher.scorer.model).__name__, self.host, self.port))
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+    def get_metrics(self):
+        metrics = {"request_latency_s": self.request_latency_hist.to_dict(),
+                   "batch_latency_s": self.batcher.batch_latency_hist.to_dict(),
+                   "batch_size": self.batcher.batch_size_hist.to_dict(),
+                   "n_errors": self.n_errors}
+        if self.prediction_cache is not None:
+            metrics["prediction_cache"] = self.prediction_cache.get_stats()
+        return metrics
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, response = await self._route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # NB: Malformed requests (e.g. a bad request line) close the connection.
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        content_length = int(headers.get("content-length", 0))
+        if content_length > MAX_BODY_BYTES:
+            raise ConnectionError("The request body is too large.")
+        body = await reader.readexactly(content_length) if content_length else b""
+        return method, path, headers, body
+
+    async def _route(self, method, path, body):
+        if path == "/predict" and method == "POST":
+            return await self._predict(body)
+        if path == "/metrics" and method == "GET":
+            return HTTPStatus.OK, self.get_metrics()
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, {"status": "ok"}
+        return HTTPStatus.NOT_FOUND, {"error": "Not found: {} {}".format(method, path)}
+
+    async def _predict(self, body):
+        time_start = time.perf_counter()
+        try:
+            payload = json.loads(body)
+            X = payload["instances"] if "instances" in payload else [payload["instance"]]
+            X = np.asarray(X, dtype=float)
+            if X.ndim != 2 or len(X) == 0:
+                raise ValueError("instances must be a non-empty list of rows of the same length.")
+            self.batcher.scorer.check_n_features(X.shape[1])
+        except (ValueError, KeyError, TypeError) as e:
+            self.n_errors += 1
+            return HTTPStatus.BAD_REQUEST, {"error": "Bad request: {}".format(e)}
+        try:
+            y_pred = await self.batcher.predict(X)
+        except Exception as e:
+            self.n_errors += 1
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "{}: {}".format(type(e).__name__, e)}
+        self.request_latency_hist.observe(time.perf_counter() - time_start)
+        return HTTPStatus.OK, {"predictions": y_pred}
+
+    @staticmethod
+    def _write_response(writer, status, response, keep_alive):
+        body = json.dumps(response).encode("utf-8")
+        writer.write("HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n"
+                     "Connection: {}\r\n\r\n".format(status.value, status.phrase, len(body),
+                                                     "keep-alive" if keep_alive else "close").encode("latin-1"))
+        writer.write(body)
+
+
+# =============================================================================
+# Command line
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m fuzzytrees.serve",
+                                     description="Serve a saved fuzzytrees model over HTTP with micro-batching.")
+    parser.add_argument("model", help="the model file saved by fuzzytrees.util_model_io.save_model()")
+    parser.add_argument("--host", default="127.0.0.1", help="the address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8080, help="the port to listen on (default: %(default)s)")
+    parser.add_argument("--max-batch-size", type=int, default=256,
+                        help="the maximum number of rows predicted at once (default: %(default)s)")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0,
+                        help="the maximum time a batch waits for more rows (default: %(default)s)")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="the number of threads predicting batches (default: %(default)s)")
+    parser.add_argument("--proba", action="store_true",
+                        help="predict the probabilities of the target values (single trees only)")
+    fuzzify = parser.add_mutually_exclusive_group()
+    fuzzify.add_argument("--fuzzify", dest="fuzzify", action="store_true", default=None,
+                         help="fuzzify the rows with the fuzzy sets saved with the model (default: if the model "
+                              "is a fuzzy model saved with its fuzzy sets)")
+    fuzzify.add_argument("--no-fuzzify", dest="fuzzify", action="store_false",
+                         help="use the rows as they are, e.g. if they already hold the degree of membership columns")
+    parser.add_argument("--cache-size", type=int, default=0,
+                        help="the number of rows whose predictions are cached, for traffic with repeated rows, "
+                             "0 for no cache (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        scorer = ChunkScorer(args.model, proba=args.proba, fuzzify=args.fuzzify)
+    except ValueError as e:
+        parser.exit(2, "{}: error: {}\n".format(parser.prog, e))
+    prediction_cache = None
+    if args.cache_size > 0:
+        if args.proba:
+            parser.exit(2, "{}: error: --cache-size only caches predictions, not probabilities\n".format(parser.prog))
+        # NB: The rows are cached after fuzzification, i.e. keyed by the rows the model predicts.
+        prediction_cache = PredictionCache(max_size=args.cache_size)
+        scorer.model.set_prediction_cache(prediction_cache)
+    batcher = MicroBatcher(scorer, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+                           n_threads=args.threads)
+    try:
+        asyncio.run(InferenceServer(batcher, host=args.host, port=args.port,
+                                    prediction_cache=prediction_cache).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -42,45 +42,64 @@ class EvaluationType(Enum):
 
 
 # File paths to save evaluation data, graphs, serialised models.
+# NB: The paths are relative, so they are resolved against the current working
+# directory when the files are written rather than when this module is imported.
 class DirSave(Enum):
-    EVAL_DATA = os.getcwd() + "/fuzzy_trees_v001/data_gen/eval_data/"
-    EVAL_FIGURES = os.getcwd() + "/fuzzy_trees_v001/data_gen/eval_figures/"
-    MODELS = os.getcwd() + "/fuzzy_trees_v001/data_gen/pkl_models/"
+    EVAL_DATA = "fuzzy_trees_v001/data_gen/eval_data/"
+    EVAL_FIGURES = "fuzzy_trees_v001/data_gen/eval_figures/"
+    MODELS = "fuzzy_trees_v001/data_gen/pkl_models/"
 
 
 # Number of a group of models when pretraining.
 NUM_GRP_MDLS = 10
 
 
-# Output all of the above preset experiment configuration information before the experiment starts.
-# =================================================================================================
-print("=" * 100)
+def ensure_dir_save():
+    """
+    Ensure the directories for saving files exist.
 
-print("{:^100}".format("Environment Configuration Information"))
+    NB: Call this function right before writing any files into the directories
+    specified in DirSave, instead of when importing modules or constructing
+    estimators.
+    """
+    for item in DirSave:
+        if not os.path.exists(item.value):
+            os.makedirs(item.value)
 
-print("Number of CPU cores available:")
-print("{:>100}".format(NUM_CPU_CORES_AVAL))
 
-print("Number of CPU cores currently requested:")
-print("{:>100}".format(NUM_CPU_CORES_REQ))
+def print_env_config():
+    """
+    Output all of the above preset experiment configuration information.
 
-print("(S1 EXP) Comparison experiments include:")
-for name, item in ComparisionMode.__members__.items():
-    print("{:>100}".format(name + " -- " + item.value))
+    NB: Call this function before the experiment starts. Nothing is printed
+    when this module is only imported.
+    """
+    print("=" * 100)
 
-print("(S2 EXP) experiments include:")
-for name, item in EvaluationType.__members__.items():
-    print("{:>100}".format(name + " -- " + item.value))
+    print("{:^100}".format("Environment Configuration Information"))
 
-print("(S2 EXP) Current path:")
-print("{:>100}".format(os.getcwd()))
+    print("Number of CPU cores available:")
+    print("{:>100}".format(NUM_CPU_CORES_AVAL))
 
-print("(S2 EXP) Path to save generated files:")
-for _, item in DirSave.__members__.items():
-    print("{:>100}".format(item.value))
+    print("Number of CPU cores currently requested:")
+    print("{:>100}".format(NUM_CPU_CORES_REQ))
 
-print("=" * 100)
-# =================================================================================================
+    print("(S1 EXP) Comparison experiments include:")
+    for name, item in ComparisionMode.__members__.items():
+        print("{:>100}".format(name + " -- " + item.value))
+
+    print("(S2 EXP) experiments include:")
+    for name, item in EvaluationType.__members__.items():
+        print("{:>100}".format(name + " -- " + item.value))
+
+    print("(S2 EXP) Current path:")
+    print("{:>100}".format(os.getcwd()))
+
+    print("(S2 EXP) Path to save generated files:")
+    for _, item in DirSave.__members__.items():
+        print("{:>100}".format(os.path.abspath(item.value) + "/"))
+
+    print("=" * 100)
 
 
 # =============================================================================
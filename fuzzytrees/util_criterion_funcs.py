@@ -73,14 +73,22 @@ import numpy as np
 
 
 # For fuzzy decision trees
-def calculate_entropy(y, dm=None):
+def calculate_entropy(y, dm=None, sample_weight=None):
     """
     Calculate the entropy of y.
+
+    NB: If sample_weight is given, each sample counts as much as its weight,
+    and its degrees of membership dm are multiplied by its weight.
     """
     entropy = 0
 
     log2 = lambda x: math.log(x) / math.log(2)
 
+    if sample_weight is not None:
+        for p in _get_weighted_label_proba(y, dm, sample_weight):
+            entropy += -p * log2(p)
+        return entropy
+
     unique_labels = np.unique(y)
     for label in unique_labels:
         if dm is not None:
@@ -98,10 +106,17 @@ def calculate_entropy(y, dm=None):
 
 
 # For fuzzy decision trees
-def calculate_gini(y, dm=None):
+def calculate_gini(y, dm=None, sample_weight=None):
     """
     Calculate the Gini impurity of y.
+
+    NB: If sample_weight is given, each sample counts as much as its weight,
+    and its degrees of membership dm are multiplied by its weight.
     """
+    if sample_weight is not None:
+        p = _get_weighted_label_proba(y, dm, sample_weight)
+        return np.sum(p * (1 - p))
+
     # Implementation based on the 1st Formula:
     # diff = 0
     # unique_labels = np.unique(y)
@@ -130,11 +145,43 @@ def calculate_gini(y, dm=None):
     return gini
 
 
-def calculate_impurity_gain(y, sub_y_1, sub_y_2, criterion_func, p_subset_true_dm=None, p_subset_false_dm=None):
+def _get_weighted_label_proba(y, dm, sample_weight):
+    """
+    Get the weighted proportion of each label of y, where each sample counts
+    as its weight, or as its weight times the sum of its degrees of
+    membership dm. Labels of zero proportion are left out.
+    """
+    sample_weight = np.ravel(sample_weight)
+    if dm is not None:
+        sample_weight = sample_weight * np.sum(np.reshape(dm, (len(sample_weight), -1)), axis=1)
+    _, label_idxs = np.unique(np.ravel(y), return_inverse=True)
+    label_weights = np.bincount(np.ravel(label_idxs), weights=sample_weight)
+    p = label_weights / np.sum(sample_weight)
+    return p[p > 0]
+
+
+def calculate_impurity_gain(y, sub_y_1, sub_y_2, criterion_func, p_subset_true_dm=None, p_subset_false_dm=None,
+                            sample_weight=None, sub_sample_weight_1=None, sub_sample_weight_2=None):
     """
     Calculate the impurity gain, which is equal to the
     impurity of y minus the entropy of sub_y_1 and sub_y_2.
-    """
+
+    NB: If sample_weight (the weights of y) is given, sub_sample_weight_1 and
+    sub_sample_weight_2 (the weights of sub_y_1 and sub_y_2) must be given
+    too, and criterion_func must accept sample_weight.
+    """
+    if sample_weight is not None:
+        impurity = criterion_func(y, sample_weight=sample_weight)
+        if p_subset_true_dm is not None and p_subset_false_dm is not None:
+            return impurity - \
+                (p_subset_true_dm * criterion_func(sub_y_1[:, -1], sub_y_1[:, :-1], sample_weight=sub_sample_weight_1)) - \
+                (p_subset_false_dm * criterion_func(sub_y_2[:, -1], sub_y_2[:, :-1], sample_weight=sub_sample_weight_2))
+        total_weight = np.sum(sample_weight)
+        p_1 = np.sum(sub_sample_weight_1) / total_weight
+        p_2 = np.sum(sub_sample_weight_2) / total_weight
+        return impurity - (p_1 * criterion_func(sub_y_1, sample_weight=sub_sample_weight_1)) - \
+            (p_2 * criterion_func(sub_y_2, sample_weight=sub_sample_weight_2))
+
     impurity = criterion_func(y)
 
     if p_subset_true_dm is not None and p_subset_false_dm is not None:
@@ -158,12 +205,17 @@ def calculate_impurity_gain_ratio(y, sub_y_1, sub_y_2, X_sub, criterion_func, p_
     return information_gain_ratio
 
 
-def calculate_value_by_majority_vote(y):
+def calculate_value_by_majority_vote(y, sample_weight=None):
     """
     Calculate value by majority vote.
 
-    NB: Used in classification decision tree.
+    NB: Used in classification decision tree. If sample_weight is given,
+    each sample votes with its weight.
     """
+    if sample_weight is not None:
+        unique_labels, label_idxs = np.unique(np.ravel(y), return_inverse=True)
+        return unique_labels[np.argmax(np.bincount(np.ravel(label_idxs), weights=np.ravel(sample_weight)))]
+
     majority_value = None
 
     max_count = 0
@@ -197,10 +249,16 @@ def calculate_mae(y_true, y_pred):
     return mae
 
 
-def calculate_variance(y):
+def calculate_variance(y, sample_weight=None):
     """
     Calculate the variance of y.
+
+    NB: If sample_weight is given, it is the weighted variance.
     """
+    if sample_weight is not None:
+        mean = np.average(y, axis=0, weights=sample_weight)
+        return np.average(np.power(y - mean, 2), axis=0, weights=sample_weight)
+
     mean = np.ones(np.shape(y)) * y.mean(0)
     n_samples = np.shape(y)[0]
     variance = (1 / n_samples) * np.diag((y - mean).T.dot(y - mean))  # T means transposing a matrix.
@@ -217,18 +275,31 @@ def calculate_standard_deviation(y):
     return std_dev
 
 
-def calculate_variance_reduction(y, sub_y_1, sub_y_2, criterion_func, p_subset_true_dm=None, p_subset_false_dm=None):
+def calculate_variance_reduction(y, sub_y_1, sub_y_2, criterion_func, p_subset_true_dm=None, p_subset_false_dm=None,
+                                 sample_weight=None, sub_sample_weight_1=None, sub_sample_weight_2=None):
     """
     Calculate the variance reduction, which is equal to the
     impurity of y minus the entropy of sub_y_1 and sub_y_2.
+
+    NB: If sample_weight (the weights of y) is given, sub_sample_weight_1 and
+    sub_sample_weight_2 (the weights of sub_y_1 and sub_y_2) must be given
+    too, and criterion_func must accept sample_weight.
     """
-    var = criterion_func(y)
-    var_1 = criterion_func(np.expand_dims(sub_y_1[:, -1], axis=1))
-    var_2 = criterion_func(np.expand_dims(sub_y_2[:, -1], axis=1))
+    if sample_weight is not None:
+        var = criterion_func(y, sample_weight=sample_weight)
+        var_1 = criterion_func(np.expand_dims(sub_y_1[:, -1], axis=1), sample_weight=sub_sample_weight_1)
+        var_2 = criterion_func(np.expand_dims(sub_y_2[:, -1], axis=1), sample_weight=sub_sample_weight_2)
+    else:
+        var = criterion_func(y)
+        var_1 = criterion_func(np.expand_dims(sub_y_1[:, -1], axis=1))
+        var_2 = criterion_func(np.expand_dims(sub_y_2[:, -1], axis=1))
 
     if p_subset_true_dm is not None and p_subset_false_dm is not None:
         p_1 = p_subset_true_dm
         p_2 = p_subset_false_dm
+    elif sample_weight is not None:
+        p_1 = np.sum(sub_sample_weight_1) / np.sum(sample_weight)
+        p_2 = np.sum(sub_sample_weight_2) / np.sum(sample_weight)
     else:
         p_1 = len(sub_y_1) / len(y)
         p_2 = len(sub_y_2) / len(y)
@@ -239,7 +310,7 @@ def calculate_variance_reduction(y, sub_y_1, sub_y_2, criterion_func, p_subset_t
     return sum(variance_reduction)
 
 
-def calculate_mean_value(y):
+def calculate_mean_value(y, sample_weight=None):
     """
     Calculate the mean of y.
 
@@ -247,22 +318,25 @@ def calculate_mean_value(y):
     ----------
     y: array-like of shape (n_samples, n_labels)
 
+    sample_weight: array-like of shape (n_samples,), default=None
+        If given, the weighted mean is calculated.
+
     Returns
     -------
     value: array-like of the shape reduced by one dimension,
            at least a 0-d float number
         The mean values.
     """
-    value = np.mean(y, axis=0)
+    value = np.mean(y, axis=0) if sample_weight is None else np.average(y, axis=0, weights=sample_weight)
 
-    return value if len(value) > 1 else value[0]
+    return value if np.ndim(value) == 0 or len(value) > 1 else value[0]
 
 
 # =============================================================================
 # Statistical functions
 # =============================================================================
 
-def calculate_proba(y):
+def calculate_proba(y, sample_weight=None):
     """
     Calculate the probabilities of each element in the set.
 
@@ -271,22 +345,23 @@ def calculate_proba(y):
     Parameters
     ----------
     y: array-like of shape (n_samples,)
-    """
-    prob_list = []
-
-    label_values = np.unique(y)
-    for label in label_values:
-        prob_list.append(np.sum(y == label) / np.shape(y)[0])
 
-    # If the number of dimensions of y is greater than 1,
-    # the following method may cause a ValueError: object too deep for desired array.
-    # if len(np.shape(y)) > 1:
-    #     y = np.squeeze(y)
-    # dist = np.bincount(y)
-    # for count in dist:
-    #     print(count / np.shape(y)[0])
+    sample_weight: array-like of shape (n_samples,), default=None
+        If given, each element counts as much as its weight.
 
-    return prob_list
+    Returns
+    -------
+    proba: ndarray of shape (n_unique_elements,)
+        The probability of each unique element, in ascending order of the
+        elements.
+    """
+    if sample_weight is not None:
+        _, idxs = np.unique(y, return_inverse=True)
+        # NB: Every element of a sample (e.g. of a multi-output y) has the weight of the sample.
+        weights = np.broadcast_to(np.reshape(sample_weight, (-1,) + (1,) * (np.ndim(y) - 1)), np.shape(y))
+        return np.bincount(np.ravel(idxs), weights=np.ravel(weights)) / np.sum(sample_weight)
+    _, counts = np.unique(y, return_counts=True)
+    return counts / np.shape(y)[0]
 
 
 # =============================================================================
@@ -22,8 +22,6 @@ Created on Thu Nov 19 11:15:33 2020
 import os
 import numpy as np
 import pandas as pd
-from scipy.io import arff
-from sklearn import datasets
 
 
 # ==================================================================================
@@ -117,6 +115,8 @@ def load_chess():
 
 
 def load_diabetes():
+    from scipy.io import arff
+
     data = arff.loadarff(DATA_FOLDER_PATH + 'Diabetes/dataset_37_diabetes.arff')
     df = pd.DataFrame(data[0])
     df['class'] = df['class'].str.decode('utf-8')
@@ -135,6 +135,8 @@ def load_iris():
     #
     # return pd.DataFrame(ds)
 
+    from sklearn import datasets
+
     return datasets.load_iris(as_frame=True).frame
 
 
@@ -148,6 +150,8 @@ def load_wine():
     #
     # return pd.DataFrame(ds)
 
+    from sklearn import datasets
+
     return datasets.load_wine(as_frame=True).frame
 
 
@@ -210,6 +214,8 @@ if __name__ == "__main__":
     data_wine = load_wine()
     print('Loading Wine, shape', data_wine.shape)
 
+    from sklearn import datasets
+
     data, target = datasets.load_boston(return_X_y=True)
     print(type(data))
     print(type(target))
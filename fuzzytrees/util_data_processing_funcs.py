@@ -6,9 +6,6 @@
 @desc: 
 """
 import numpy as np
-import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.metrics import pairwise_distances
 
 """
 Functions in this module are for preprocessing data:
@@ -60,6 +57,9 @@ def degree_of_membership_build(X_df, r_seed, conv_k, fuzzy_reg):
     degree_of_membership_theta:
 
     """
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import pairwise_distances
+
     # TODO: categorical feature handling
     # TODO: missing value handling
     x_np = X_df.values
@@ -97,7 +97,7 @@ def degree_of_membership_build(X_df, r_seed, conv_k, fuzzy_reg):
     return x_new, centriods, degree_of_membership_theta
 
 
-def extract_fuzzy_features(X, conv_k=5, fuzzy_reg=0.0):
+def extract_fuzzy_features(X, conv_k=5, fuzzy_reg=0.0, return_fuzzy_sets=False):
     """
     Extract fuzzy features in feature fuzzification to generate degree of
     membership sets of each feature.
@@ -105,20 +105,35 @@ def extract_fuzzy_features(X, conv_k=5, fuzzy_reg=0.0):
     NB: Feature fuzzification must be done in the data preprocessing, that is,
         before training the model and predicting new samples.
 
+    If return_fuzzy_sets=True, the centroids and the degree of membership
+    thetas of the fuzzy sets of all features, both of shape
+    (n_features, conv_k), are returned as well. Save them with the model
+    (see FuzzificationOptions) and use transform_fuzzy_features() to
+    fuzzify new samples with the same fuzzy sets.
+
     @author: Anjin Liu
     @email: Anjin.Liu@uts.edu.au
 
     TODO: To be deprecated in version 1.0.
     TODO: To be verified by experiment: When using cross validation, which performance is better doing this before or after the partition of the data sets?
     """
+    import pandas as pd
+
     # print("************* X's shape:", np.shape(X))
     n_samples, n_features = np.shape(X)
     X_fuzzy_dms = np.empty([n_samples, 0])
+    centroids = np.empty([n_features, conv_k])
+    thetas = np.empty([n_features, conv_k])
     for feature_idx in range(n_features):
-        X_fuzzy_dm, _, _ = degree_of_membership_build(r_seed=0, X_df=pd.DataFrame(X[:, feature_idx]), conv_k=conv_k,
-                                                      fuzzy_reg=fuzzy_reg)
+        X_fuzzy_dm, centroids_f, thetas_f = degree_of_membership_build(r_seed=0,
+                                                                       X_df=pd.DataFrame(X[:, feature_idx]),
+                                                                       conv_k=conv_k, fuzzy_reg=fuzzy_reg)
         X_fuzzy_dms = np.concatenate((X_fuzzy_dms, X_fuzzy_dm), axis=1)
+        centroids[feature_idx] = np.ravel(centroids_f)
+        thetas[feature_idx] = thetas_f
     # print("************* X_fuzzy_dms's shape:", np.shape(X_fuzzy_dms))
+    if return_fuzzy_sets:
+        return X_fuzzy_dms, centroids, thetas
     return X_fuzzy_dms
 
     # X_df = pd.DataFrame(X)
@@ -134,6 +149,265 @@ def extract_fuzzy_features(X, conv_k=5, fuzzy_reg=0.0):
     # return np.asarray(X_fuzzy_dms)
 
 
+def transform_fuzzy_features(X, centroids, thetas, fuzzy_reg=0.0):
+    """
+    Generate the degree of membership sets of each feature of new samples
+    with the fuzzy sets fitted by extract_fuzzy_features().
+
+    The result is 1 minus the distance to each centroid scaled by its theta,
+    floored at 0, as in extract_fuzzy_features(). On the samples the fuzzy
+    sets were fitted on, it differs from the result of
+    extract_fuzzy_features() by rounding errors only (of the order of
+    1e-13), because the operations are done in a different order.
+
+    NB: A degree of membership at exactly a split value of a model fitted
+    on the result of extract_fuzzy_features() can therefore end up on the
+    other side of the split.
+
+    Parameters
+    ----------
+    X: array-like of shape (n_samples, n_features)
+        The samples to be fuzzified.
+
+    centroids, thetas: array-like of shape (n_features, conv_k)
+        The centroids and the degree of membership thetas of the fuzzy sets
+        of all features, returned by extract_fuzzy_features().
+
+    fuzzy_reg: float, default=0.0
+        The fuzzy regulation coefficient used when fitting the fuzzy sets.
+
+    Returns
+    -------
+    X_fuzzy_dms: ndarray of shape (n_samples, n_features * conv_k)
+    """
+    X = np.asarray(X, dtype=float)
+    n_samples, n_features = np.shape(X)
+    X_fuzzy_dms = np.abs(X[:, :, np.newaxis] - centroids[np.newaxis, :, :]) / thetas[np.newaxis, :, :]
+    if not (fuzzy_reg == 0 or fuzzy_reg == 1):
+        X_fuzzy_dms *= np.log(fuzzy_reg) - np.log(1 - fuzzy_reg)
+    X_fuzzy_dms = 1 - X_fuzzy_dms
+    X_fuzzy_dms[X_fuzzy_dms < 0] = 0
+    return X_fuzzy_dms.reshape(n_samples, -1)
+
+
+def fuzzify_features(X, fuzzification_options):
+    """
+    Append the degree of membership sets of each feature of new samples to
+    the samples, i.e. make the input samples of a fuzzy model fitted on
+    np.concatenate((X, X_fuzzy_dms), axis=1), with the fuzzy sets saved in
+    its fuzzification options.
+
+    Parameters
+    ----------
+    X: array-like of shape (n_samples, n_features)
+        The samples to be fuzzified.
+
+    fuzzification_options: FuzzificationOptions
+        The fuzzification options of the model, of which the centroids and
+        the thetas must be set.
+
+    Returns
+    -------
+    X_plus_dms: ndarray of shape (n_samples, n_features * (conv_k + 1))
+    """
+    if fuzzification_options is None or fuzzification_options.centroids is None \
+            or fuzzification_options.thetas is None:
+        raise ValueError("The centroids and the thetas of the fuzzy sets must be set in the fuzzification options "
+                         "to fuzzify new samples, see extract_fuzzy_features(return_fuzzy_sets=True).")
+    X = np.asarray(X, dtype=float)
+    X_dms = transform_fuzzy_features(X, centroids=np.asarray(fuzzification_options.centroids),
+                                     thetas=np.asarray(fuzzification_options.thetas),
+                                     fuzzy_reg=fuzzification_options.fuzzy_reg)
+    return np.concatenate((X, X_dms), axis=1)
+
+
+def get_fuzzy_set_table(fuzzification_options):
+    """
+    Get the fuzzy sets saved in fuzzification options as plain Python
+    numbers, for fuzzifying one sample at a time by fuzzify_row() without
+    the overhead of NumPy operations on tiny arrays.
+
+    Returns
+    -------
+    fuzzy_set_table: tuple
+        (fuzzy_sets, coefficient, fuzzification_options), where fuzzy_sets is
+        the list of the (feature_idx, centroid, theta) of all the fuzzy sets
+        in the order of the degree of membership columns, and coefficient is
+        the factor of the fuzzy regulation coefficient, or None.
+    """
+    if fuzzification_options is None or fuzzification_options.centroids is None \
+            or fuzzification_options.thetas is None:
+        raise ValueError("The centroids and the thetas of the fuzzy sets must be set in the fuzzification options "
+                         "to fuzzify new samples, see extract_fuzzy_features(return_fuzzy_sets=True).")
+    centroids = np.asarray(fuzzification_options.centroids, dtype=float).tolist()
+    thetas = np.asarray(fuzzification_options.thetas, dtype=float).tolist()
+    fuzzy_sets = [(feature_idx, centroid, theta)
+                  for feature_idx, (feature_centroids, feature_thetas) in enumerate(zip(centroids, thetas))
+                  for centroid, theta in zip(feature_centroids, feature_thetas)]
+    fuzzy_reg = fuzzification_options.fuzzy_reg
+    coefficient = None
+    if not (fuzzy_reg == 0 or fuzzy_reg == 1):
+        coefficient = float(np.log(fuzzy_reg) - np.log(1 - fuzzy_reg))
+    return fuzzy_sets, coefficient, fuzzification_options
+
+
+def fuzzify_row(x, fuzzy_set_table):
+    """
+    Append the degree of membership sets of each feature of one sample to
+    the sample, as fuzzify_features() does for an array of samples (with
+    the same floating-point operations, so the results are identical).
+
+    Parameters
+    ----------
+    x: list of float
+        The feature values of the sample as Python numbers.
+
+    fuzzy_set_table: tuple
+        The fuzzy sets returned by get_fuzzy_set_table().
+
+    Returns
+    -------
+    x_plus_dms: list of float
+    """
+    fuzzy_sets, coefficient, fuzzification_options = fuzzy_set_table
+    try:
+        if coefficient is None:
+            distances = [abs(x[feature_idx] - centroid) / theta for feature_idx, centroid, theta in fuzzy_sets]
+        else:
+            distances = [abs(x[feature_idx] - centroid) / theta * coefficient
+                         for feature_idx, centroid, theta in fuzzy_sets]
+    except ZeroDivisionError:
+        # NB: A fuzzy set of zero width is left to NumPy, which gives inf or nan as fuzzify_features() does.
+        return fuzzify_features([x], fuzzification_options)[0].tolist()
+    # NB: "1 - distance" is floored at 0, but nan (e.g. of a missing value) stays nan.
+    return x + [0. if distance > 1 else 1 - distance for distance in distances]
+
+
+def get_soft_half_widths(n_columns, fuzzification_options, softness=0.5):
+    """
+    Get the half widths of the soft regions below the split values of the
+    columns of the input samples of a fuzzy model, for soft inference (see
+    FlatTree.soft_apply()), from the fuzzy sets of the features.
+
+    A raw feature gets softness times the mean theta (i.e. the mean half
+    width) of its fuzzy sets, and a degree of membership column, whose
+    values are in [0, 1], gets softness.
+
+    Parameters
+    ----------
+    n_columns: int
+        The number of columns of the input samples, either n_features (raw
+        features only) or n_features * (conv_k + 1) (raw features followed
+        by their degree of membership columns).
+
+    fuzzification_options: FuzzificationOptions
+        The fuzzification options of the model, of which the thetas must be
+        set.
+
+    softness: float, default=0.5
+        The width of the soft regions relative to the fuzzy sets. 0 makes
+        the inference crisp.
+
+    Returns
+    -------
+    half_widths: ndarray of shape (n_columns,)
+    """
+    if fuzzification_options is None or fuzzification_options.thetas is None:
+        raise ValueError("The thetas of the fuzzy sets must be set in the fuzzification options to derive the half "
+                         "widths of soft inference. Otherwise, pass the half widths explicitly.")
+    feature_half_widths = softness * np.mean(np.asarray(fuzzification_options.thetas, dtype=float), axis=1)
+    n_features = len(feature_half_widths)
+    if n_columns < n_features:
+        raise ValueError("The input samples have {} columns, but the fuzzy sets are of {} features.".format(
+            n_columns, n_features))
+    half_widths = np.full(n_columns, float(softness))
+    half_widths[:n_features] = feature_half_widths
+    return half_widths
+
+
+def to_row(x, fuzzy_set_table=None):
+    """
+    Convert one sample to a list of Python numbers, fuzzified by
+    fuzzify_row() if fuzzy_set_table is set.
+    """
+    x = x.tolist() if hasattr(x, "tolist") else list(x)
+    if fuzzy_set_table is not None:
+        x = fuzzify_row(x, fuzzy_set_table)
+    return x
+
+
+# =============================================================================
+# Chunked data
+# =============================================================================
+
+# The default number of rows of the blocks of samples predicted at once.
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def iter_row_chunks(X, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Iterate the rows of samples in blocks of at most chunk_size rows.
+
+    Parameters
+    ----------
+    X: array-like of shape (n_samples, n_features), or iterable of such arrays
+        The samples, e.g. a memory-mapped array (np.memmap, or np.load()
+        with mmap_mode="r") or a generator of the blocks of rows read from
+        a file. An array is sliced without copying, so only the pages of a
+        memory-mapped array in the current block are read into memory.
+
+    chunk_size: int, default=DEFAULT_CHUNK_SIZE
+        The maximum number of rows of a block. Larger blocks of an iterable
+        are split.
+
+    Yields
+    ------
+    X_chunk: ndarray of shape (n_samples_chunk, n_features)
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1, got {}".format(chunk_size))
+    blocks = (X,) if hasattr(X, "shape") else X
+    for block in blocks:
+        if not hasattr(block, "shape"):
+            block = np.asarray(block)
+        if len(block.shape) != 2:
+            raise ValueError("Blocks of samples must be 2-dimensional, got shape {}".format(block.shape))
+        for start in range(0, block.shape[0], chunk_size):
+            yield block[start:start + chunk_size]
+
+
+def iter_predict_chunks(predict_func, X, chunk_size=DEFAULT_CHUNK_SIZE, fuzzification_options=None):
+    """
+    Predict the samples block by block, so that the memory used depends on
+    chunk_size instead of the number of samples.
+
+    Parameters
+    ----------
+    predict_func: callable
+        The prediction function of a fitted model, e.g. its predict().
+
+    X: array-like of shape (n_samples, n_features), or iterable of such arrays
+        The samples, see iter_row_chunks().
+
+    chunk_size: int, default=DEFAULT_CHUNK_SIZE
+        The maximum number of rows predicted at once.
+
+    fuzzification_options: FuzzificationOptions, default=None
+        If set, each block is fuzzified by fuzzify_features() with the fuzzy
+        sets saved in these options before it is predicted, i.e. X holds
+        the raw features. Otherwise, X is used as it is.
+
+    Yields
+    ------
+    y_pred_chunk: ndarray of shape (n_samples_chunk,) or (n_samples_chunk, n_outputs)
+        The predictions of each block, in the order of the samples.
+    """
+    for X_chunk in iter_row_chunks(X, chunk_size=chunk_size):
+        if fuzzification_options is not None:
+            X_chunk = fuzzify_features(X_chunk, fuzzification_options)
+        yield np.asarray(predict_func(X_chunk))
+
+
 # =============================================================================
 # Encoder
 # =============================================================================
@@ -284,6 +558,58 @@ def resample_bootstrap(X, y, n_subsets, n_samples_sub=None):
     return X_subsets, y_subsets
 
 
+def draw_bootstrap_seeds(n_subsets, random_state=None):
+    """
+    Draw one seed per bootstrap subset, from which the subset can be
+    regenerated at any time by get_bootstrap_indices().
+
+    Parameters
+    ----------
+    n_subsets: int
+        The number of subsets (e.g. the number of trees of a forest).
+
+    random_state: int, default=None
+        The seed of the seeds. If None, the seeds are drawn from the global
+        NumPy random generator, so that np.random.seed() makes them
+        reproducible.
+
+    Returns
+    -------
+    seeds: ndarray of shape (n_subsets,) of int64
+    """
+    rng = np.random if random_state is None else np.random.RandomState(random_state)
+    return rng.randint(np.iinfo(np.int32).max, size=n_subsets).astype(np.int64)
+
+
+def get_bootstrap_indices(n_samples_super, seed, n_samples_sub=None):
+    """
+    Get the indexes of the samples of one bootstrap subset, drawn with
+    replacement.
+
+    Parameters
+    ----------
+    n_samples_super: int
+        The number of samples of the whole data set.
+
+    seed: int or RandomState instance
+        The seed of the subset, e.g. one of draw_bootstrap_seeds(), or a
+        RandomState seeded with it, which can go on to draw the other random
+        numbers of the model fitted on the subset.
+
+    n_samples_sub: int, default=None
+        Sample size of the subset. If left to None this is automatically
+        set to n_samples_super.
+
+    Returns
+    -------
+    idxs: ndarray of shape (n_samples_sub,)
+    """
+    if n_samples_sub is None:
+        n_samples_sub = n_samples_super
+    rng = seed if isinstance(seed, np.random.RandomState) else np.random.RandomState(seed)
+    return rng.randint(n_samples_super, size=n_samples_sub)
+
+
 def resample_simple_random(X, y, n_subsets, n_samples_sub=None):
     """
     Randomly draw a specified number of collections of independent
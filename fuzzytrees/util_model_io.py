@@ -0,0 +1,364 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 19/10/2026 5:30 pm
+@desc: Saving and loading fitted models in the FuzzyTrees model format.
+
+    Pickling a fitted model (e.g. by joblib) serialises the recursive graph
+    of Node objects, which is large, slow to load and limited by the
+    recursion limit for deep trees. Instead, the model format stores all
+    the trees of a model as flat arrays (see FlatTree), the fuzzy sets of
+    the fuzzification and the estimator metadata.
+
+    File layout (all numbers little-endian):
+        - 8 bytes: the magic bytes b"FZTREES\\0".
+        - 4 bytes (uint32): the format version.
+        - 4 bytes (uint32): reserved, 0.
+        - 8 bytes (uint64): the length of the header.
+        - The header: a UTF-8 JSON object with the estimator metadata and
+          the dtype, shape and offset of every array.
+        - The arrays: raw C-contiguous buffers, each one aligned to
+          ALIGNMENT bytes, at their offsets from the start of this section.
+
+    All the trees of an ensemble share the same arrays, one after another
+    (see the array "node_offsets"), so a model of any size is a fixed
+    number of buffers. load_model() memory-maps the file by default, so
+    opening a model does not read the node arrays, and processes loading the
+    same file share its pages.
+"""
+import json
+import struct
+
+import numpy as np
+
+from fuzzytrees.fdt_flat import FlatForest, FlatTree
+
+# =============================================================================
+# Types and constants
+# =============================================================================
+
+MAGIC = b"FZTREES\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# Magic bytes, format version, reserved, header length.
+_PREAMBLE = struct.Struct("<8sIIQ")
+
+# The names of the arrays of a FlatForest.
+_FOREST_ARRAYS = ("node_offsets", "feature", "threshold", "op", "children_true", "children_false", "value",
+                  "proba_offsets", "proba_values")
+
+# The parameters of fuzzification options saved with a model.
+_FUZZIFICATION_PARAMS = ("r_seed", "conv_size", "conv_k", "num_iter", "fuzzy_reg")
+
+
+def _get_model_classes():
+    """
+    Get the classes that can be saved and loaded by their names.
+
+    NB: Only these classes are instantiated by load_model(), no matter what
+    class name a model file specifies.
+    """
+    from fuzzytrees.fdt_base import FuzzyDecisionTreeWrapper
+    from fuzzytrees.fdts import FuzzyCARTClassifier, FuzzyCARTRegressor, FuzzyID3Classifier, FuzzyC45Classifier
+    from fuzzytrees.fgbdt import FuzzyGBDTClassifier, FuzzyGBDTRegressor
+    from fuzzytrees.frdf import FuzzyRDFClassifier, FuzzyRDFRegressor
+
+    classes = [FuzzyDecisionTreeWrapper, FuzzyCARTClassifier, FuzzyCARTRegressor, FuzzyID3Classifier,
+               FuzzyC45Classifier, FuzzyGBDTClassifier, FuzzyGBDTRegressor, FuzzyRDFClassifier, FuzzyRDFRegressor]
+    return {cls.__name__: cls for cls in classes}
+
+
+# =============================================================================
+# Saving
+# =============================================================================
+
+def _get_criterion_name(criterion_func):
+    from fuzzytrees.fdt_base import CRITERIA_FUNC_CLF, CRITERIA_FUNC_REG
+
+    for criteria in (CRITERIA_FUNC_CLF, CRITERIA_FUNC_REG):
+        for name, func in criteria.items():
+            if func is criterion_func:
+                return name
+    # NB: A custom criterion function is not saved. It is only needed to refit the model.
+    return None
+
+
+def _describe_fuzzification_options(fuzzification_options, arrays):
+    if fuzzification_options is None:
+        return None
+    meta = {name: getattr(fuzzification_options, name, None) for name in _FUZZIFICATION_PARAMS}
+    for name in ("centroids", "thetas"):
+        if getattr(fuzzification_options, name, None) is not None:
+            arrays[name] = np.asarray(getattr(fuzzification_options, name), dtype=np.float64)
+    return meta
+
+
+def _describe_tree_params(estimator):
+    return {"class": type(estimator).__name__,
+            "disable_fuzzy": estimator.disable_fuzzy,
+            "criterion": _get_criterion_name(estimator.criterion_func),
+            "max_depth": estimator.max_depth,
+            "min_samples_split": estimator.min_samples_split,
+            "min_impurity_split": estimator.min_impurity_split,
+            "max_leaf_nodes": estimator.max_leaf_nodes,
+            "growth": estimator.growth,
+            "splitter": estimator.splitter,
+            "max_features": estimator.max_features,
+            "n_quantiles": estimator.n_quantiles,
+            "quantile_min_samples": estimator.quantile_min_samples}
+
+
+def _get_flat_tree(estimator):
+    if estimator.root is not None:
+        return FlatTree.from_node(estimator.root)
+    if estimator._flat_tree is not None:
+        return estimator._flat_tree
+    raise ValueError("The model is not fitted yet.")
+
+
+def _describe_model(model):
+    """
+    Get the metadata, the list of fitted tree estimators and the extra
+    arrays of a model.
+    """
+    from fuzzytrees.fdt_base import BaseFuzzyDecisionTree, FuzzyDecisionTreeWrapper
+    from fuzzytrees.fgbdt import FuzzyGBDT
+    from fuzzytrees.frdf import FuzzyRDF
+
+    arrays = {}
+    meta = {"class": type(model).__name__}
+    if getattr(model, "_flat_forest", None) is not None:
+        raise ValueError("A model loaded with shared=True cannot be saved again. Copy its model file instead.")
+    if isinstance(model, BaseFuzzyDecisionTree):
+        meta["kind"] = "tree"
+        meta["params"] = _describe_tree_params(model)
+        meta["fuzzification_options"] = _describe_fuzzification_options(model.fuzzification_options, arrays)
+        estimators = [model]
+    elif isinstance(model, FuzzyDecisionTreeWrapper):
+        meta["kind"] = "wrapper"
+        meta["params"] = _describe_tree_params(model.estimator)
+        meta["fuzzification_options"] = _describe_fuzzification_options(model.fuzzification_options, arrays)
+        estimators = [model.estimator]
+    elif isinstance(model, FuzzyRDF):
+        meta["kind"] = "rdf"
+        meta["params"] = {"disable_fuzzy": model.disable_fuzzy,
+                          "criterion": _get_criterion_name(model.criterion_func),
+                          "n_estimators": model.n_estimators,
+                          "max_depth": model.max_depth,
+                          "min_samples_split": model.min_samples_split,
+                          "min_impurity_split": model.min_impurity_split,
+                          "max_features": model.max_features,
+                          "max_leaf_nodes": model.max_leaf_nodes,
+                          "splitter": model.splitter,
+                          "oob_score": model.oob_score,
+                          "warm_start": model.warm_start}
+        meta["fuzzification_options"] = _describe_fuzzification_options(model.fuzzification_options, arrays)
+        estimators = [wrapper.estimator for wrapper in model._estimators]
+        # NB: Only the trees of models saved by older versions are fitted on selected columns.
+        if all(wrapper.feature_idxs is not None for wrapper in model._estimators):
+            arrays["feature_idxs"] = np.array([wrapper.feature_idxs for wrapper in model._estimators],
+                                              dtype=np.int64)
+        # NB: The bootstrap seeds are kept so that a loaded forest can be warm started with out-of-bag scoring.
+        if model._bootstrap_seeds is not None:
+            arrays["bootstrap_seeds"] = np.asarray(model._bootstrap_seeds, dtype=np.int64)
+    elif isinstance(model, FuzzyGBDT):
+        meta["kind"] = "gbdt"
+        meta["params"] = {"disable_fuzzy": model.disable_fuzzy,
+                          "criterion": _get_criterion_name(model.criterion_func),
+                          "learning_rate": model.learning_rate,
+                          "n_estimators": model.n_estimators,
+                          "validation_fraction": model.validation_fraction,
+                          "n_iter_no_change": model.n_iter_no_change,
+                          "max_depth": model.max_depth,
+                          "min_samples_split": model.min_samples_split,
+                          "min_impurity_split": model.min_impurity_split,
+                          "max_leaf_nodes": model.max_leaf_nodes,
+                          "warm_start": model.warm_start}
+        meta["fuzzification_options"] = _describe_fuzzification_options(model.fuzzification_options, arrays)
+        estimators = [wrapper.estimator for wrapper in model._estimators]
+    else:
+        raise TypeError("Cannot save a model of type {}.".format(type(model).__name__))
+    return meta, estimators, arrays
+
+
+def _to_builtin(obj):
+    # NB: Used by json.dumps() for the NumPy scalars in the metadata, e.g. a conv_k of type np.int64.
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError("Object of type {} is not JSON serializable".format(type(obj).__name__))
+
+
+def _align(n):
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_model(model, filename):
+    """
+    Save a fitted model in the FuzzyTrees model format.
+
+    Parameters
+    ----------
+    model: BaseFuzzyDecisionTree, FuzzyDecisionTreeWrapper, FuzzyRDF or FuzzyGBDT
+        The fitted model.
+
+    filename: str
+        The path of the model file.
+
+    NB: Only numerical split values and leaf values can be saved. The
+    custom functions of a model (e.g. a custom criterion function) and the
+    datasets referenced by its fuzzification options are not saved.
+    """
+    meta, estimators, arrays = _describe_model(model)
+    flat_forest = FlatForest.from_trees([_get_flat_tree(estimator) for estimator in estimators])
+    arrays.update((name, getattr(flat_forest, name)) for name in _FOREST_ARRAYS)
+    arrays["is_one_dim"] = np.array([bool(estimator._is_one_dim) for estimator in estimators], dtype=np.uint8)
+
+    # Lay out the arrays as little-endian buffers.
+    buffers = []
+    meta["arrays"] = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+        meta["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        buffers.append((offset, array))
+        offset = _align(offset + array.nbytes)
+
+    header = json.dumps(meta, default=_to_builtin).encode("utf-8")
+    data_start = _align(_PREAMBLE.size + len(header))
+    with open(filename, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, 0, len(header)))
+        f.write(header)
+        f.write(b"\0" * (data_start - _PREAMBLE.size - len(header)))
+        for offset, array in buffers:
+            f.write(b"\0" * (data_start + offset - f.tell()))
+            f.write(array.tobytes())
+
+
+# =============================================================================
+# Loading
+# =============================================================================
+
+def _read_arrays(filename, mmap_mode):
+    if mmap_mode is None:
+        buffer = np.fromfile(filename, dtype=np.uint8)
+    elif mmap_mode in ("r", "c"):
+        buffer = np.memmap(filename, dtype=np.uint8, mode=mmap_mode)
+    else:
+        raise ValueError("mmap_mode must be 'r', 'c' or None, got {!r}".format(mmap_mode))
+
+    if len(buffer) < _PREAMBLE.size:
+        raise ValueError("{} is not a FuzzyTrees model file.".format(filename))
+    magic, version, _, header_len = _PREAMBLE.unpack(buffer[:_PREAMBLE.size].tobytes())
+    if magic != MAGIC:
+        raise ValueError("{} is not a FuzzyTrees model file.".format(filename))
+    if version > FORMAT_VERSION:
+        raise ValueError("{} is of model format version {}, but only versions up to {} are supported.".format(
+            filename, version, FORMAT_VERSION))
+    meta = json.loads(buffer[_PREAMBLE.size:_PREAMBLE.size + header_len].tobytes().decode("utf-8"))
+
+    # NB: The arrays are views of the buffer, so no data is copied (nor read from a memory-mapped file).
+    data_start = _align(_PREAMBLE.size + header_len)
+    arrays = {}
+    for name, spec in meta.pop("arrays").items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        if count == 0:
+            arrays[name] = np.empty(spec["shape"], dtype=dtype)
+            continue
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                     offset=data_start + spec["offset"]).reshape(spec["shape"])
+    return meta, arrays
+
+
+def _build_fuzzification_options(meta, arrays):
+    from fuzzytrees.fdt_base import FuzzificationOptions
+
+    if meta["fuzzification_options"] is None:
+        return None
+    return FuzzificationOptions(centroids=arrays.get("centroids"), thetas=arrays.get("thetas"),
+                                **meta["fuzzification_options"])
+
+
+def _get_criterion_func(name):
+    from fuzzytrees.fdt_base import CRITERIA_FUNC_CLF, CRITERIA_FUNC_REG
+
+    if name is None:
+        return None
+    return CRITERIA_FUNC_CLF.get(name, CRITERIA_FUNC_REG.get(name))
+
+
+def load_model(filename, mmap_mode="r", shared=False):
+    """
+    Load a model saved by save_model().
+
+    Parameters
+    ----------
+    filename: str
+        The path of the model file.
+
+    mmap_mode: {"r", "c", None}, default="r"
+        - "r": memory-map the file read-only. The trees are read on demand
+          and the pages are shared by all the processes that load the file.
+        - "c": memory-map the file copy-on-write.
+        - None: read the whole file into memory.
+
+    shared: bool, default=False
+        Only for ensembles (FuzzyRDF and FuzzyGBDT). If True, the ensemble
+        predicts straight from one FlatForest of the loaded arrays, without
+        creating any object per tree. Together with mmap_mode="r", it is
+        the mode for serving one model from many (e.g. pre-forked) worker
+        processes on one host: all of them share one physical copy of the
+        trees, and the private memory of each one does not grow with the
+        number of trees. A shared ensemble cannot be fitted again.
+
+    Returns
+    -------
+    model: BaseFuzzyDecisionTree, FuzzyDecisionTreeWrapper, FuzzyRDF or FuzzyGBDT
+        The model, of the same class as the saved one. Its trees predict
+        directly from the loaded arrays, and fitting it again replaces them.
+    """
+    meta, arrays = _read_arrays(filename, mmap_mode)
+    classes = _get_model_classes()
+    if meta["class"] not in classes:
+        raise ValueError("Cannot load a model of class {}.".format(meta["class"]))
+    cls = classes[meta["class"]]
+
+    params = dict(meta["params"])
+    params["criterion_func"] = _get_criterion_func(params.pop("criterion"))
+    fuzzification_options = _build_fuzzification_options(meta, arrays)
+    flat_forest = FlatForest(feature_idxs=arrays.get("feature_idxs"),
+                             **{name: arrays[name] for name in _FOREST_ARRAYS})
+    if meta["kind"] in ("rdf", "gbdt") and shared:
+        # NB: No sub-estimators are constructed at all.
+        n_estimators = params.pop("n_estimators")
+        model = cls(fuzzification_options=fuzzification_options, n_estimators=0, **params)
+        model.n_estimators = n_estimators
+        model._flat_forest = flat_forest
+        return model
+
+    if meta["kind"] == "tree":
+        del params["class"]
+        model = cls(fuzzification_options=fuzzification_options, **params)
+        estimators = [model]
+    elif meta["kind"] == "wrapper":
+        fdt_class = classes[params.pop("class")]
+        model = cls(fdt_class=fdt_class, fuzzification_options=fuzzification_options, **params)
+        estimators = [model.estimator]
+    elif meta["kind"] == "rdf":
+        model = cls(fuzzification_options=fuzzification_options, **params)
+        feature_idxs_list = arrays["feature_idxs"] if "feature_idxs" in arrays else [None] * len(model._estimators)
+        for wrapper, feature_idxs in zip(model._estimators, feature_idxs_list):
+            wrapper.feature_idxs = feature_idxs
+        if "bootstrap_seeds" in arrays:
+            model._bootstrap_seeds = np.array(arrays["bootstrap_seeds"])
+        estimators = [wrapper.estimator for wrapper in model._estimators]
+    else:
+        model = cls(fuzzification_options=fuzzification_options, **params)
+        estimators = [wrapper.estimator for wrapper in model._estimators]
+
+    for i, estimator in enumerate(estimators):
+        estimator._flat_tree = flat_forest.get_tree(i)
+        estimator._is_one_dim = bool(arrays["is_one_dim"][i])
+    return model
@@ -0,0 +1,233 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 19/10/2026 11:30 pm
+@desc: Size-bounded LRU cache of the predictions of a model, keyed by the
+    (quantised) input rows or by the leaves the rows end up in, for scoring
+    traffic with many repeated rows.
+"""
+import collections
+import threading
+
+import numpy as np
+
+KEY_TYPES = ["row", "leaves"]
+
+
+# =============================================================================
+# Prediction cache
+# =============================================================================
+
+class PredictionCache:
+    """
+    A least-recently-used cache of the predictions of the rows of input
+    samples.
+
+    The rows of a batch are deduplicated first (by np.unique() with the
+    inverse map), the unique rows are looked up in the cache, and only the
+    ones that are not cached are predicted, in one call of the model.
+
+    Parameters
+    ----------
+    max_size: int, default=100000
+        The maximum number of rows cached. When the cache is full, the least
+        recently used rows are evicted.
+
+    decimals: int, default=None
+        The number of decimals the feature values are rounded to in the keys
+        of the rows, so that rows that differ by less than that share a
+        prediction. If None, the keys are the exact feature values.
+        Only for key="row".
+
+    key: {"row", "leaves"}, default="row"
+        What the rows are keyed by. "row" keys them by their feature values.
+        "leaves" keys them by the ids of the leaves they end up in (see
+        apply()), which hits for every row that is predicted the same way,
+        but costs a traversal of the trees per row.
+
+    NB: A model with a cache clears it when it is fitted again. Call clear()
+    after changing a model in any other way. The cache is thread-safe, so it
+    can be shared by threads predicting with the same model.
+
+    NB: The cache pays off when predicting a row costs more than hashing it,
+    e.g. with fitted trees, which are walked per row in Python, or with
+    large ensembles.
+    """
+
+    def __init__(self, max_size=100000, decimals=None, key="row"):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1, got {}".format(max_size))
+        if key not in KEY_TYPES:
+            raise ValueError("key must be one of {}, got {!r}".format(KEY_TYPES, key))
+        if decimals is not None and key != "row":
+            raise ValueError("decimals is only used with key='row'.")
+        self.max_size = max_size
+        self.decimals = decimals
+        self.key = key
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # NB: A lock cannot be pickled, e.g. with a model sent to the worker processes of a multi-process fit(), and
+        # the cached predictions are not worth sending, so a copy starts empty with a lock of its own.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_cache"] = collections.OrderedDict()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    @property
+    def hit_rate(self):
+        """
+        The fraction of the rows served without being predicted, including
+        the repeated rows within a batch.
+        """
+        n_rows = self.hits + self.misses
+        return self.hits / n_rows if n_rows > 0 else 0.
+
+    def get_stats(self):
+        """
+        Get the statistics of the cache, e.g. to export as metrics.
+        """
+        with self._lock:
+            return {"size": len(self._cache), "max_size": self.max_size, "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions, "hit_rate": self.hit_rate}
+
+    def clear(self):
+        """
+        Remove all the cached predictions, e.g. when the model is changed.
+        The statistics are kept.
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def get_keys(self, X, apply_func=None):
+        """
+        Get the keys of the rows of X, as an array of shape (n_samples,
+        n_key_columns) of 8-byte values, which are equal if and only if the
+        rows share a prediction.
+        """
+        if self.key == "leaves":
+            if apply_func is None:
+                raise ValueError("The rows cannot be keyed by their leaves without apply().")
+            keys = np.asarray(apply_func(X), dtype=np.int64).reshape(len(X), -1)
+        else:
+            keys = np.asarray(X, dtype=np.float64)
+            if self.decimals is not None:
+                keys = np.round(keys, self.decimals)
+            # NB: -0.0 and 0.0 have different bytes but are the same feature value, so -0.0 is made 0.0.
+            keys = keys + 0.
+        return np.ascontiguousarray(keys.reshape(len(keys), -1))
+
+    def predict(self, X, predict_func, apply_func=None):
+        """
+        Predict the rows of X with the cached predictions, predicting the
+        rows that are not cached by predict_func.
+
+        Parameters
+        ----------
+        X: array-like of shape (n_samples, n_features)
+            The input samples.
+
+        predict_func: callable
+            The uncached prediction of a model, which is called at most once
+            with the rows of X that are not cached.
+
+        apply_func: callable, default=None
+            The apply() of the model, used to key the rows if key="leaves".
+
+        Returns
+        -------
+        y_pred: ndarray of shape (n_samples,) or (n_samples, n_outputs)
+            The predicted values.
+        """
+        X = np.asarray(X)
+        if len(X) == 0:
+            return np.asarray(predict_func(X))
+
+        keys, first_idxs, inverse = _unique_rows(self.get_keys(X, apply_func))
+        # NB: The unique rows are used in the order they first appear in X, so that the last rows are the most
+        # recently used ones.
+        order = np.argsort(first_idxs, kind="stable").tolist()
+        y_uniques = [None] * len(keys)
+        with self._lock:
+            for i in order:
+                y = self._cache.get(keys[i])
+                if y is not None:
+                    self._cache.move_to_end(keys[i])
+                    y_uniques[i] = y
+        missed = [i for i in order if y_uniques[i] is None]
+
+        if missed:
+            # NB: The rows are predicted outside the lock, so that other threads can still be served from the cache.
+            y_missed = np.asarray(predict_func(X[first_idxs[missed]]))
+            with self._lock:
+                for i, y in zip(missed, y_missed):
+                    y_uniques[i] = y
+                    self._cache[keys[i]] = y
+                    self._cache.move_to_end(keys[i])
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+                    self.evictions += 1
+
+        with self._lock:
+            self.misses += len(missed)
+            self.hits += len(X) - len(missed)
+        return np.asarray(y_uniques)[np.ravel(inverse)]
+
+
+def _unique_rows(keys):
+    """
+    Deduplicate the rows of a 2-D array of 8-byte values.
+
+    NB: np.unique() on whole rows (as opaque values) sorts them byte by
+    byte, which is slow, so the rows are deduplicated by a 64-bit hash of
+    each row instead, and compared with the first row of their group to rule
+    out collisions. If two different rows ever collide, the rows are
+    deduplicated as a whole.
+
+    Returns
+    -------
+    keys: list of bytes
+        The bytes of each unique row.
+
+    first_idxs: ndarray of shape (n_unique,)
+        The index of the first row of each unique row.
+
+    inverse: ndarray of shape (n_rows,)
+        The index of the unique row of each row.
+    """
+    values = keys.view(np.uint64)
+    multipliers = _get_hash_multipliers(values.shape[1])
+    hashes = (values * multipliers).sum(axis=1, dtype=np.uint64)
+    _, first_idxs, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+    inverse = np.ravel(inverse)
+
+    if not np.array_equal(values, values[first_idxs[inverse]]):
+        rows = values.view(np.dtype((np.void, values.itemsize * values.shape[1]))).ravel()
+        _, first_idxs, inverse = np.unique(rows, return_index=True, return_inverse=True)
+        inverse = np.ravel(inverse)
+    return [row.tobytes() for row in values[first_idxs]], first_idxs, inverse
+
+
+_hash_multipliers = np.empty(0, dtype=np.uint64)
+
+
+def _get_hash_multipliers(n_columns):
+    # NB: Fixed random odd multipliers, one per column, so that the hash of a row depends on the order of its values.
+    global _hash_multipliers
+    if len(_hash_multipliers) < n_columns:
+        rng = np.random.RandomState(0)
+        _hash_multipliers = rng.randint(0, 2 ** 63, size=max(n_columns, 64), dtype=np.int64).astype(np.uint64) * \
+            np.uint64(2) + np.uint64(1)
+    return _hash_multipliers[:n_columns]
@@ -0,0 +1,365 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 19/10/2026 3:00 pm
+@desc: Opt-in instrumentation used to profile the fitting and predicting of
+    fuzzy decision trees and their ensembles.
+"""
+import functools
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import OrderedDict
+
+import numpy as np
+
+
+# =============================================================================
+# Fit statistics
+# =============================================================================
+
+class _PhaseTimer:
+    """
+    Context manager that adds the elapsed time of its body to one phase of
+    a FitStats object.
+    """
+    __slots__ = ("_stats", "_name", "_time_start")
+
+    def __init__(self, stats, name):
+        self._stats = stats
+        self._name = name
+        self._time_start = None
+
+    def __enter__(self):
+        self._time_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self._time_start
+        # NB: Phases may be timed in several threads at once, e.g. when the best split is searched in parallel.
+        with self._stats.lock:
+            self._stats.phase_times[self._name] += elapsed
+            self._stats.phase_calls[self._name] += 1
+        return False
+
+
+class _NullPhaseTimer:
+    """
+    Context manager that does nothing. It is used in place of _PhaseTimer
+    when the fit statistics are disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NULL_PHASE_TIMER = _NullPhaseTimer()
+
+
+class FitStats:
+    """
+    A class that collects the time spent and the number of calls in each
+    phase of building a decision tree, together with the shape of the
+    built tree.
+
+    Parameters
+    ----------
+    callback: callable, default=None
+        A function called as callback(node_record) every time a node
+        (including a leaf node) is generated, where node_record is a dict
+        described in the attribute nodes.
+
+    Attributes
+    ----------
+    phase_times: OrderedDict of {str: float}
+        The total seconds spent in each phase. The phases are:
+        - "concatenation": joining the feature values and the target values
+          at each node before searching for the best split.
+        - "unique_values": enumerating the unique values (or the approximate
+          quantiles, see n_quantiles) of each feature as candidate split
+          values.
+        - "splitting": splitting the data at a node by a candidate split.
+        - "criterion": evaluating the splitting criterion (impurity gain) of
+          a candidate split, including the membership degree sums.
+        - "leaf": calculating the value and probabilities of a leaf node.
+
+    phase_calls: OrderedDict of {str: int}
+        The number of times each phase is entered.
+
+    nodes_per_depth: dict of {int: int}
+        The number of nodes (including leaf nodes) at each depth.
+
+    nodes: list of dict
+        One record per generated node, in the order of generation, with the
+        keys "depth", "n_samples", "n_candidates" (the number of candidate
+        splits evaluated at the node), "impurity_gain" (the best impurity
+        gain found) and "is_leaf".
+
+    fit_time: float
+        The total seconds spent in fit().
+    """
+    PHASES = ("concatenation", "unique_values", "splitting", "criterion", "leaf")
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.phase_times = OrderedDict((name, 0.0) for name in self.PHASES)
+        self.phase_calls = OrderedDict((name, 0) for name in self.PHASES)
+        self.nodes_per_depth = {}
+        self.nodes = []
+        self.fit_time = 0.0
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        # NB: Locks cannot be pickled, so the lock is recreated when unpickling.
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def phase(self, name):
+        """
+        Get a context manager that times its body as the specified phase.
+        """
+        return _PhaseTimer(self, name)
+
+    @property
+    def n_candidates(self):
+        """
+        The total number of candidate splits evaluated so far.
+        """
+        return self.phase_calls["criterion"]
+
+    def add_node(self, depth, n_samples, n_candidates, impurity_gain, is_leaf):
+        """
+        Record a generated node and call the callback, if any.
+        """
+        record = {"depth": depth, "n_samples": n_samples, "n_candidates": n_candidates,
+                  "impurity_gain": float(impurity_gain), "is_leaf": is_leaf}
+        self.nodes.append(record)
+        self.nodes_per_depth[depth] = self.nodes_per_depth.get(depth, 0) + 1
+        if self.callback is not None:
+            self.callback(record)
+
+    def to_dict(self):
+        """
+        Get all the statistics as a dict of built-in types, e.g. for logging
+        them as JSON.
+        """
+        return {"fit_time": self.fit_time,
+                "phase_times": dict(self.phase_times),
+                "phase_calls": dict(self.phase_calls),
+                "nodes_per_depth": dict(sorted(self.nodes_per_depth.items())),
+                "n_nodes": len(self.nodes),
+                "n_leaves": sum(1 for record in self.nodes if record["is_leaf"]),
+                "nodes": list(self.nodes)}
+
+    def __repr__(self):
+        phases = ", ".join("{}={:.4f}s/{}".format(name, self.phase_times[name], self.phase_calls[name])
+                           for name in self.PHASES)
+        return "FitStats(fit_time={:.4f}s, n_nodes={}, {})".format(self.fit_time, len(self.nodes), phases)
+
+
+def get_phase_timer(stats, name):
+    """
+    Get a context manager that times the specified phase if stats is a
+    FitStats object, otherwise a context manager that does nothing.
+    """
+    return NULL_PHASE_TIMER if stats is None else stats.phase(name)
+
+
+# =============================================================================
+# Memory tracking
+# =============================================================================
+
+MEMORY_TRACKING_MODES = ("tracemalloc", "rss")
+
+
+def get_current_rss_bytes():
+    """
+    Get the current resident set size of this process in bytes.
+
+    NB: On platforms without /proc/self/statm, the peak resident set size
+    reported by the resource module is returned instead, and None if that
+    is not available either.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            import os
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # NB: ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryTracker:
+    """
+    Context manager that measures the peak memory allocated while its body
+    runs, above the memory allocated when entering it.
+
+    Parameters
+    ----------
+    mode: {"tracemalloc", "rss"}, default="tracemalloc"
+        - "tracemalloc": trace the Python memory allocations (including the
+          data buffers of NumPy arrays). It is precise but slows down
+          allocation-heavy code.
+        - "rss": sample the resident set size of the process in a background
+          thread every interval seconds. It has little overhead but can miss
+          short-lived peaks and includes memory that is not freed back to
+          the operating system.
+
+    interval: float, default=0.005
+        The sampling interval (in seconds) of mode "rss".
+
+    Attributes
+    ----------
+    peak_bytes: int
+        The peak memory (in bytes) allocated inside the body. Only available
+        after leaving the context.
+    """
+
+    def __init__(self, mode="tracemalloc", interval=0.005):
+        if mode not in MEMORY_TRACKING_MODES:
+            raise ValueError("mode must be one of {}, got {!r}".format(MEMORY_TRACKING_MODES, mode))
+        self.mode = mode
+        self.interval = interval
+        self.peak_bytes = None
+        self._started_tracing = False
+        self._start_bytes = 0
+        self._max_bytes = 0
+        self._stop_event = None
+        self._sampler = None
+
+    def __enter__(self):
+        if self.mode == "tracemalloc":
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            elif hasattr(tracemalloc, "reset_peak"):
+                # NB: Available since Python 3.9. Otherwise the peak may include
+                # allocations made before entering the context.
+                tracemalloc.reset_peak()
+            self._start_bytes = tracemalloc.get_traced_memory()[0]
+        else:
+            self._start_bytes = get_current_rss_bytes() or 0
+            self._max_bytes = self._start_bytes
+            self._stop_event = threading.Event()
+            self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.mode == "tracemalloc":
+            peak = tracemalloc.get_traced_memory()[1]
+            if self._started_tracing:
+                tracemalloc.stop()
+        else:
+            self._stop_event.set()
+            self._sampler.join()
+            peak = max(self._max_bytes, get_current_rss_bytes() or 0)
+        self.peak_bytes = max(0, peak - self._start_bytes)
+        return False
+
+    def _sample_rss(self):
+        while not self._stop_event.wait(self.interval):
+            self._max_bytes = max(self._max_bytes, get_current_rss_bytes() or 0)
+
+
+# Attributes of estimators that are diagnostics rather than part of the model.
+_DIAGNOSTIC_ATTRS = ("fit_stats_", "memory_stats_")
+
+
+def get_model_size(model, exclude_attrs=_DIAGNOSTIC_ATTRS):
+    """
+    Get the memory footprint of a model in bytes, i.e. the total size of all
+    the objects reachable from it, including the data buffers of NumPy
+    arrays. Objects shared by several references are counted once, and
+    modules, classes and functions are not counted.
+
+    Parameters
+    ----------
+    model: object
+        The model, e.g. a fitted estimator.
+
+    exclude_attrs: tuple of str, default=("fit_stats_", "memory_stats_")
+        Attributes of the model (and of any object reachable from it) that
+        are not counted, e.g. diagnostics collected during fitting.
+
+    NB: The object graph is walked iteratively, so that deep trees do not
+    hit the recursion limit.
+    """
+    seen = set()
+    size = 0
+    stack = [model]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, types.ModuleType, types.FunctionType,
+                                                types.BuiltinFunctionType, types.MethodType)):
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, np.ndarray):
+            # NB: sys.getsizeof() of an array counts its data only if it owns the data.
+            size += sys.getsizeof(obj) if obj.base is None else sys.getsizeof(obj) + obj.nbytes
+            continue
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        if hasattr(obj, "__dict__"):
+            attrs = vars(obj)
+            size += sys.getsizeof(attrs)
+            seen.add(id(attrs))
+            stack.extend(value for name, value in attrs.items() if name not in exclude_attrs)
+        for slot in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, slot):
+                stack.append(getattr(obj, slot))
+    return size
+
+
+def track_memory_usage(phase):
+    """
+    Decorator of the fit/predict functions of estimators that track the peak
+    memory allocated in them if the estimator's attribute track_memory is
+    one of MEMORY_TRACKING_MODES.
+
+    The peak is stored in the estimator's attribute memory_stats_ (a dict)
+    as "<phase>_peak_bytes". After fitting, the model's own footprint is
+    also stored as "model_bytes".
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            mode = getattr(self, "track_memory", None)
+            if not mode:
+                return func(self, *args, **kwargs)
+
+            with MemoryTracker(mode=mode) as tracker:
+                result = func(self, *args, **kwargs)
+
+            if getattr(self, "memory_stats_", None) is None:
+                self.memory_stats_ = {"mode": mode}
+            self.memory_stats_[phase + "_peak_bytes"] = tracker.peak_bytes
+            if phase == "fit":
+                self.memory_stats_["model_bytes"] = get_model_size(self)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,157 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 19/10/2026 9:00 pm
+@desc: Mergeable streaming quantile sketch, used to get approximate
+    quantiles of the feature values at large nodes as candidate split values
+    instead of all their unique values.
+"""
+import numpy as np
+
+
+# =============================================================================
+# Quantile sketch
+# =============================================================================
+
+class QuantileSketch:
+    """
+    A KLL quantile sketch, i.e. a summary of a stream of values in bounded
+    memory from which approximate quantiles can be queried.
+
+    The sketch keeps a hierarchy of compactors. The values at level h each
+    stand for 2^h values of the stream. When a level is full, it is sorted
+    and every other value (starting at a random offset) is promoted to the
+    next level, and the others are discarded. The capacity of the levels
+    decreases geometrically from the top, so the sketch holds O(k) values
+    however long the stream is, and the rank error of the quantiles is
+    O(1/k) of the number of values.
+
+    Parameters
+    ----------
+    k: int, default=200
+        The capacity of the top level, which controls the accuracy (and the
+        size) of the sketch.
+
+    seed: int, default=0
+        The seed of the random offsets of the compactions, so that a sketch
+        of the same stream always gives the same quantiles.
+
+    NB: Two sketches (e.g. of two chunks of a column) can be merged into one
+    sketch of both, with the same error guarantee.
+    """
+    _CAPACITY_DECAY = 2. / 3.
+    _MIN_CAPACITY = 2
+
+    def __init__(self, k=200, seed=0):
+        if k < self._MIN_CAPACITY:
+            raise ValueError("k must be at least {}, got {}".format(self._MIN_CAPACITY, k))
+        self.k = k
+        self.n = 0
+        self._levels = [np.empty(0)]
+        self._rng = np.random.RandomState(seed)
+
+    def _get_capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(self._MIN_CAPACITY, int(np.ceil(self.k * self._CAPACITY_DECAY ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            values = self._levels[level]
+            if len(values) > self._get_capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0, dtype=values.dtype))
+                values = np.sort(values)
+                # NB: An odd value out stays at this level, so that no weight is lost.
+                n_kept = len(values) % 2
+                offset = self._rng.randint(2)
+                promoted = values[n_kept + offset::2]
+                self._levels[level] = values[:n_kept]
+                self._levels[level + 1] = np.concatenate((self._levels[level + 1], promoted))
+            level += 1
+
+    def update(self, values):
+        """
+        Add an array of values to the sketch.
+        """
+        values = np.ravel(values)
+        self.n += len(values)
+        self._levels[0] = np.concatenate((self._levels[0], values))
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one.
+        """
+        for level, values in enumerate(other._levels):
+            if level == len(self._levels):
+                self._levels.append(np.empty(0, dtype=values.dtype))
+            self._levels[level] = np.concatenate((self._levels[level], values))
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantiles(self, qs):
+        """
+        Get the approximate quantiles of the values added so far.
+
+        Parameters
+        ----------
+        qs: array-like of float in [0, 1]
+            The quantiles to get.
+
+        Returns
+        -------
+        values: ndarray of the same shape as qs
+            The quantiles, each of which is one of the values added.
+        """
+        values = np.concatenate(self._levels)
+        if len(values) == 0:
+            raise ValueError("Cannot get the quantiles of an empty sketch.")
+        weights = np.concatenate([np.full(len(v), 2 ** level, dtype=np.int64) for level, v in enumerate(self._levels)])
+        order = np.argsort(values, kind="mergesort")
+        values = values[order]
+        cum_weights = np.cumsum(weights[order])
+        ranks = np.asarray(qs, dtype=np.float64) * cum_weights[-1]
+        return values[np.minimum(np.searchsorted(cum_weights, ranks, side="left"), len(values) - 1)]
+
+
+def get_quantile_split_values(feature_values, n_quantiles, k=None, chunk_size=None):
+    """
+    Get up to n_quantiles candidate split values of a feature, at its
+    approximate quantiles, by streaming the values through a QuantileSketch
+    in chunks.
+
+    Parameters
+    ----------
+    feature_values: array-like of shape (n_samples,)
+        The values of the feature at a node.
+
+    n_quantiles: int
+        The number of quantiles, evenly spaced between 0 and 1, to get.
+
+    k: int, default=None
+        The accuracy of the sketch. If None, max(200, 2 * n_quantiles).
+
+    chunk_size: int, default=None
+        The number of values added to the sketch at once. If None, 8 * k.
+
+    Returns
+    -------
+    split_values: ndarray
+        The unique quantiles in ascending order, which are values of the
+        feature and have the same dtype as feature_values.
+    """
+    feature_values = np.ravel(feature_values)
+    k = max(200, 2 * n_quantiles) if k is None else k
+    chunk_size = 8 * k if chunk_size is None else chunk_size
+
+    sketch = QuantileSketch(k=k)
+    for start in range(0, len(feature_values), chunk_size):
+        sketch.update(feature_values[start:start + chunk_size])
+
+    # NB: The 0-quantile (the minimum) is kept, as np.unique() does, although a split on it leaves one side empty.
+    qs = np.linspace(0., 1., n_quantiles, endpoint=False)
+    return np.unique(sketch.quantiles(qs)).astype(feature_values.dtype, copy=False)
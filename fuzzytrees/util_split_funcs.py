@@ -14,6 +14,35 @@ import numpy as np
 # Naive functions
 # =============================================================================
 
+def mask_ds_2_bin(ds, col_idx, split_val):
+    """
+    Get the boolean mask of the samples of a data set that meet the split
+    rule "the specified feature is greater than or equal to (numerical data)
+    or the same as (categorical data) the split value", see split_ds_2_bin().
+
+    NB: The comparison is done by NumPy on the whole column, which releases
+    the GIL, so that several features can be evaluated in parallel threads.
+
+    Parameters
+    ----------
+    ds: array-like of shape (n_samples, n_feature)
+        The current data set to be split.
+
+    col_idx: int
+        The index of the specified column on which the split based.
+
+    split_val: int, float, or string
+        The specified value of the column indexed as col_idx.
+
+    Returns
+    -------
+    mask: ndarray of shape (n_samples,) of bool
+    """
+    if isinstance(split_val, int) or isinstance(split_val, float):
+        return ds[:, col_idx] >= split_val
+    return ds[:, col_idx] == split_val
+
+
 def split_ds_2_bin(ds, col_idx, split_val):
     """
     Split a data set into two subsets by a specified value of a specified feature:
@@ -40,17 +69,11 @@ def split_ds_2_bin(ds, col_idx, split_val):
     subset_true, subset_false: array-like
         Return a tuple of the two split subsets.
     """
-    # Declare a lambda (args: expression), which is an anonymous function,
-    # and will define the criteria for slicing the data set to be split.
-    split_func = None
-    if isinstance(split_val, int) or isinstance(split_val, float):
-        split_func = lambda sample: sample[col_idx] >= split_val
-    else:
-        split_func = lambda sample: sample[col_idx] == split_val
+    mask = mask_ds_2_bin(ds, col_idx, split_val)
 
-    # Slice out all samples that meet the criteria defined by the lambda.
-    subset_true = np.array([sample for sample in ds if split_func(sample)])
-    subset_false = np.array([sample for sample in ds if not split_func(sample)])
+    # Slice out all samples that meet the criteria and all the others.
+    subset_true = ds[mask]
+    subset_false = ds[~mask]
 
     return subset_true, subset_false
 
@@ -0,0 +1,94 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 20/10/2026 10:00 am
+@desc: Shared fixtures of the tests, i.e. small fuzzified datasets and one
+    fitted model of each kind.
+"""
+import numpy as np
+import pytest
+from sklearn.datasets import load_diabetes, load_wine
+
+from fuzzytrees.fdt_base import CRITERIA_FUNC_CLF, CRITERIA_FUNC_REG, FuzzificationOptions, FuzzyDecisionTreeWrapper
+from fuzzytrees.fdts import FuzzyCARTClassifier, FuzzyCARTRegressor
+from fuzzytrees.fgbdt import FuzzyGBDTClassifier, FuzzyGBDTRegressor
+from fuzzytrees.frdf import FuzzyRDFClassifier, FuzzyRDFRegressor
+from fuzzytrees.util_data_processing_funcs import extract_fuzzy_features
+
+CONV_K = 3
+
+
+class FuzzyDataset:
+    """
+    A dataset whose raw features X_raw are fuzzified into X = [X_raw | dms]
+    with the fuzzy sets saved in fuzzification_options.
+    """
+
+    def __init__(self, X_raw, y, fuzzy_reg=0.0):
+        X_fuzzy_dms, centroids, thetas = extract_fuzzy_features(X_raw, conv_k=CONV_K, fuzzy_reg=fuzzy_reg,
+                                                                return_fuzzy_sets=True)
+        self.X_raw = X_raw
+        self.X = np.concatenate((X_raw, X_fuzzy_dms), axis=1)
+        self.y = y
+        self.fuzzification_options = FuzzificationOptions(conv_k=CONV_K, centroids=centroids, thetas=thetas,
+                                                          fuzzy_reg=fuzzy_reg)
+
+
+@pytest.fixture(scope="session")
+def clf_data():
+    X, y = load_wine(return_X_y=True)
+    X = (X - X.min(axis=0)) / (X.max(axis=0) - X.min(axis=0))
+    return FuzzyDataset(X, y.astype(int), fuzzy_reg=0.3)
+
+
+@pytest.fixture(scope="session")
+def reg_data():
+    X, y = load_diabetes(return_X_y=True)
+    return FuzzyDataset(X[:200], y[:200])
+
+
+def make_model(name, data):
+    """
+    Make an unfitted model of the named kind for the dataset.
+    """
+    fo = data.fuzzification_options
+    if name == "tree_clf":
+        return FuzzyDecisionTreeWrapper(fdt_class=FuzzyCARTClassifier, disable_fuzzy=False, fuzzification_options=fo,
+                                        criterion_func=CRITERIA_FUNC_CLF["gini"], max_depth=5)
+    if name == "tree_reg":
+        return FuzzyDecisionTreeWrapper(fdt_class=FuzzyCARTRegressor, disable_fuzzy=False, fuzzification_options=fo,
+                                        criterion_func=CRITERIA_FUNC_REG["mse"], max_depth=4)
+    if name == "rdf_clf":
+        return FuzzyRDFClassifier(disable_fuzzy=False, fuzzification_options=fo,
+                                  criterion_func=CRITERIA_FUNC_CLF["gini"], n_estimators=5, max_depth=4)
+    if name == "rdf_reg":
+        return FuzzyRDFRegressor(disable_fuzzy=False, fuzzification_options=fo,
+                                 criterion_func=CRITERIA_FUNC_REG["mse"], n_estimators=5, max_depth=4)
+    if name == "gbdt_clf":
+        return FuzzyGBDTClassifier(disable_fuzzy=False, fuzzification_options=fo,
+                                   criterion_func=CRITERIA_FUNC_REG["mse"], n_estimators=5, max_depth=3)
+    if name == "gbdt_reg":
+        return FuzzyGBDTRegressor(disable_fuzzy=False, fuzzification_options=fo,
+                                  criterion_func=CRITERIA_FUNC_REG["mse"], n_estimators=5, max_depth=3)
+    raise ValueError(name)
+
+
+MODEL_NAMES = ["tree_clf", "tree_reg", "rdf_clf", "rdf_reg", "gbdt_clf", "gbdt_reg"]
+
+
+@pytest.fixture(scope="session")
+def fitted_models(clf_data, reg_data):
+    """
+    One fitted model of each kind, with its dataset, by name.
+
+    NB: The models are shared by the tests, which must not fit them again.
+    """
+    np.random.seed(0)
+    models = {}
+    for name in MODEL_NAMES:
+        data = clf_data if name.endswith("clf") else reg_data
+        model = make_model(name, data)
+        model.fit(data.X, data.y)
+        models[name] = (model, data)
+    return models
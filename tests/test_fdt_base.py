@@ -0,0 +1,168 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 20/10/2026 10:30 am
+@desc: Tests of the fuzzy decision tree builder and its predictions
+    (fdt_base).
+"""
+import numpy as np
+import pytest
+
+from fuzzytrees import fdt_base, util_quantile_sketch
+from fuzzytrees.fdt_base import CRITERIA_FUNC_CLF, CRITERIA_FUNC_REG
+from fuzzytrees.fdts import FuzzyCARTClassifier, FuzzyCARTRegressor
+
+
+# =============================================================================
+# Random splitter
+# =============================================================================
+
+@pytest.mark.parametrize("splitter", ["best", "random"])
+def test_integer_features_predict_like_fit(splitter):
+    # The random split values of integer features are floats, which split on ">=" in fit(), so predict() must
+    # compare by the type of the split value, not of the feature value.
+    rng = np.random.RandomState(0)
+    X = rng.randint(0, 10, size=(300, 4))
+    y = (X[:, 0] + X[:, 1] > 9).astype(int)
+    np.random.seed(0)
+    tree = FuzzyCARTClassifier(disable_fuzzy=True, criterion_func=CRITERIA_FUNC_CLF["gini"], max_depth=8,
+                               splitter=splitter)
+    tree.fit(X, y)
+
+    y_pred = np.asarray(tree.predict(X))
+    np.testing.assert_array_equal(y_pred, tree._get_flat_tree().predict(X))
+    np.testing.assert_array_equal(y_pred, [tree.predict_one(x) for x in X])
+    assert np.mean(y_pred == y) > 0.9
+
+
+# =============================================================================
+# Sample weights
+# =============================================================================
+
+def _assert_same_tree(tree_a, tree_b):
+    flat_a, flat_b = tree_a._get_flat_tree(), tree_b._get_flat_tree()
+    np.testing.assert_array_equal(flat_a.feature, flat_b.feature)
+    np.testing.assert_array_equal(flat_a.threshold, flat_b.threshold)
+    np.testing.assert_allclose(flat_a.value, flat_b.value, rtol=1e-9)
+
+
+def _make_weighted_tree(is_classifier, data, fuzzy):
+    # NB: A crisp tree is fitted on the raw features, a fuzzy tree on the raw features and their fuzzy dms.
+    fuzzification_options = data.fuzzification_options if fuzzy else None
+    if is_classifier:
+        return FuzzyCARTClassifier(disable_fuzzy=not fuzzy, fuzzification_options=fuzzification_options,
+                                   criterion_func=CRITERIA_FUNC_CLF["gini"], max_depth=4)
+    return FuzzyCARTRegressor(disable_fuzzy=not fuzzy, fuzzification_options=fuzzification_options,
+                              criterion_func=CRITERIA_FUNC_REG["mse"], max_depth=4)
+
+
+@pytest.mark.parametrize("is_classifier", [True, False])
+@pytest.mark.parametrize("fuzzy", [False, True])
+def test_integer_sample_weights_equal_duplicated_rows(clf_data, reg_data, is_classifier, fuzzy):
+    data = clf_data if is_classifier else reg_data
+    X = data.X if fuzzy else data.X_raw
+    sample_weight = np.random.RandomState(0).randint(1, 4, size=len(X))
+
+    weighted = _make_weighted_tree(is_classifier, data, fuzzy)
+    weighted.fit(X, data.y, sample_weight=sample_weight)
+    duplicated = _make_weighted_tree(is_classifier, data, fuzzy)
+    duplicated.fit(np.repeat(X, sample_weight, axis=0), np.repeat(data.y, sample_weight, axis=0))
+
+    _assert_same_tree(weighted, duplicated)
+
+
+@pytest.mark.parametrize("is_classifier", [True, False])
+@pytest.mark.parametrize("fuzzy", [False, True])
+def test_zero_sample_weights_equal_removed_rows(clf_data, reg_data, is_classifier, fuzzy):
+    data = clf_data if is_classifier else reg_data
+    X = data.X if fuzzy else data.X_raw
+    sample_weight = (np.random.RandomState(1).rand(len(X)) > 0.3).astype(float)
+    kept = sample_weight > 0
+
+    weighted = _make_weighted_tree(is_classifier, data, fuzzy)
+    weighted.fit(X, data.y, sample_weight=sample_weight)
+    removed = _make_weighted_tree(is_classifier, data, fuzzy)
+    removed.fit(X[kept], data.y[kept])
+
+    _assert_same_tree(weighted, removed)
+
+
+# =============================================================================
+# Best-first growth
+# =============================================================================
+
+@pytest.mark.parametrize("max_leaf_nodes", [1, 2, 5, 8])
+def test_best_first_leaves_within_budget(clf_data, monkeypatch, max_leaf_nodes):
+    tree = FuzzyCARTClassifier(disable_fuzzy=True, criterion_func=CRITERIA_FUNC_CLF["gini"], max_depth=10,
+                               growth="best_first", max_leaf_nodes=max_leaf_nodes)
+    n_evaluations = []
+    evaluate_node = tree._evaluate_node
+    monkeypatch.setattr(tree, "_evaluate_node", lambda *args, **kwargs: n_evaluations.append(1) or
+                        evaluate_node(*args, **kwargs))
+    tree.fit(clf_data.X_raw, clf_data.y)
+
+    flat_tree = tree._get_flat_tree()
+    n_leaves = int(np.sum(flat_tree.feature == -1))
+    assert n_leaves == max_leaf_nodes
+    # The children of the split that uses up the budget are not evaluated: the root, then two children for
+    # each of the other splits.
+    assert len(n_evaluations) == 1 + 2 * max(n_leaves - 2, 0)
+
+
+# =============================================================================
+# Multi-threaded split search
+# =============================================================================
+
+@pytest.mark.parametrize("splitter", ["best", "random"])
+def test_n_threads_builds_the_same_tree(clf_data, splitter):
+    trees = []
+    for n_threads in [1, 4]:
+        np.random.seed(0)
+        tree = FuzzyCARTClassifier(disable_fuzzy=False, fuzzification_options=clf_data.fuzzification_options,
+                                   criterion_func=CRITERIA_FUNC_CLF["gini"], max_depth=5, splitter=splitter,
+                                   max_features=8, n_threads=n_threads)
+        tree.fit(clf_data.X, clf_data.y)
+        trees.append(tree)
+
+    _assert_same_tree(*trees)
+    np.testing.assert_array_equal(trees[0]._get_flat_tree().children_true, trees[1]._get_flat_tree().children_true)
+
+
+# =============================================================================
+# Quantile split values
+# =============================================================================
+
+def _fit_quantile_tree(data, n_quantiles, quantile_min_samples):
+    tree = FuzzyCARTRegressor(disable_fuzzy=True, criterion_func=CRITERIA_FUNC_REG["mse"], max_depth=4,
+                              n_quantiles=n_quantiles, quantile_min_samples=quantile_min_samples)
+    tree.fit(data.X_raw, data.y)
+    return tree
+
+
+def test_quantiles_only_at_large_nodes(reg_data, monkeypatch):
+    node_sizes = []
+
+    def get_quantile_split_values(feature_values, n_quantiles):
+        node_sizes.append(len(feature_values))
+        return util_quantile_sketch.get_quantile_split_values(feature_values, n_quantiles)
+
+    monkeypatch.setattr(fdt_base, "get_quantile_split_values", get_quantile_split_values)
+    tree = _fit_quantile_tree(reg_data, n_quantiles=8, quantile_min_samples=100)
+
+    # The root and its large children are split at the quantiles, the smaller nodes at all the unique values.
+    n_features = reg_data.X_raw.shape[1]
+    assert len(node_sizes) > n_features
+    assert min(node_sizes) >= 100
+    flat_tree = tree._get_flat_tree()
+    root_values = reg_data.X_raw[:, flat_tree.feature[0]]
+    assert flat_tree.threshold[0] in util_quantile_sketch.get_quantile_split_values(root_values, 8)
+
+
+def test_quantiles_off_below_min_samples(reg_data):
+    exact = _fit_quantile_tree(reg_data, n_quantiles=None, quantile_min_samples=10000)
+    switched_off = _fit_quantile_tree(reg_data, n_quantiles=8, quantile_min_samples=len(reg_data.y) + 1)
+    switched_on = _fit_quantile_tree(reg_data, n_quantiles=8, quantile_min_samples=len(reg_data.y))
+
+    _assert_same_tree(exact, switched_off)
+    assert not np.array_equal(exact._get_flat_tree().threshold, switched_on._get_flat_tree().threshold)
@@ -0,0 +1,161 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 20/10/2026 12:00 pm
+@desc: Tests of the predictions backed by flat (array-based) trees
+    (fdt_flat), i.e. predict_one(), apply(), decision_path() and loaded
+    models.
+"""
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from conftest import MODEL_NAMES
+from fuzzytrees.fdt_base import CRITERIA_FUNC_CLF, FuzzyDecisionTreeWrapper
+from fuzzytrees.fdt_flat import LEAF
+from fuzzytrees.fdts import FuzzyCARTClassifier
+from fuzzytrees.frdf import FuzzyRDFClassifier
+from fuzzytrees.util_data_processing_funcs import fuzzify_features
+from fuzzytrees.util_model_io import load_model, save_model
+
+
+@pytest.fixture(scope="module", params=["fitted", "loaded"])
+def models(request, tmp_path_factory, fitted_models):
+    """
+    The fitted models, or the same models loaded with shared=True.
+    """
+    if request.param == "fitted":
+        return fitted_models
+    models = {}
+    for name, (model, data) in fitted_models.items():
+        filename = str(tmp_path_factory.mktemp("flat") / "{}.fzt".format(name))
+        save_model(model, filename)
+        models[name] = (load_model(filename, shared=True), data)
+    return models
+
+
+# =============================================================================
+# predict_one
+# =============================================================================
+
+@pytest.mark.parametrize("name", MODEL_NAMES)
+def test_predict_one_equals_predict(models, name):
+    model, data = models[name]
+    y_pred = np.asarray(model.predict(data.X))
+
+    for x, y in zip(data.X, y_pred):
+        np.testing.assert_array_equal(model.predict_one(x), y)
+
+
+@pytest.mark.parametrize("name", MODEL_NAMES)
+def test_predict_one_fuzzify_equals_predict(models, name):
+    model, data = models[name]
+    y_pred = np.asarray(model.predict(fuzzify_features(data.X_raw, data.fuzzification_options)))
+
+    for x, y in zip(data.X_raw, y_pred):
+        np.testing.assert_array_equal(model.predict_one(x, fuzzify=True), y)
+
+
+@pytest.mark.parametrize("make_model", [
+    lambda: FuzzyDecisionTreeWrapper(fdt_class=FuzzyCARTClassifier, disable_fuzzy=True,
+                                     criterion_func=CRITERIA_FUNC_CLF["gini"], max_depth=8, splitter="random"),
+    lambda: FuzzyRDFClassifier(disable_fuzzy=True, fuzzification_options=None,
+                               criterion_func=CRITERIA_FUNC_CLF["gini"], n_estimators=5, max_depth=8,
+                               splitter="random"),
+], ids=["tree", "rdf"])
+def test_predict_one_equals_predict_on_integer_features(make_model):
+    # NB: The random split values of integer features are floats, see test_integer_features_predict_like_fit().
+    rng = np.random.RandomState(0)
+    X = rng.randint(0, 10, size=(300, 4))
+    y = (X[:, 0] + X[:, 1] > 9).astype(int)
+    np.random.seed(0)
+    model = make_model()
+    model.fit(X, y)
+
+    np.testing.assert_array_equal([model.predict_one(x) for x in X], np.asarray(model.predict(X)))
+
+
+# =============================================================================
+# apply and decision_path
+# =============================================================================
+
+@pytest.mark.parametrize("name", ["tree_clf", "tree_reg"])
+def test_tree_decision_path_ends_in_apply(models, name):
+    model, data = models[name]
+    flat_tree = model.estimator._get_flat_tree()
+    leaf_ids = model.apply(data.X)
+    indicator = model.decision_path(data.X)
+
+    assert indicator.shape == (len(data.X), flat_tree.n_nodes)
+    np.testing.assert_array_equal(flat_tree.value[leaf_ids].ravel(), np.asarray(model.predict(data.X)).ravel())
+    for i, leaf_id in enumerate(leaf_ids):
+        path = indicator.indices[indicator.indptr[i]:indicator.indptr[i + 1]]
+        # Each path goes from the root to the leaf, from parents to their children.
+        assert path[0] == 0 and path[-1] == leaf_id
+        for parent, child in zip(path[:-1], path[1:]):
+            assert child in (flat_tree.children_true[parent], flat_tree.children_false[parent])
+
+
+@pytest.mark.parametrize("name", ["rdf_clf", "rdf_reg", "gbdt_clf", "gbdt_reg"])
+def test_ensemble_apply_and_decision_path(models, name):
+    model, data = models[name]
+    leaf_ids = model.apply(data.X)
+    indicator, n_nodes_ptr = model.decision_path(data.X)
+
+    assert leaf_ids.shape == (len(data.X), model.n_estimators)
+    assert indicator.shape == (len(data.X), n_nodes_ptr[-1])
+    for i in range(model.n_estimators):
+        # The leaf of each sample in each tree is on its path.
+        assert np.all(indicator[np.arange(len(data.X)), n_nodes_ptr[i] + leaf_ids[:, i]])
+
+
+def test_importing_estimators_does_not_load_scipy():
+    code = "import sys, fuzzytrees.fdts, fuzzytrees.frdf, fuzzytrees.fgbdt; print('scipy' in sys.modules)"
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code], cwd=project_dir, capture_output=True, text=True,
+                            check=True).stdout
+    assert output.strip() == "False"
+
+
+# =============================================================================
+# Soft inference
+# =============================================================================
+
+@pytest.mark.parametrize("name", MODEL_NAMES)
+@pytest.mark.parametrize("half_widths", [0., 1e-9])
+def test_soft_inference_of_narrow_regions_equals_predict(models, name, half_widths):
+    # NB: The samples are the training samples, many of which lie on the split values.
+    model, data = models[name]
+    y_soft = np.asarray(model.predict_soft(data.X, half_widths=half_widths))
+
+    np.testing.assert_allclose(y_soft, np.asarray(model.predict(data.X)).reshape(y_soft.shape))
+
+
+@pytest.mark.parametrize("name", ["tree_clf", "tree_reg"])
+@pytest.mark.parametrize("half_widths", [0., 1e-9])
+def test_soft_apply_of_narrow_regions_equals_apply(models, name, half_widths):
+    model, data = models[name]
+    sample_idxs, leaf_ids, weights = model.estimator._get_flat_tree().soft_apply(data.X, half_widths)
+
+    # Each sample reaches one leaf only, its leaf in apply().
+    np.testing.assert_array_equal(np.sort(sample_idxs), np.arange(len(data.X)))
+    np.testing.assert_array_equal(leaf_ids[np.argsort(sample_idxs)], model.apply(data.X))
+    np.testing.assert_array_equal(weights, 1.)
+
+
+@pytest.mark.parametrize("name", ["tree_clf", "tree_reg"])
+@pytest.mark.parametrize("min_weight", [0., 1e-3, 0.2])
+def test_soft_apply_weights_sum_to_one(models, name, min_weight):
+    model, data = models[name]
+    flat_tree = model.estimator._get_flat_tree()
+    half_widths = np.std(data.X, axis=0)
+    sample_idxs, leaf_ids, weights = flat_tree.soft_apply(data.X, half_widths, min_weight=min_weight)
+
+    np.testing.assert_allclose(np.bincount(sample_idxs, weights=weights, minlength=len(data.X)), 1.)
+    assert np.all(flat_tree.feature[leaf_ids] == LEAF)
+    # Some samples are split between several leaves.
+    assert len(sample_idxs) > len(data.X)
@@ -0,0 +1,69 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 20/10/2026 1:30 pm
+@desc: Tests of the fuzzy gradient boosting decision trees (fgbdt).
+"""
+import numpy as np
+import pytest
+
+from fuzzytrees.fdt_base import CRITERIA_FUNC_REG
+from fuzzytrees.fgbdt import FuzzyGBDTRegressor
+
+
+def _make_gbdt(data, **kwargs):
+    return FuzzyGBDTRegressor(disable_fuzzy=False, fuzzification_options=data.fuzzification_options,
+                              criterion_func=CRITERIA_FUNC_REG["mse"], max_depth=3, **kwargs)
+
+
+def test_invalid_tree_parameters_raise_before_fitting(reg_data):
+    model = _make_gbdt(reg_data, n_estimators=3, max_leaf_nodes=0)
+    with pytest.raises(ValueError):
+        model.fit(reg_data.X, reg_data.y)
+    assert model._get_n_fitted_estimators() == 0
+
+
+# =============================================================================
+# Warm start
+# =============================================================================
+
+def _get_raw_scores(model, X):
+    """
+    Predict the raw scores F(x) with all the trees of a model.
+    """
+    raw_scores = np.array(model._estimators[0].predict(X), dtype=float)
+    for wrapper in model._estimators[1:]:
+        raw_scores -= model.learning_rate * np.asarray(wrapper.predict(X))
+    return raw_scores
+
+
+def test_warm_start_continues_from_the_raw_scores(reg_data):
+    model = _make_gbdt(reg_data, n_estimators=5, warm_start=True)
+    model.fit(reg_data.X, reg_data.y)
+    model.n_estimators = 10
+    model.fit(reg_data.X, reg_data.y)
+    cold = _make_gbdt(reg_data, n_estimators=10)
+    cold.fit(reg_data.X, reg_data.y)
+
+    np.testing.assert_allclose(model._train_raw_scores, _get_raw_scores(model, reg_data.X))
+    np.testing.assert_allclose(model.predict(reg_data.X), cold.predict(reg_data.X))
+
+    model.n_estimators = 8
+    with pytest.raises(ValueError):
+        model.fit(reg_data.X, reg_data.y)
+
+
+def test_warm_start_on_other_data_predicts_the_raw_scores(reg_data):
+    model = _make_gbdt(reg_data, n_estimators=5, warm_start=True)
+    model.fit(reg_data.X, reg_data.y)
+
+    # Other samples of the same number do not continue from the cached raw scores of the training samples.
+    X, y = reg_data.X[::-1], reg_data.y[::-1]
+    model.n_estimators = 7
+    model.fit(X, y)
+    np.testing.assert_allclose(model._train_raw_scores, _get_raw_scores(model, X))
+
+    model.warm_start = False
+    model.fit(X, y)
+    assert model._train_raw_scores is None
@@ -0,0 +1,165 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 20/10/2026 1:30 pm
+@desc: Tests of the fuzzy random decision forests (frdf).
+"""
+import numpy as np
+import pytest
+
+from fuzzytrees.fdt_base import CRITERIA_FUNC_CLF, CRITERIA_FUNC_REG, MultiProcessOptions
+from fuzzytrees.frdf import FuzzyRDFClassifier, FuzzyRDFRegressor
+from fuzzytrees.util_data_processing_funcs import get_bootstrap_indices
+from fuzzytrees.util_prediction_cache import PredictionCache
+
+
+def _make_forest(data, **kwargs):
+    return FuzzyRDFClassifier(disable_fuzzy=False, fuzzification_options=data.fuzzification_options,
+                              criterion_func=CRITERIA_FUNC_CLF["gini"], max_depth=4, **kwargs)
+
+
+def _get_flat_trees(model):
+    return [flat_tree for flat_tree, _ in model._get_flat_trees()]
+
+
+def _assert_same_flat_tree(flat_a, flat_b):
+    np.testing.assert_array_equal(flat_a.feature, flat_b.feature)
+    np.testing.assert_array_equal(flat_a.threshold, flat_b.threshold)
+    np.testing.assert_array_equal(flat_a.value, flat_b.value)
+
+
+# =============================================================================
+# Random features and split values
+# =============================================================================
+
+@pytest.mark.parametrize("splitter", ["best", "random"])
+def test_trees_are_reproducible_from_their_seeds(clf_data, splitter):
+    np.random.seed(0)
+    model = _make_forest(clf_data, n_estimators=4, splitter=splitter, max_features=3)
+    model.fit(clf_data.X, clf_data.y)
+    flat_trees = _get_flat_trees(model)
+
+    # Each tree draws its random features and split values from a generator of its own, not from the global one.
+    np.random.seed(123)
+    model._fit_one(clf_data.X, clf_data.y, None, model._bootstrap_seeds[2], 2)
+    _assert_same_flat_tree(_get_flat_trees(model)[2], flat_trees[2])
+
+
+@pytest.mark.parametrize("kwargs", [{"splitter": "worst"}, {"max_leaf_nodes": 0}, {"max_features": 0}])
+def test_invalid_tree_parameters_raise_before_fitting(clf_data, kwargs):
+    model = _make_forest(clf_data, n_estimators=3, **kwargs)
+    with pytest.raises(ValueError):
+        model.fit(clf_data.X, clf_data.y)
+    assert model._get_n_fitted_estimators() == 0
+
+
+# =============================================================================
+# Out-of-bag estimates
+# =============================================================================
+
+def _make_oob_forest(data, n_estimators, is_regression=False, **kwargs):
+    if is_regression:
+        return FuzzyRDFRegressor(disable_fuzzy=False, fuzzification_options=data.fuzzification_options,
+                                 criterion_func=CRITERIA_FUNC_REG["mse"], n_estimators=n_estimators, max_depth=4,
+                                 oob_score=True, **kwargs)
+    return _make_forest(data, n_estimators=n_estimators, oob_score=True, **kwargs)
+
+
+def _get_expected_oob_prediction(model, X, is_regression):
+    """
+    Recompute the out-of-bag predictions from the bootstrap seeds, with only
+    the trees whose bootstrap subsets leave each sample out.
+    """
+    n_samples = len(X)
+    predictions, is_oob = [], []
+    for wrapper, seed in zip(model._estimators, model._bootstrap_seeds):
+        is_oob.append(np.bincount(get_bootstrap_indices(n_samples, seed), minlength=n_samples) == 0)
+        predictions.append(np.ravel(wrapper.predict(X)))
+    predictions, is_oob = np.array(predictions), np.array(is_oob)
+
+    y_expected = []
+    for i in range(n_samples):
+        y_oob = predictions[is_oob[:, i], i]
+        if is_regression:
+            y_expected.append(np.mean(y_oob) if len(y_oob) > 0 else np.nan)
+        else:
+            y_expected.append(np.argmax(np.bincount(y_oob.astype(int))) if len(y_oob) > 0 else -1)
+    return np.array(y_expected)
+
+
+@pytest.mark.parametrize("is_regression", [False, True])
+def test_oob_prediction_only_uses_trees_that_left_samples_out(clf_data, reg_data, is_regression):
+    data = reg_data if is_regression else clf_data
+    np.random.seed(0)
+    model = _make_oob_forest(data, 10, is_regression=is_regression)
+    model.fit(data.X, data.y)
+
+    y_expected = _get_expected_oob_prediction(model, data.X, is_regression)
+    np.testing.assert_allclose(np.ravel(model.oob_prediction_), y_expected)
+
+    # The score is the R^2 in regression and the accuracy in classification, over the samples with estimates.
+    has_oob = ~np.isnan(y_expected) if is_regression else y_expected >= 0
+    y_true, y_pred = data.y[has_oob], y_expected[has_oob]
+    if is_regression:
+        expected_score = 1 - np.sum((y_true - y_pred) ** 2) / np.sum((y_true - np.mean(y_true)) ** 2)
+    else:
+        expected_score = np.mean(y_true == y_pred)
+    assert model.oob_score_ == pytest.approx(expected_score)
+
+
+@pytest.mark.parametrize("is_regression", [False, True])
+def test_warm_start_oob_equals_cold_fit(clf_data, reg_data, is_regression):
+    data = reg_data if is_regression else clf_data
+    np.random.seed(0)
+    cold = _make_oob_forest(data, 8, is_regression=is_regression)
+    cold.fit(data.X, data.y)
+
+    np.random.seed(0)
+    warm = _make_oob_forest(data, 3, is_regression=is_regression, warm_start=True)
+    warm.fit(data.X, data.y)
+    warm.n_estimators = 8
+    warm.fit(data.X, data.y)
+
+    # NB: The bootstrap seeds are the only draws from the global random generator, so the forests are the same.
+    np.testing.assert_array_equal(warm._bootstrap_seeds, cold._bootstrap_seeds)
+    np.testing.assert_allclose(warm.oob_prediction_, cold.oob_prediction_)
+    assert warm.oob_score_ == pytest.approx(cold.oob_score_)
+
+
+def test_warm_start_oob_on_other_samples_raises(clf_data):
+    np.random.seed(0)
+    model = _make_oob_forest(clf_data, 3, warm_start=True)
+    model.fit(clf_data.X, clf_data.y)
+
+    model.n_estimators = 5
+    with pytest.raises(ValueError, match="same training data"):
+        model.fit(clf_data.X[:100], clf_data.y[:100])
+    model.n_estimators = 2
+    with pytest.raises(ValueError, match="must not be less"):
+        model.fit(clf_data.X, clf_data.y)
+
+
+# =============================================================================
+# Multi-process mode
+# =============================================================================
+
+def test_multi_process_fit_with_prediction_cache(clf_data):
+    np.random.seed(0)
+    single = _make_forest(clf_data, n_estimators=4, splitter="random")
+    single.fit(clf_data.X, clf_data.y)
+
+    # NB: The model, with its cache, is pickled to send to the worker processes.
+    np.random.seed(0)
+    multi = _make_forest(clf_data, n_estimators=4, splitter="random",
+                         multi_process_options=MultiProcessOptions(n_cpu_cores_req=2))
+    prediction_cache = PredictionCache()
+    multi.set_prediction_cache(prediction_cache)
+    multi.fit(clf_data.X, clf_data.y)
+
+    # The trees fitted in the worker processes are the same as in a single process.
+    assert multi._get_n_fitted_estimators() == 4
+    for flat_multi, flat_single in zip(_get_flat_trees(multi), _get_flat_trees(single)):
+        _assert_same_flat_tree(flat_multi, flat_single)
+    np.testing.assert_array_equal(multi.predict(clf_data.X), single.predict(clf_data.X))
+    assert len(prediction_cache) > 0
@@ -0,0 +1,63 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 20/10/2026 11:00 am
+@desc: Tests of the batch-scoring command line tool (score).
+"""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fuzzytrees.score import main, score_file
+from fuzzytrees.util_data_processing_funcs import fuzzify_features
+from fuzzytrees.util_model_io import save_model
+
+
+@pytest.fixture(scope="module")
+def model_file(tmp_path_factory, fitted_models):
+    model, data = fitted_models["rdf_clf"]
+    filename = str(tmp_path_factory.mktemp("score") / "model.fzt")
+    save_model(model, filename)
+    # NB: The input files hold the raw features, which are fuzzified with the fuzzy sets saved with the model.
+    y_expected = np.asarray(model.predict(fuzzify_features(data.X_raw, data.fuzzification_options)))
+    return filename, data.X_raw, y_expected
+
+
+@pytest.mark.parametrize("n_workers, backend", [(1, "process"), (2, "thread"), (2, "process")])
+def test_score_npy_keeps_input_order(tmp_path, model_file, n_workers, backend):
+    filename, X_raw, y_expected = model_file
+    input_path, output_path = str(tmp_path / "input.npy"), str(tmp_path / "output.csv")
+    np.save(input_path, X_raw)
+
+    n_rows = score_file(filename, input_path, output_path, chunk_size=16, n_workers=n_workers, backend=backend,
+                        log_file=io.StringIO())
+
+    assert n_rows == len(X_raw)
+    np.testing.assert_array_equal(pd.read_csv(output_path)["prediction"].to_numpy(), y_expected)
+
+
+@pytest.mark.parametrize("n_workers, backend", [(1, "process"), (2, "thread"), (2, "process")])
+def test_score_csv_with_id_column(tmp_path, model_file, n_workers, backend):
+    filename, X_raw, y_expected = model_file
+    input_path, output_path = str(tmp_path / "input.csv"), str(tmp_path / "output.csv")
+    df = pd.DataFrame(X_raw, columns=["f{}".format(i) for i in range(X_raw.shape[1])])
+    df.insert(0, "id", np.arange(len(df)) * 10)
+    df.to_csv(input_path, index=False)
+
+    score_file(filename, input_path, output_path, chunk_size=16, n_workers=n_workers, backend=backend,
+               id_column="id", log_file=io.StringIO())
+
+    output = pd.read_csv(output_path)
+    np.testing.assert_array_equal(output["id"].to_numpy(), np.arange(len(df)) * 10)
+    np.testing.assert_array_equal(output["prediction"].to_numpy(), y_expected)
+
+
+def test_main_rejects_bad_input(tmp_path, model_file, capsys):
+    filename, _, _ = model_file
+    with pytest.raises(SystemExit) as e:
+        main([filename, str(tmp_path / "input.txt"), str(tmp_path / "output.csv")])
+    assert e.value.code == 2
+    assert "Cannot tell the format" in capsys.readouterr().err
@@ -0,0 +1,116 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 20/10/2026 11:30 am
+@desc: Tests of the HTTP inference server with micro-batching (serve),
+    run in process on a port chosen by the OS.
+"""
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from fuzzytrees.score import ChunkScorer
+from fuzzytrees.serve import InferenceServer, MicroBatcher
+from fuzzytrees.util_data_processing_funcs import fuzzify_features
+from fuzzytrees.util_model_io import save_model
+
+
+@pytest.fixture(scope="module")
+def served_model(tmp_path_factory, fitted_models):
+    model, data = fitted_models["rdf_clf"]
+    filename = str(tmp_path_factory.mktemp("serve") / "model.fzt")
+    save_model(model, filename)
+    # NB: The requests hold the raw features, which are fuzzified with the fuzzy sets saved with the model.
+    y_expected = np.asarray(model.predict(fuzzify_features(data.X_raw, data.fuzzification_options)))
+    return filename, data.X_raw, y_expected
+
+
+async def _request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body).encode("utf-8") if body else b""
+    writer.write("{} {} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {}\r\nConnection: close\r\n\r\n".format(
+        method, path, len(data)).encode("latin-1") + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, response_body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(response_body)
+
+
+def _run_server(model_file, test_func, **batcher_kwargs):
+    async def run():
+        server = InferenceServer(MicroBatcher(ChunkScorer(model_file), **batcher_kwargs), port=0)
+        await server.start()
+        try:
+            return await test_func(server)
+        finally:
+            await server.stop()
+
+    return asyncio.run(run())
+
+
+def test_concurrent_requests_match_predict(served_model):
+    model_file, X_raw, y_expected = served_model
+
+    async def test(server):
+        responses = await asyncio.gather(*[_request(server.port, "POST", "/predict", {"instance": x.tolist()})
+                                           for x in X_raw])
+        assert all(status == 200 for status, _ in responses)
+        np.testing.assert_array_equal([body["predictions"][0] for _, body in responses], y_expected)
+
+        status, body = await _request(server.port, "POST", "/predict", {"instances": X_raw[:7].tolist()})
+        assert status == 200
+        np.testing.assert_array_equal(body["predictions"], y_expected[:7])
+
+        # The rows of the concurrent requests are coalesced into batches of at most max_batch_size rows.
+        metrics = server.get_metrics()
+        assert metrics["batch_size"]["max"] <= 32
+        assert metrics["batch_size"]["count"] < len(X_raw)
+        assert metrics["n_errors"] == 0
+
+    _run_server(model_file, test, max_batch_size=32, max_wait_ms=5, n_threads=2)
+
+
+@pytest.mark.parametrize("body", [
+    {"instances": [[0.1, 0.2]]},
+    {"instances": [[1, 2], [3]]},
+    {"instances": []},
+    {"rows": [[1]]},
+    "not json",
+])
+def test_bad_requests_are_rejected(served_model, body):
+    model_file, _, _ = served_model
+
+    async def test(server):
+        status, response = await _request(server.port, "POST", "/predict", body)
+        assert status == 400
+        assert response["error"].startswith("Bad request")
+
+    _run_server(model_file, test)
+
+
+def test_health_metrics_and_unknown_paths(served_model):
+    model_file, X_raw, _ = served_model
+
+    async def test(server):
+        assert await _request(server.port, "GET", "/health") == (200, {"status": "ok"})
+        assert (await _request(server.port, "GET", "/nope"))[0] == 404
+        await _request(server.port, "POST", "/predict", {"instance": X_raw[0].tolist()})
+        status, metrics = await _request(server.port, "GET", "/metrics")
+        assert status == 200
+        assert metrics["request_latency_s"]["count"] == 1
+
+    _run_server(model_file, test)
+
+
+def test_scorer_checks_the_number_of_features(served_model):
+    model_file, X_raw, _ = served_model
+    scorer = ChunkScorer(model_file)
+
+    assert scorer.n_features == X_raw.shape[1]
+    scorer.check_n_features(X_raw.shape[1])
+    with pytest.raises(ValueError, match="expects"):
+        scorer.score(X_raw[:, :-1])
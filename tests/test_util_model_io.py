@@ -0,0 +1,84 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 20/10/2026 10:00 am
+@desc: Tests of the FuzzyTrees model format (util_model_io).
+"""
+import struct
+
+import numpy as np
+import pytest
+
+from conftest import MODEL_NAMES
+from fuzzytrees.util_data_processing_funcs import extract_fuzzy_features, transform_fuzzy_features
+from fuzzytrees.util_model_io import FORMAT_VERSION, MAGIC, load_model, save_model
+
+
+@pytest.mark.parametrize("name", MODEL_NAMES)
+@pytest.mark.parametrize("mmap_mode, shared", [("r", False), (None, False), ("r", True)])
+def test_save_load_round_trip(tmp_path, fitted_models, name, mmap_mode, shared):
+    model, data = fitted_models[name]
+    filename = str(tmp_path / "model.fzt")
+    save_model(model, filename)
+
+    loaded = load_model(filename, mmap_mode=mmap_mode, shared=shared)
+    assert type(loaded) is type(model)
+    np.testing.assert_array_equal(np.asarray(loaded.predict(data.X)), np.asarray(model.predict(data.X)))
+    if name == "tree_clf":
+        np.testing.assert_array_equal(np.asarray(loaded.predict_proba(data.X)),
+                                      np.asarray(model.predict_proba(data.X)))
+    np.testing.assert_array_equal(loaded.fuzzification_options.centroids, data.fuzzification_options.centroids)
+    np.testing.assert_array_equal(loaded.fuzzification_options.thetas, data.fuzzification_options.thetas)
+
+
+@pytest.mark.parametrize("name", ["rdf_clf", "gbdt_reg"])
+def test_shared_model_cannot_be_fitted_or_saved(tmp_path, fitted_models, name):
+    model, data = fitted_models[name]
+    filename = str(tmp_path / "model.fzt")
+    save_model(model, filename)
+    loaded = load_model(filename, shared=True)
+
+    with pytest.raises(ValueError):
+        loaded.fit(data.X, data.y)
+    with pytest.raises(ValueError):
+        save_model(loaded, str(tmp_path / "again.fzt"))
+
+
+@pytest.mark.parametrize("mmap_mode", ["r", None])
+def test_load_rejects_bad_magic(tmp_path, mmap_mode):
+    filename = str(tmp_path / "bad.fzt")
+    with open(filename, "wb") as f:
+        f.write(b"NOTAMODEL" + b"\0" * 64)
+
+    with pytest.raises(ValueError, match="not a FuzzyTrees model file"):
+        load_model(filename, mmap_mode=mmap_mode)
+
+
+def test_load_rejects_truncated_file(tmp_path):
+    filename = str(tmp_path / "short.fzt")
+    with open(filename, "wb") as f:
+        f.write(MAGIC)
+
+    with pytest.raises(ValueError, match="not a FuzzyTrees model file"):
+        load_model(filename)
+
+
+def test_load_rejects_newer_version(tmp_path, fitted_models):
+    model, _ = fitted_models["tree_clf"]
+    filename = str(tmp_path / "model.fzt")
+    save_model(model, filename)
+    # The version follows the magic bytes, as a little-endian uint32.
+    with open(filename, "r+b") as f:
+        f.seek(len(MAGIC))
+        f.write(struct.pack("<I", FORMAT_VERSION + 1))
+
+    with pytest.raises(ValueError, match="version"):
+        load_model(filename)
+
+
+def test_transform_fuzzy_features_matches_extract(clf_data):
+    X_fuzzy_dms, centroids, thetas = extract_fuzzy_features(clf_data.X_raw, conv_k=3, fuzzy_reg=0.3,
+                                                            return_fuzzy_sets=True)
+    np.testing.assert_allclose(transform_fuzzy_features(clf_data.X_raw, centroids, thetas, fuzzy_reg=0.3),
+                               X_fuzzy_dms, rtol=0, atol=1e-9)
@@ -0,0 +1,150 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 20/10/2026 12:30 pm
+@desc: Tests of the prediction cache (util_prediction_cache).
+"""
+import pickle
+
+import numpy as np
+import pytest
+
+from conftest import MODEL_NAMES, make_model
+from fuzzytrees import util_prediction_cache
+from fuzzytrees.util_prediction_cache import PredictionCache, _unique_rows
+
+
+def _repeated_rows(X, n_rows=500, seed=0):
+    return X[np.random.RandomState(seed).randint(0, len(X), n_rows)]
+
+
+@pytest.fixture
+def cached(fitted_models):
+    """
+    Set a cache on a shared fitted model for the test, and remove it after.
+    """
+    models = []
+
+    def set_cache(name, prediction_cache):
+        model, data = fitted_models[name]
+        model.set_prediction_cache(prediction_cache)
+        models.append(model)
+        return model, data
+
+    yield set_cache
+    for model in models:
+        model.set_prediction_cache(None)
+
+
+@pytest.mark.parametrize("name", MODEL_NAMES)
+@pytest.mark.parametrize("key", ["row", "leaves"])
+def test_cached_predict_equals_uncached(cached, fitted_models, name, key):
+    model, data = fitted_models[name]
+    X = _repeated_rows(data.X)
+    y_expected = np.asarray(model.predict(X))
+
+    prediction_cache = PredictionCache(key=key)
+    model, _ = cached(name, prediction_cache)
+    np.testing.assert_array_equal(np.asarray(model.predict(X)), y_expected)
+    n_misses = prediction_cache.misses
+    assert n_misses <= len(np.unique(X, axis=0))
+
+    # Every row of the second call is served from the cache.
+    np.testing.assert_array_equal(np.asarray(model.predict(X)), y_expected)
+    assert prediction_cache.misses == n_misses
+    assert prediction_cache.hits == 2 * len(X) - n_misses
+
+
+def test_eviction_at_max_size(cached, fitted_models):
+    model, data = fitted_models["rdf_reg"]
+    y_expected = np.asarray(model.predict(data.X))
+
+    prediction_cache = PredictionCache(max_size=10)
+    model, _ = cached("rdf_reg", prediction_cache)
+    np.testing.assert_array_equal(model.predict(data.X), y_expected)
+    assert len(prediction_cache) == 10
+    assert prediction_cache.evictions == len(data.X) - 10
+
+    # The least recently used rows are evicted first: the last rows predicted are still cached.
+    n_misses = prediction_cache.misses
+    np.testing.assert_array_equal(model.predict(data.X[-10:]), y_expected[-10:])
+    assert prediction_cache.misses == n_misses
+    np.testing.assert_array_equal(model.predict(data.X[:1]), y_expected[:1])
+    assert prediction_cache.misses == n_misses + 1
+    assert len(prediction_cache) == 10
+
+
+@pytest.mark.parametrize("name", ["tree_clf", "rdf_clf", "gbdt_reg"])
+def test_refit_clears_cache(clf_data, reg_data, name):
+    data = clf_data if name.endswith("clf") else reg_data
+    np.random.seed(0)
+    model = make_model(name, data)
+    model.fit(data.X, data.y)
+    prediction_cache = PredictionCache()
+    model.set_prediction_cache(prediction_cache)
+    model.predict(data.X)
+    assert len(prediction_cache) > 0
+
+    model.fit(data.X, data.y)
+    assert len(prediction_cache) == 0
+
+
+def test_keys_are_quantised():
+    prediction_cache = PredictionCache(decimals=1)
+    X = np.array([[0.01, -0.0], [0.04, 0.0], [0.2, 0.0]])
+    keys, _, inverse = _unique_rows(prediction_cache.get_keys(X))
+    assert len(keys) == 2
+    np.testing.assert_array_equal(inverse[:2], [inverse[0]] * 2)
+
+    # The exact keys only merge -0.0 and 0.0.
+    keys, _, _ = _unique_rows(PredictionCache().get_keys(np.array([[1.0, -0.0], [1.0, 0.0], [1.0, 1e-12]])))
+    assert len(keys) == 2
+
+
+def test_unique_rows_with_hash_collisions(monkeypatch):
+    X = _repeated_rows(np.random.RandomState(1).rand(50, 6), n_rows=300)
+    keys = PredictionCache().get_keys(X)
+    # All the rows hash to 0, so every group of rows with the same hash has different rows.
+    monkeypatch.setattr(util_prediction_cache, "_get_hash_multipliers",
+                        lambda n_columns: np.zeros(n_columns, dtype=np.uint64))
+
+    unique_keys, first_idxs, inverse = _unique_rows(keys)
+    assert len(unique_keys) == len(np.unique(X, axis=0))
+    np.testing.assert_array_equal(X[first_idxs][inverse], X)
+
+
+def test_predict_with_hash_collisions(monkeypatch):
+    X = _repeated_rows(np.random.RandomState(2).rand(40, 3), n_rows=200)
+    monkeypatch.setattr(util_prediction_cache, "_get_hash_multipliers",
+                        lambda n_columns: np.zeros(n_columns, dtype=np.uint64))
+    prediction_cache = PredictionCache()
+
+    def predict_func(X):
+        return X.sum(axis=1)
+
+    np.testing.assert_array_equal(prediction_cache.predict(X, predict_func), predict_func(X))
+    np.testing.assert_array_equal(prediction_cache.predict(X, predict_func), predict_func(X))
+    assert prediction_cache.misses == 40
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        PredictionCache(max_size=0)
+    with pytest.raises(ValueError):
+        PredictionCache(key="hash")
+    with pytest.raises(ValueError):
+        PredictionCache(decimals=2, key="leaves")
+    with pytest.raises(ValueError):
+        PredictionCache(key="leaves").predict(np.zeros((2, 2)), lambda X: X.sum(axis=1))
+
+
+def test_pickled_cache_starts_empty():
+    prediction_cache = PredictionCache(max_size=10, decimals=2)
+    prediction_cache.predict(np.eye(3), lambda X: X.sum(axis=1))
+
+    copy = pickle.loads(pickle.dumps(prediction_cache))
+    assert len(copy) == 0 and len(prediction_cache) == 3
+    assert (copy.max_size, copy.decimals, copy.key) == (10, 2, "row")
+    np.testing.assert_array_equal(copy.predict(np.eye(3), lambda X: X.sum(axis=1)), np.ones(3))
+    assert len(copy) == 3
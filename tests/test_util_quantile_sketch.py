@@ -0,0 +1,71 @@
+# _*_coding:utf-8_*_
+"""
+@author: Zhaoqing Liu
+@email: Zhaoqing.Liu-1@student.uts.edu.au
+@date: 20/10/2026 1:00 pm
+@desc: Tests of the streaming quantile sketch (util_quantile_sketch).
+"""
+import numpy as np
+import pytest
+
+from fuzzytrees.util_quantile_sketch import QuantileSketch, get_quantile_split_values
+
+N_VALUES = 100000
+QS = np.linspace(0.01, 0.99, 99)
+
+
+def _get_values(distribution):
+    rng = np.random.RandomState(0)
+    return rng.rand(N_VALUES) if distribution == "uniform" else rng.randn(N_VALUES)
+
+
+def _get_rank_error(values, quantiles):
+    """
+    Get the largest difference between the fraction of the values up to each
+    quantile and the fraction asked for.
+    """
+    ranks = np.searchsorted(np.sort(values), quantiles, side="right") / len(values)
+    return np.max(np.abs(ranks - QS))
+
+
+@pytest.mark.parametrize("distribution", ["uniform", "normal"])
+@pytest.mark.parametrize("k", [50, 200])
+def test_rank_error_within_bound(distribution, k):
+    values = _get_values(distribution)
+    sketch = QuantileSketch(k=k)
+    for chunk in np.array_split(values, 50):
+        sketch.update(chunk)
+
+    assert sketch.n == N_VALUES
+    # The sketch holds O(k) values, and the rank error is O(1/k).
+    assert sum(len(level) for level in sketch._levels) <= 3 * k
+    assert _get_rank_error(values, sketch.quantiles(QS)) < 3. / k
+
+
+@pytest.mark.parametrize("distribution", ["uniform", "normal"])
+def test_merged_sketches_within_bound(distribution):
+    values = _get_values(distribution)
+    sketch = QuantileSketch(k=200).update(values[:60000])
+    sketch.merge(QuantileSketch(k=200, seed=1).update(values[60000:]))
+
+    assert sketch.n == N_VALUES
+    assert _get_rank_error(values, sketch.quantiles(QS)) < 3. / 200
+
+
+def test_small_streams_are_exact():
+    values = np.random.RandomState(0).permutation(100).astype(float)
+    sketch = QuantileSketch(k=200).update(values)
+
+    np.testing.assert_array_equal(sketch.quantiles([0., 0.5, 1.]), [0., 49., 99.])
+    with pytest.raises(ValueError):
+        QuantileSketch().quantiles([0.5])
+
+
+def test_split_values_are_feature_values():
+    feature_values = np.random.RandomState(0).randint(0, 1000, size=N_VALUES)
+    split_values = get_quantile_split_values(feature_values, 32)
+
+    assert split_values.dtype == feature_values.dtype
+    assert len(split_values) <= 32
+    assert np.all(np.diff(split_values) > 0)
+    assert np.all(np.isin(split_values, feature_values))